@@ -0,0 +1,55 @@
+import argparse
+
+import numpy as np
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.integrators import SCHEMES, CompositionPropagator, AdaptivePropagator
+
+# FFT count vs accuracy of the splitting schemes for a displaced packet in
+# the 3D harmonic oscillator, plus the adaptive solver at a few tolerances.
+# The reference is yoshida6 with a much smaller dt.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/bench_integrators.py --N 32 --total-time 2.0
+
+def l2_error(psi, ref, dV):
+    return np.sqrt(np.sum(np.abs(psi - ref)**2) * dV)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Splitting scheme benchmark")
+    parser.add_argument("--N", type=int, default=32)
+    parser.add_argument("--total-time", type=float, default=2.0)
+    parser.add_argument("--omega", type=float, default=1.0)
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 20, 40, 80])
+    parser.add_argument("--tols", type=float, nargs="+", default=[1e-3, 1e-5, 1e-7])
+    args = parser.parse_args()
+
+    grid = Grid.cube(-8.0, 8.0, args.N)
+    psi = gaussian_wavepacket(grid, (1.5, -1.0, 0.0), 1.0, (0.0, 1.0, 0.0))
+    V = potential_function(grid, potential_type='harmonic', omega=args.omega)
+    T = args.total_time
+
+    n_ref = 20 * max(args.steps)
+    ref = CompositionPropagator(psi, V, T / n_ref, grid, scheme='yoshida6')
+    ref.run(n_ref)
+
+    print(f"{'scheme':>14} {'steps':>6} {'FFTs':>7} {'L2 error':>10}")
+    for name in SCHEMES:
+        for n in args.steps:
+            prop = CompositionPropagator(psi, V, T / n, grid, scheme=name)
+            prop.run(n)
+            print(f"{name:>14} {n:>6} {prop.fft_count:>7} "
+                  f"{l2_error(prop.psi, ref.psi, grid.dV):>10.2e}")
+
+    print(f"\n{'adaptive tol':>14} {'steps':>6} {'FFTs':>7} {'L2 error':>10} {'rejected':>9}")
+    for tol in args.tols:
+        adaptive = AdaptivePropagator(psi, V, grid, tol=tol, dt=T / max(args.steps))
+        adaptive.run_until(T)
+        print(f"{tol:>14.0e} {adaptive.accepted:>6} {adaptive.fft_count:>7} "
+              f"{l2_error(adaptive.psi, ref.psi, grid.dV):>10.2e} {adaptive.rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.kernels import available_kernel_backends, get_kernels
+from src.observables import EnergyRecorder
+
+# Phase multiply plus the norm and <V> reductions, as separate NumPy
+# passes (psi *= phase; rho = |psi|^2; sums) against the fused kernels of
+# each installed backend, on N^3 grids. "B/pt" is the modelled main-memory
+# traffic per point (c, r = complex and real item sizes):
+#
+#   separate: multiply 3c, abs c+r, **2 2r, sum r, rho*V 3r, sum r = 4c + 8r
+#   fused:    psi read and written, phase and V read once      = 3c + r
+#
+# "temp MiB" is the peak of the temporaries allocated (tracemalloc). The
+# second table runs the propagator with a norm/energy observer every step.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/bench_kernels.py --sizes 64 128 192 --steps 20
+
+
+def best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def temporaries(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def separate(psi, phase, V):
+    psi *= phase
+    rho = np.abs(psi)**2
+    return np.sum(rho, dtype=np.float64), np.sum(rho * V, dtype=np.float64)
+
+
+class SeparateEnergyRecorder(EnergyRecorder):
+    # The same observer without fusion: rho is formed and reduced here
+    fused_sums = False
+
+    def sample_position(self, propagator, psi):
+        rho = np.abs(psi)**2
+        self._V = np.sum(rho * propagator.potential_at(propagator.time), dtype=np.float64)
+
+    def sample_momentum(self, propagator, psi_k):
+        rho_k = np.abs(psi_k)**2
+        T_of_k = (propagator.hbar**2 / (2.0 * propagator.m)) * self.grid.k2
+        scale = self.grid.dV / psi_k.size
+        norm = np.sum(rho_k, dtype=np.float64) * scale
+        E_kinetic = np.sum(rho_k * T_of_k, dtype=np.float64) * scale
+        E_potential = self._V * self.grid.dV
+        self._rows.append((propagator.step_count, propagator.time, norm,
+                           E_kinetic, E_potential, E_kinetic + E_potential))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fused kernel benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dtype", default="complex128", choices=["complex64", "complex128"])
+    args = parser.parse_args()
+
+    dtype = np.dtype(args.dtype)
+    c, r = dtype.itemsize, dtype.itemsize // 2
+    backends = available_kernel_backends()
+    print(f"backends: {', '.join(backends)}; {dtype.name}\n")
+
+    print(f"{'N':>5} {'kernel':>10} {'ms':>8} {'B/pt':>6} {'GB/s':>7} {'temp MiB':>9} {'max rel dev':>12}")
+    for N in args.sizes:
+        rng = np.random.default_rng(0)
+        shape = (N, N, N)
+        psi = (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)).astype(dtype)
+        phase = np.exp(1j * rng.uniform(0.0, 2.0 * np.pi, shape)).astype(dtype)
+        V = rng.uniform(0.0, 5.0, shape).astype(psi.real.dtype)
+        work = psi.copy()
+        reference = np.array(separate(work, phase, V))
+
+        rows = [("separate", lambda: separate(work, phase, V), 4 * c + 8 * r)]
+        for name in backends:
+            kernels = get_kernels(name)
+            kernels.multiply_sums(psi.copy(), phase, V)  # compile / warm up
+            rows.append((name, lambda k=kernels: k.multiply_sums(work, phase, V), 3 * c + r))
+        for name, func, traffic in rows:
+            work[...] = psi
+            sums = np.array(func())
+            deviation = np.max(np.abs(sums - reference) / reference)
+            seconds = best(func, args.repeat)
+            print(f"{N:>5} {name:>10} {seconds * 1e3:>8.2f} {traffic:>6} "
+                  f"{traffic * psi.size / seconds / 1e9:>7.2f} {temporaries(func):>9.1f} "
+                  f"{deviation:>12.1e}")
+        print()
+
+    print(f"{'N':>5} {'observer':>10} {'kernel':>8} {'ms/step':>8} {'E drift':>10}")
+    for N in args.sizes:
+        grid = Grid.cube(-8.0, 8.0, N, dtype=np.float32 if dtype == np.complex64 else np.float64)
+        psi0 = gaussian_wavepacket(grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 0.0, -1.0)).astype(dtype)
+        V = potential_function(grid, potential_type='harmonic', omega=0.5)
+        for label, observer, kernel_names in (("none", None, ["numpy"]),
+                                              ("separate", SeparateEnergyRecorder, ["numpy"]),
+                                              ("fused", EnergyRecorder, backends)):
+            for name in kernel_names:
+                propagator = SplitOperatorPropagator(psi0, V, 0.005, grid, kernels=name)
+                recorder = propagator.add_observer(observer(grid)) if observer else None
+                propagator.run(1)
+                start = time.perf_counter()
+                propagator.run(args.steps)
+                elapsed = (time.perf_counter() - start) / args.steps
+                drift = np.ptp(recorder['E']) if recorder else float('nan')
+                print(f"{N:>5} {label:>10} {name:>8} {elapsed * 1e3:>8.2f} {drift:>10.2e}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
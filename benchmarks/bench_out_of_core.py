@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from src.grid import Grid
+from src.potential_library import Box
+from src.out_of_core import OutOfCorePropagator
+
+# Time and I/O volume of out-of-core propagation for a range of memory
+# budgets, to pick block sizes for a given disk. psi is built slab by slab
+# and the barrier is evaluated per slab, so nothing grid-sized is held in
+# RAM. Put --dir on the disk the real runs will use.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/bench_out_of_core.py --N 256 --budgets 64 256 1024 --dir /scratch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core propagation benchmark")
+    parser.add_argument("--N", type=int, default=128)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--budgets", type=float, nargs="+", default=[16, 64, 256],
+                        help="memory budgets in MB")
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+
+    grid = Grid.cube(-10.0, 10.0, args.N)
+    packet = lambda coords: np.exp(-((coords[0] + 5.0)**2 + coords[1]**2 + coords[2]**2) / 2.0
+                                   + 3j * coords[0])
+    V = Box(1.0) * 10.0
+
+    print(f"N={args.N}^3, psi {np.prod(grid.shape) * 16 / 2**20:.0f} MB\n")
+    print(f"{'budget MB':>10} {'slab rows':>10} {'block cols':>11} {'s/step':>8} "
+          f"{'read MB/step':>13} {'write MB/step':>14} {'MB/s':>8}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for budget in args.budgets:
+            path = os.path.join(tmp, "psi.dat")
+            prop = OutOfCorePropagator(path, packet, V, 0.01, grid, memory_budget=int(budget * 2**20))
+            start = time.perf_counter()
+            prop.run(args.steps)
+            elapsed = time.perf_counter() - start
+            r = prop.io_report()
+            io = (r["bytes_read"] + r["bytes_written"]) / 2**20
+            print(f"{budget:>10.0f} {r['slab_rows']:>10} {r['block_cols']:>11} "
+                  f"{elapsed / args.steps:>8.2f} {r['read_per_step'] / 2**20:>13.1f} "
+                  f"{r['written_per_step'] / 2**20:>14.1f} {io / elapsed:>8.0f}")
+            prop.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.parallel import SlabPropagator
+
+# Strong scaling of the slab-decomposed propagator from 1 to --max-workers
+# processes on a fixed N^3 grid, against the single-process
+# SplitOperatorPropagator (same fused Strang steps, so the results must
+# agree to round-off). Speedup needs as many free cores as workers.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/bench_parallel.py --N 256 --steps 20 --max-workers 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slab decomposition scaling benchmark")
+    parser.add_argument("--N", type=int, default=128)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--fft-backend", default=None)
+    args = parser.parse_args()
+
+    grid = Grid.cube(-10.0, 10.0, args.N)
+    psi = gaussian_wavepacket(grid, (-3.0, 0.0, 0.0), 1.0, (3.0, 0.0, 0.0))
+    V = potential_function(grid, potential_type='barrier', V0=5.0, a=1.0)
+
+    serial = SplitOperatorPropagator(psi, V, 0.01, grid, fft_backend=args.fft_backend)
+    serial.run(1)
+    np.copyto(serial.psi, psi)
+    start = time.perf_counter()
+    serial.run(args.steps)
+    t_serial = (time.perf_counter() - start) / args.steps
+    print(f"N={args.N}^3, {os.cpu_count()} cores, serial {1e3 * t_serial:.1f} ms/step\n")
+
+    print(f"{'workers':>8} {'ms/step':>9} {'speedup':>8} {'efficiency':>11} {'max |diff|':>11}")
+    workers = 1
+    while workers <= args.max_workers:
+        with SlabPropagator(psi, V, 0.01, grid, workers=workers,
+                            fft_backend=args.fft_backend) as prop:
+            prop.run(1)  # warm up the workers' FFT plans
+            np.copyto(prop.psi, psi)
+            start = time.perf_counter()
+            prop.run(args.steps)
+            elapsed = (time.perf_counter() - start) / args.steps
+            diff = np.max(np.abs(prop.psi - serial.psi))
+        speedup = t_serial / elapsed
+        print(f"{workers:>8} {1e3 * elapsed:>9.1f} {speedup:>8.2f} {speedup / workers:>11.2f} "
+              f"{diff:>11.1e}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
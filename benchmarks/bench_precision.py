@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import numpy as np
+from src.initialize_system import initialize_system
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.utils import DriftMonitor
+
+# Speed and accuracy of complex64 vs complex128 propagation of the barrier
+# scenario from main.py. The complex128 run is the reference for the error.
+# NumPy's pocketfft gains little from complex64; use --fft-backend scipy or
+# pyfftw to see the bandwidth saving.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/bench_precision.py --sizes 32 64 128 --steps 200
+
+def run(N, num_steps, dtype, fft_backend=None, every=20):
+    xmin, xmax = -10.0, 10.0
+    hbar, m, dt = 1.0, 1.0, 0.01
+    real = np.float32 if dtype == np.complex64 else np.float64
+
+    X, Y, Z, dx, psi, KX, KY, KZ, dk = initialize_system(
+        xmin, xmax, N, -5.0, 0.0, 0.0, 1.0, 3.0, 0.0, 0.0, hbar, m,
+        sparse=True, dtype=dtype
+    )
+    V = potential_function(X, Y, Z, potential_type='barrier', V0=10.0, a=1.0, dtype=real)
+
+    propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m,
+                                         fft_backend=fft_backend)
+    monitor = DriftMonitor(psi, V, dx, KX, KY, KZ, hbar, m, tolerance=None)
+
+    # Timed run without monitoring, then a monitored run for the drift
+    start = time.perf_counter()
+    propagator.run(num_steps)
+    elapsed = time.perf_counter() - start
+    psi_final = propagator.psi.copy()
+
+    propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m,
+                                         fft_backend=fft_backend)
+    monitor.track(propagator, num_steps, every=every)
+    return psi_final, elapsed, monitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="complex64 vs complex128 benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--fft-backend", default=None)
+    args = parser.parse_args()
+
+    print(f"{'N':>5} {'dtype':>10} {'ms/step':>9} {'speedup':>8} "
+          f"{'max rel err':>12} {'norm drift':>11} {'E drift':>10}")
+    for N in args.sizes:
+        ref, t_ref, mon_ref = run(N, args.steps, np.complex128, args.fft_backend)
+        single, t_single, mon_single = run(N, args.steps, np.complex64, args.fft_backend)
+        err = np.max(np.abs(single - ref)) / np.max(np.abs(ref))
+
+        for name, t, mon, e in (("complex128", t_ref, mon_ref, 0.0),
+                                ("complex64", t_single, mon_single, err)):
+            print(f"{N:>5} {name:>10} {1e3 * t / args.steps:>9.3f} {t_ref / t:>8.2f} "
+                  f"{e:>12.2e} {mon.max_norm_drift:>11.2e} {mon.max_energy_drift:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
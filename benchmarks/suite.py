@@ -0,0 +1,150 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from src.initialize_system import initialize_system, initialize_grid
+from src.potential import potential_function, double_slit_3d
+from src.evolve import evolve_wavefunction, SplitOperatorPropagator
+from src.utils import compute_total_energy
+from src.visualize import visualize_results_3d
+from src.benchmark import (measure, save_results, load_results, compare_results, regressions)
+
+# Timing and peak-RSS suite for the main pipeline stages (init, potential,
+# evolve_wavefunction, the fused propagator, energy, plotting) over grid
+# sizes and the three example scenarios. Results are saved as
+# machine-tagged JSON; `compare` flags regressions between two files and
+# exits non-zero if there are any.
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 benchmarks/suite.py run --sizes 32 64 128 256 --label before
+#   python3 benchmarks/suite.py compare benchmarks/results/A.json benchmarks/results/B.json
+
+SCENARIOS = ("barrier", "harmonic", "double_slit")
+HBAR, M, DT = 1.0, 1.0, 0.01
+
+
+def setup(scenario, N):
+    # Example defaults; returns (init callable, potential callable)
+    if scenario == "double_slit":
+        def init():
+            grid, psi = initialize_grid((-10.0, -10.0, -5.0), (10.0, 10.0, 5.0), (N, N, N // 2),
+                                        (-5.0, 0.0, 0.0), 1.0, (5.0, 0.0, 0.0))
+            return grid.coords + (grid.dV, psi) + grid.k
+        return init, lambda X, Y, Z: double_slit_3d(X, Y, Z, 20.0)
+
+    r0, k0 = ((-5.0, 0.0, 0.0), (3.0, 0.0, 0.0)) if scenario == "barrier" else ((1.0, 0.0, 0.0), (0.0,) * 3)
+
+    def init():
+        X, Y, Z, dx, psi, KX, KY, KZ, dk = initialize_system(
+            -10.0, 10.0, N, *r0, 1.0, *k0, HBAR, M, sparse=True)
+        return X, Y, Z, dx**3, psi, KX, KY, KZ
+    if scenario == "barrier":
+        return init, lambda X, Y, Z: potential_function(X, Y, Z, potential_type='barrier', V0=10.0, a=1.0)
+    return init, lambda X, Y, Z: potential_function(X, Y, Z, potential_type='harmonic', omega=1.0)
+
+
+def run_cases(scenario, N, steps, repeat, fft_backend, plot_dir):
+    init, build_potential = setup(scenario, N)
+    results = []
+
+    def record(stage, func, steps_done=None, ffts=None):
+        m = measure(func, repeat=repeat)
+        m.update(name=f"{scenario}/N={N}/{stage}", scenario=scenario, N=N, stage=stage)
+        if steps_done:
+            m["steps_per_s"] = steps_done / m["seconds"]
+        if ffts:
+            m["ffts_per_s"] = ffts / m["seconds"]
+        results.append(m)
+        return m
+
+    X, Y, Z, dV, psi, KX, KY, KZ = init()
+    record("init", init)
+    V = build_potential(X, Y, Z)
+    record("potential", lambda: build_potential(X, Y, Z))
+    dx = dV**(1.0 / 3.0)
+
+    record("evolve_wavefunction",
+           lambda: evolve_wavefunction(psi, V, DT, dx, KX, KY, KZ, HBAR, M, fft_backend=fft_backend),
+           steps_done=1, ffts=4)
+    propagator = SplitOperatorPropagator(psi, V, DT, KX, KY, KZ, hbar=HBAR, m=M, fft_backend=fft_backend)
+    record("propagator", lambda: propagator.run(steps), steps_done=steps, ffts=2 * steps + 2)
+    record("energy", lambda: compute_total_energy(psi, V, dx, KX, KY, KZ, HBAR, M, fft_backend=fft_backend),
+           ffts=1)
+
+    def plot():
+        cwd = os.getcwd()
+        os.chdir(plot_dir)
+        try:
+            visualize_results_3d(X, Y, propagator.psi, step=steps, potential=V, save_fig=True)
+        finally:
+            os.chdir(cwd)
+            plt.close("all")
+    record("plot", plot)
+    return results
+
+
+def cmd_run(args):
+    results = []
+    print(f"{'case':>36} {'ms':>10} {'steps/s':>9} {'FFTs/s':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as plot_dir:
+        for N in args.sizes:
+            for scenario in args.scenarios:
+                for r in run_cases(scenario, N, args.steps, args.repeat, args.fft_backend, plot_dir):
+                    rss = r["peak_rss"] / 2**20 if r["peak_rss"] else float("nan")
+                    print(f"{r['name']:>36} {1e3 * r['seconds']:>10.2f} "
+                          f"{r.get('steps_per_s', float('nan')):>9.1f} "
+                          f"{r.get('ffts_per_s', float('nan')):>9.1f} {rss:>12.1f}")
+                    results.append(r)
+    path = save_results(results, args.output, label=args.label)
+    print(f"\nSaved {path}")
+
+
+def cmd_compare(args):
+    old, new = load_results(args.old), load_results(args.new)
+    rows, different_machine = compare_results(old, new, threshold=args.threshold,
+                                              memory_threshold=args.memory_threshold)
+    if different_machine:
+        print(f"warning: comparing results from different machines ({old['tag']} vs {new['tag']})\n")
+    print(f"{'case':>36} {'old ms':>10} {'new ms':>10} {'time x':>7} {'RSS x':>6}  flags")
+    for name, t_old, t_new, ratio, rss_ratio, flags in rows:
+        rss = f"{rss_ratio:6.2f}" if rss_ratio is not None else f"{'-':>6}"
+        print(f"{name:>36} {1e3 * t_old:>10.2f} {1e3 * t_new:>10.2f} {ratio:>7.2f} {rss}  {' '.join(flags)}")
+    bad = regressions(rows)
+    print(f"\n{len(bad)} regression(s) in {len(rows)} common case(s)")
+    return 1 if bad else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the suite and save machine-tagged JSON")
+    run.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128, 256])
+    run.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run.add_argument("--steps", type=int, default=20)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--fft-backend", default=None)
+    run.add_argument("--label", default=None)
+    run.add_argument("--output", default=os.path.join("benchmarks", "results"))
+
+    compare = sub.add_parser("compare", help="flag regressions between two result files")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="relative slowdown counted as a regression")
+    compare.add_argument("--memory-threshold", type=float, default=0.2,
+                         help="relative peak-RSS growth counted as a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        cmd_run(args)
+        return 0
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,12 @@
 import numpy as np
 from src.initialize_system import initialize_system
 from src.potential import potential_function
-from src.evolve import evolve_wavefunction
+from src.evolve import SplitOperatorPropagator
+from src.td_potential import TimeDependentPotential
+from src.absorbing import AbsorbingBoundary, absorbing_strength
+from src.flux import FluxAnalyzer
 from src.visualize import visualize_results_3d
+from src.instrument import profile_from_env
 
 def main():
     print("3D Barrier Potential Simulation")
@@ -67,21 +71,41 @@ def main():
 
     # Initialize system
     (X, Y, Z, dx, psi, KX, KY, KZ, dk) = initialize_system(
-        xmin, xmax, N, x0, y0, z0, sigma, kx0, ky0, kz0, hbar=1.0, m=1.0
+        xmin, xmax, N, x0, y0, z0, sigma, kx0, ky0, kz0, hbar=1.0, m=1.0, sparse=True
     )
 
     # Define potential
     V = potential_function(X, Y, Z, potential_type='barrier', V0=V0, a=a)
 
+    # Absorbing layers on the x faces stop transmitted/reflected probability
+    # from wrapping around the periodic box
+    width = 0.15 * (xmax - xmin)
+    strength = absorbing_strength(width, speed=max(abs(kx0), 1.0))
+    boundary = AbsorbingBoundary(X, Y, Z, width=width, strength=strength, faces=('x-', 'x+'))
+
     # Time evolution
     num_steps = int(total_time / dt)
-    for step in range(num_steps):
-        psi = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar=1.0, m=1.0)
+    propagator = SplitOperatorPropagator(psi, TimeDependentPotential(V, [boundary]), dt,
+                                         KX, KY, KZ, hbar=1.0, m=1.0)
+
+    # Flux out through planes just inside the absorbing layers; the run
+    # ends as soon as both have converged
+    flux = FluxAnalyzer((X, Y, Z), {'x-': (0, xmin + width, -1.0),
+                                    'x+': (0, xmax - width, 1.0)})
+    propagator.add_observer(flux)
+    psi = propagator.run(num_steps)
+    if flux.converged:
+        print(f"Fluxes converged after {propagator.step_count} of {num_steps} steps")
+    for face, p in flux.fractions.items():
+        print(f"Flux out through {face}: {p:.4f}")
+    for face, p in boundary.absorbed.items():
+        print(f"Absorbed at {face}: {p:.4f}")
 
     # Visualize results
-    visualize_results_3d(X, Y, psi, step=num_steps, potential=V, z_index=N//2, save_fig=False)
+    visualize_results_3d(X, Y, psi, step=propagator.step_count, potential=V, z_index=N//2, save_fig=False)
     print("Simulation finished!")
 
 if __name__ == "__main__":
-    main()
+    with profile_from_env():
+        main()
 
@@ -1,9 +1,15 @@
 
+import os
+
 import numpy as np
-from src.initialize_system import initialize_system
-from src.potential import potential_function
-from src.evolve import evolve_wavefunction
+from src.initialize_system import initialize_grid
+from src.potential import double_slit_3d
+from src.evolve import SplitOperatorPropagator
+from src.td_potential import TimeDependentPotential
+from src.absorbing import AbsorbingBoundary, absorbing_strength
 from src.visualize import visualize_results_3d
+from src.render import FrameRecorder, encode_video
+from src.instrument import profile_from_env
 
 def main():
     print("3D Double-Slit Simulation!")
@@ -41,36 +47,49 @@ def main():
     while dt < 0.001 or dt > 0.05:
         dt = float(input("Invalid input! Enter dt in the range 0.001 to 0.05: "))
 
-    # Initialize system (3D)
-    (X, Y, Z, dx, psi, KX, KY, KZ, dk) = initialize_system(
-        xmin, xmax, N, x0, 0.0, 0.0, sigma, 5.0, 0.0, 0.0, hbar=1.0, m=1.0
+    # Initialize system (3D). The slits do not depend on z, so the z axis
+    # only has to hold the packet: half the x/y extent at the same spacing.
+    grid, psi = initialize_grid(
+        (xmin, xmin, xmin / 2), (xmax, xmax, xmax / 2), (N, N, N // 2),
+        (x0, 0.0, 0.0), sigma, (5.0, 0.0, 0.0)
     )
+    X, Y, Z = grid.coords
 
     # Double-slit potential
     V = double_slit_3d(X, Y, Z, V0)
 
+    # Absorbing layers on the x and y faces stop the diffracted waves from
+    # wrapping around the periodic box
+    width = 0.15 * (xmax - xmin)
+    boundary = AbsorbingBoundary(grid, width=width, strength=absorbing_strength(width, speed=5.0),
+                                 faces=('x-', 'x+', 'y-', 'y+'))
+
     # Time evolution
     num_steps = int(total_time / dt)
-    for step in range(num_steps):
-        psi = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar=1.0, m=1.0)
+    propagator = SplitOperatorPropagator(psi, TimeDependentPotential(V, [boundary]), dt,
+                                         grid, hbar=1.0, m=1.0)
+    # With $SOFT_FRAMES set, about 100 frames of the z = 0 plane are drawn
+    # there in the background while the loop runs
+    frames = os.environ.get("SOFT_FRAMES")
+    if frames:
+        recorder = FrameRecorder(frames, grid, None, every=max(num_steps // 100, 1),
+                                 potential=V, vmax=float(np.max(np.abs(psi)**2)))
+        propagator.add_observer(recorder)
+    psi = propagator.run(num_steps)
+    if frames:
+        recorder.close()
+        try:
+            print(f"Animation written to {encode_video(frames, os.path.join(frames, 'double_slit.mp4'))}")
+        except RuntimeError as error:
+            print(f"{len(recorder.paths)} frames written to {frames} ({error})")
+    for face, p in boundary.absorbed.items():
+        print(f"Absorbed at {face}: {p:.4f}")
 
     # Visualize results
-    visualize_results_3d(X, Y, psi, step=num_steps, potential=V, z_index=N//2, save_fig=False)
+    visualize_results_3d(X, Y, psi, step=num_steps, potential=V, z_index=grid.shape[2]//2, save_fig=False)
     print("3D Double-Slit Simulation finished.")
 
-def double_slit_3d(X, Y, Z, V0):
-    V = np.zeros_like(X)
-    thickness = 0.5
-    slit_center_sep = 1.5
-    slit_half_width = 0.2
-
-    mask_barrier = (np.abs(X) < thickness / 2.0)
-    slit1 = (Y > (slit_center_sep / 2 - slit_half_width)) & (Y < (slit_center_sep / 2 + slit_half_width))
-    slit2 = (Y > -(slit_center_sep / 2 + slit_half_width)) & (Y < -(slit_center_sep / 2 - slit_half_width))
-    barrier_region = mask_barrier & ~(slit1 | slit2)
-    V[barrier_region] = V0
-    return V
-
 if __name__ == "__main__":
-    main()
+    with profile_from_env():
+        main()
 
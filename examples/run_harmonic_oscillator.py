@@ -1,26 +1,37 @@
 
+import os
+
 import numpy as np
 from src.initialize_system import initialize_system
 from src.potential import potential_function
-from src.evolve import evolve_wavefunction
+from src.evolve import SplitOperatorPropagator
+from src.planner import plan_grid
 from src.visualize import visualize_results_3d
+from src.instrument import profile_from_env
 
 def main():
     print("3D Harmonic Oscillator Simulation!")
     print("Enter the following parameters within the specified intervals:\n")
 
-    # Prompt user for parameters
-    xmin = float(input("Enter xmin (e.g., -20.0 to -5.0): "))
-    while xmin > -5.0 or xmin < -20.0:
-        xmin = float(input("Invalid input! Enter xmin in the range -20.0 to -5.0: "))
-
-    xmax = float(input("Enter xmax (e.g., 5.0 to 20.0): "))
-    while xmax < 5.0 or xmax > 20.0:
-        xmax = float(input("Invalid input! Enter xmax in the range 5.0 to 20.0: "))
-
-    N = int(input("Enter grid size N (e.g., 32 to 128, must be a power of 2): "))
-    while not (32 <= N <= 128 and (N & (N - 1)) == 0):  # Check if N is a power of 2
-        N = int(input("Invalid input! Enter N in the range 32 to 128 (must be a power of 2): "))
+    # With $SOFT_PLAN set, the range, N and dt are chosen by the planner
+    # instead of asked for (tolerance $SOFT_PLAN, e.g. 1e-4)
+    tol = os.environ.get("SOFT_PLAN")
+    if tol:
+        print(f"SOFT_PLAN={tol}: the grid range, N and dt are chosen by the planner.\n")
+        xmin, xmax = -20.0, 20.0  # only bounds x0 below
+    else:
+        # Prompt user for parameters
+        xmin = float(input("Enter xmin (e.g., -20.0 to -5.0): "))
+        while xmin > -5.0 or xmin < -20.0:
+            xmin = float(input("Invalid input! Enter xmin in the range -20.0 to -5.0: "))
+
+        xmax = float(input("Enter xmax (e.g., 5.0 to 20.0): "))
+        while xmax < 5.0 or xmax > 20.0:
+            xmax = float(input("Invalid input! Enter xmax in the range 5.0 to 20.0: "))
+
+        N = int(input("Enter grid size N (e.g., 32 to 128, must be a power of 2): "))
+        while not (32 <= N <= 128 and (N & (N - 1)) == 0):  # Check if N is a power of 2
+            N = int(input("Invalid input! Enter N in the range 32 to 128 (must be a power of 2): "))
 
     x0 = float(input("Enter initial wave packet x0 (e.g., xmin < x0 < xmax): "))
     while not (xmin < x0 < xmax):
@@ -46,27 +57,36 @@ def main():
     while total_time < 0.5 or total_time > 10.0:
         total_time = float(input("Invalid input! Enter total_time in the range 0.5 to 10.0: "))
 
-    dt = float(input("Enter time step dt (e.g., 0.001 to 0.05): "))
-    while dt < 0.001 or dt > 0.05:
-        dt = float(input("Invalid input! Enter dt in the range 0.001 to 0.05: "))
+    if not tol:
+        dt = float(input("Enter time step dt (e.g., 0.001 to 0.05): "))
+        while dt < 0.001 or dt > 0.05:
+            dt = float(input("Invalid input! Enter dt in the range 0.001 to 0.05: "))
+    else:
+        plan = plan_grid((x0, y0, z0), sigma, (0.0, 0.0, 0.0),
+                         {'potential_type': 'harmonic', 'omega': omega},
+                         total_time=total_time, tol=float(tol))
+        print(plan)
+        xmin, xmax, N = plan.cube()
+        dt = plan.dt
 
     # Initialize system (3D)
     (X, Y, Z, dx, psi, KX, KY, KZ, dk) = initialize_system(
-        xmin, xmax, N, x0, y0, z0, sigma, 0.0, 0.0, 0.0, hbar=1.0, m=1.0
+        xmin, xmax, N, x0, y0, z0, sigma, 0.0, 0.0, 0.0, hbar=1.0, m=1.0, sparse=True
     )
 
     # Define harmonic potential
     V = potential_function(X, Y, Z, potential_type='harmonic', m=1.0, omega=omega)
 
     # Time evolution
-    num_steps = int(total_time / dt)
-    for step in range(num_steps):
-        psi = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar=1.0, m=1.0)
+    num_steps = int(total_time / dt + 1e-9)
+    propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=1.0, m=1.0)
+    psi = propagator.run(num_steps)
 
     # Visualize final result in Jupyter
     visualize_results_3d(X, Y, psi, step=num_steps, potential=V, z_index=N//2, save_fig=False)
     print("3D Harmonic Oscillator Simulation finished!")
 
 if __name__ == "__main__":
-    main()
+    with profile_from_env():
+        main()
 
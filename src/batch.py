@@ -0,0 +1,368 @@
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.absorbing import AbsorbingBoundary, absorbing_strength
+from src.checkpoint import CheckpointWriter, latest_checkpoint, resume
+from src.ensemble import available_memory
+from src.evolve import SplitOperatorPropagator
+from src.fft_backend import get_fft_backend
+from src.grid import Grid, real_dtype
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.potential_library import double_slit
+from src.td_potential import TimeDependentPotential
+from src.utils import compute_norm, compute_total_energy
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:  # YAML run files are optional
+    yaml = None
+
+# Non-interactive runs from a TOML or YAML file, with parameter sweeps run
+# on a process pool and finished jobs cached on disk:
+#
+#   export PYTHONPATH=$(pwd)
+#   python3 -m src.batch examples/barrier_sweep.toml --dry-run
+#   python3 -m src.batch examples/barrier_sweep.toml --workers 4
+#
+# A run file has a [run] table overriding DEFAULTS and an optional [sweep]
+# table of dotted keys -> lists of values, e.g. "potential.V0" = [5, 10].
+# sweep_mode = "product" (default) runs every combination, "zip" runs the
+# lists side by side.
+
+DEFAULTS = {
+    "grid": {"mins": [-10.0, -10.0, -10.0], "maxs": [10.0, 10.0, 10.0], "shape": [64, 64, 64],
+             "fft_friendly": False},
+    "packet": {"r0": [-5.0, 0.0, 0.0], "sigma": 1.0, "k0": [3.0, 0.0, 0.0]},
+    "potential": {"type": "free"},
+    "absorbing": None,
+    "dt": 0.01,
+    "total_time": 1.0,
+    "hbar": 1.0,
+    "m": 1.0,
+    "dtype": "complex128",
+    "fft_backend": None,
+    "checkpoint_every": 0,
+    "save_psi": False,
+}
+
+# Bumped when the results of run_job() change for the same parameters
+CACHE_VERSION = 1
+RESULT = "result.json"
+
+
+# --- Run files and sweeps ---
+
+def load_config(path):
+    with open(path, "rb") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("YAML run files require PyYAML to be installed")
+            return yaml.safe_load(f) or {}
+        if tomllib is None:
+            raise ImportError("TOML run files require Python 3.11+ or tomli to be installed")
+        return tomllib.load(f)
+
+
+def _set(params, dotted, value):
+    keys = dotted.split(".")
+    node = params
+    for key in keys[:-1]:
+        if node.get(key) is None:
+            node[key] = {}
+        node = node[key]
+    node[keys[-1]] = value
+
+
+def _merge(base, overrides):
+    out = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = _merge(out[key], value)
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+
+def _normalise_grid(grid):
+    # {xmin, xmax, N[, ndim]} (a cube, as in initialize_system) or
+    # {mins, maxs, shape}
+    grid = dict(grid)
+    if "N" in grid:
+        ndim = grid.pop("ndim", 3)
+        grid["mins"] = [grid.pop("xmin")] * ndim
+        grid["maxs"] = [grid.pop("xmax")] * ndim
+        grid["shape"] = [grid.pop("N")] * ndim
+    return grid
+
+
+def expand_jobs(config):
+    """
+    The parameter dicts of every job described by a run file: DEFAULTS,
+    then the [run] table, then one combination of the [sweep] values.
+    Returns a list of (overrides, params) with overrides the swept values.
+    """
+    base = _merge(DEFAULTS, config.get("run", {}))
+    sweep = config.get("sweep", {})
+    keys = list(sweep)
+    values = [sweep[k] if isinstance(sweep[k], list) else [sweep[k]] for k in keys]
+    mode = config.get("sweep_mode", "product")
+    if mode == "product":
+        combos = itertools.product(*values)
+    elif mode == "zip":
+        if len({len(v) for v in values}) > 1:
+            raise ValueError("sweep_mode 'zip' needs lists of equal length")
+        combos = zip(*values)
+    else:
+        raise ValueError(f"Unknown sweep_mode: {mode}")
+
+    jobs = []
+    for combo in combos:
+        params = copy.deepcopy(base)
+        overrides = dict(zip(keys, combo))
+        for key, value in overrides.items():
+            _set(params, key, value)
+        params["grid"] = _merge(DEFAULTS["grid"], _normalise_grid(params["grid"]))
+        jobs.append((overrides, params))
+    return jobs
+
+
+def job_hash(params):
+    # Content hash of everything that determines a job's result
+    key = json.dumps({"version": CACHE_VERSION, "params": params}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def job_memory(params):
+    # Estimated peak bytes of one job: psi, the FFT buffer, V and its phase,
+    # both kinetic phases, the initial packet and the energy's psi_k (7
+    # complex arrays) plus about three real ones
+    n_points = int(np.prod(params["grid"]["shape"]))
+    itemsize = np.dtype(params["dtype"]).itemsize
+    return n_points * (7 * itemsize + 24)
+
+
+def choose_workers(jobs, workers=None, memory_budget=None):
+    # As many processes as CPUs (or `workers`), limited so the largest jobs
+    # running side by side fit in memory_budget (default: half the
+    # available memory)
+    if not jobs:
+        return 1
+    if memory_budget is None:
+        available = available_memory()
+        memory_budget = available // 2 if available else 2 * 1024**3
+    largest = max(job_memory(params) for _, params in jobs)
+    limit = max(1, int(memory_budget // largest))
+    return max(1, min(workers or os.cpu_count() or 1, limit, len(jobs)))
+
+
+# --- One job ---
+
+def build_potential(grid, spec):
+    # 'double_slit' or any potential_function type, with its parameters
+    spec = dict(spec)
+    kind = spec.pop("type", "free")
+    if kind == "double_slit":
+        return double_slit(**spec).evaluate(grid)
+    return potential_function(grid, potential_type=kind, **spec)
+
+
+def run_job(params, directory, fft_workers=None):
+    """
+    Run one job and write its result.json (and psi.npy with save_psi) to
+    directory. With checkpoint_every > 0 psi is checkpointed there, and a
+    job interrupted part way continues from its last checkpoint; the
+    absorbed probabilities then only cover the steps since the restart.
+    """
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    g = params["grid"]
+    grid = Grid.uniform(g["mins"], g["maxs"], g["shape"], fft_friendly=g["fft_friendly"],
+                        dtype=real_dtype(params["dtype"]))
+    p = params["packet"]
+    ndim = grid.ndim
+    psi = gaussian_wavepacket(grid, p["r0"][:ndim], p["sigma"], p["k0"][:ndim])
+    psi = np.broadcast_to(psi, grid.shape).astype(params["dtype"])
+    V = build_potential(grid, params["potential"])
+    hbar, m, dt = params["hbar"], params["m"], params["dt"]
+    fft = get_fft_backend(params["fft_backend"], workers=fft_workers)
+
+    checkpoints = os.path.join(directory, "checkpoints")
+    every = params["checkpoint_every"]
+    if every and latest_checkpoint(checkpoints):
+        propagator = resume(checkpoints, V, grid, fft_backend=fft)
+    else:
+        propagator = SplitOperatorPropagator(psi, V, dt, grid, hbar=hbar, m=m, fft_backend=fft)
+    resumed_from = propagator.step_count
+
+    boundary = None
+    if params["absorbing"]:
+        spec = dict(params["absorbing"])
+        width = spec.pop("width")
+        if "strength" not in spec:
+            speed = max(float(np.max(np.abs(p["k0"]))) * hbar / m, 1.0)
+            spec["strength"] = absorbing_strength(width, speed=speed, hbar=hbar)
+        boundary = AbsorbingBoundary(grid, width=width, **spec)
+        propagator.V = TimeDependentPotential(V, [boundary])
+
+    num_steps = int(round(params["total_time"] / dt))
+    if every:
+        with CheckpointWriter(checkpoints, every=every, grid=grid) as writer:
+            propagator.add_observer(writer)
+            psi = propagator.run(num_steps - propagator.step_count)
+    else:
+        psi = propagator.run(num_steps)
+
+    norm = compute_norm(psi, grid)
+    rho = np.abs(psi)**2
+    result = {
+        "steps": propagator.step_count,
+        "resumed_from_step": resumed_from,
+        "time": propagator.time,
+        "norm": norm,
+        "energy": float(compute_total_energy(psi, V, grid, grid, None, None, hbar, m, fft_backend=fft)),
+        "mean_position": [float(np.sum(rho * c, dtype=np.float64) * grid.dV / norm) if norm > 0 else 0.0
+                          for c in grid.coords],
+        "probability_x_positive": float(np.sum(rho * (grid.coords[0] > 0), dtype=np.float64) * grid.dV),
+        "absorbed": dict(boundary.absorbed) if boundary is not None else {},
+        "seconds": time.perf_counter() - start,
+    }
+    if params["save_psi"]:
+        np.save(os.path.join(directory, "psi.npy"), psi)
+    _write_json(os.path.join(directory, RESULT), result)
+    return result
+
+
+def _write_json(path, data):
+    # Written under a temporary name and renamed, so a result file is
+    # either complete or absent
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _run_job(params, directory, fft_workers):
+    try:
+        return run_job(params, directory, fft_workers), None
+    except Exception as error:  # reported per job, the sweep goes on
+        return None, f"{type(error).__name__}: {error}"
+
+
+# --- Sweeps ---
+
+def run_batch(config, output=None, workers=None, memory_budget=None, force=False, log=print):
+    """
+    Run every job of a run file (as loaded by load_config) on a process
+    pool and return the summary written to <output>/summary.json.
+
+    Each job lives in <output>/jobs/<hash of its parameters>/; jobs whose
+    result.json exists are skipped unless force, so re-running a sweep only
+    runs new or unfinished jobs, and jobs with checkpoint_every continue
+    from their last checkpoint. Failed jobs are reported and retried on
+    the next run.
+    """
+    output = output or config.get("output", "runs")
+    workers = workers or config.get("workers")
+    memory_budget = memory_budget or config.get("memory_budget")
+    jobs = expand_jobs(config)
+    os.makedirs(os.path.join(output, "jobs"), exist_ok=True)
+
+    entries, pending = [], []
+    for overrides, params in jobs:
+        digest = job_hash(params)
+        directory = os.path.join(output, "jobs", digest[:16])
+        entry = {"hash": digest, "directory": directory, "overrides": overrides,
+                 "status": "pending", "result": None}
+        entries.append(entry)
+        result_path = os.path.join(directory, RESULT)
+        if not force and os.path.exists(result_path):
+            with open(result_path) as f:
+                entry["result"] = json.load(f)
+            entry["status"] = "cached"
+            continue
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, "params.json"), params)
+        pending.append((entry, params))
+
+    n_workers = choose_workers([(e["overrides"], p) for e, p in pending], workers, memory_budget)
+    log(f"{len(jobs)} jobs: {len(jobs) - len(pending)} cached, {len(pending)} to run "
+        f"on {n_workers} worker(s)")
+    # Split the CPUs between the jobs' FFTs
+    fft_workers = max(1, (os.cpu_count() or 1) // n_workers)
+
+    def finish(entry, result, error):
+        entry["status"] = "done" if error is None else "failed"
+        entry["result"] = result
+        if error is not None:
+            entry["error"] = error
+            log(f"[failed] {entry['overrides']}: {error}")
+        else:
+            log(f"[done {result['seconds']:.1f}s] {entry['overrides']}")
+
+    # The summary is written however the sweep ends, so jobs run so far are
+    # recorded and failed ones retried next time
+    summary = {"config": config, "jobs": entries}
+    try:
+        if n_workers == 1:
+            for entry, params in pending:
+                finish(entry, *_run_job(params, entry["directory"], fft_workers))
+        elif pending:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = {pool.submit(_run_job, params, entry["directory"], fft_workers): entry
+                           for entry, params in pending}
+                for future in as_completed(futures):
+                    try:
+                        result, error = future.result()
+                    except Exception as failure:  # a worker died, e.g. killed when out of memory
+                        result, error = None, f"{type(failure).__name__}: {failure}"
+                    finish(futures[future], result, error)
+    finally:
+        _write_json(os.path.join(output, "summary.json"), summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.batch",
+                                     description="Run a TOML/YAML run file and its sweep.")
+    parser.add_argument("config", help="run file (.toml, .yaml or .yml)")
+    parser.add_argument("--output", help="result directory (default: the file's 'output')")
+    parser.add_argument("--workers", type=int, help="maximum number of worker processes")
+    parser.add_argument("--memory-budget", type=float, help="bytes the running jobs may use")
+    parser.add_argument("--force", action="store_true", help="re-run cached jobs")
+    parser.add_argument("--dry-run", action="store_true", help="list the jobs and exit")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.dry_run:
+        output = args.output or config.get("output", "runs")
+        for overrides, params in expand_jobs(config):
+            digest = job_hash(params)
+            cached = os.path.exists(os.path.join(output, "jobs", digest[:16], RESULT))
+            print(f"{digest[:16]} {'cached ' if cached else 'pending'} "
+                  f"{job_memory(params) / 2**20:8.1f} MB  {overrides}")
+        return 0
+    summary = run_batch(config, args.output, args.workers, args.memory_budget, args.force)
+    failed = [job for job in summary["jobs"] if job["status"] == "failed"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
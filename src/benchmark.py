@@ -0,0 +1,153 @@
+import datetime
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# --- Memory ---
+
+def reset_peak_rss():
+    # Reset the kernel's peak-RSS counter so the next peak_rss() covers only
+    # what runs after this call. Linux only; returns False where the peak
+    # can't be reset (peak_rss() is then the process-wide high-water mark).
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    # Peak resident set size in bytes
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# --- Timing ---
+
+def measure(func, repeat=3, warmup=1):
+    """
+    Time func() `repeat` times after `warmup` untimed calls, tracking the
+    peak RSS over the timed calls. Returns a dict with the best and median
+    wall time in seconds and peak_rss in bytes (None if unavailable).
+    """
+    for _ in range(warmup):
+        func()
+    exact = reset_peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "repeat": repeat,
+        "peak_rss": peak_rss(),
+        "peak_rss_exact": exact,
+    }
+
+
+# --- Results files ---
+
+def machine_info():
+    # Enough to tell whether two result files are comparable
+    info = {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+    try:
+        import scipy
+        info["scipy"] = scipy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def machine_tag(info=None):
+    # Short file-name-safe id, e.g. 'build01-x86_64-16cpu'
+    info = info or machine_info()
+    tag = f"{info['hostname']}-{info['machine']}-{info['cpu_count']}cpu"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", tag)
+
+
+def save_results(results, directory, label=None):
+    # Write results (list of dicts with a unique 'name') as
+    # <directory>/<machine tag>[-label]-<timestamp>.json; returns the path
+    info = machine_info()
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    tag = machine_tag(info)
+    name = "-".join(part for part in (tag, label, stamp) if part) + ".json"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        json.dump({"machine": info, "tag": tag, "label": label, "timestamp": stamp,
+                   "results": results}, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(old, new, threshold=0.1, memory_threshold=0.2):
+    """
+    Compare two result files (as loaded by load_results) entry by entry.
+    A case regresses when its best time grows by more than `threshold`
+    (relative) or its peak RSS by more than `memory_threshold`. Returns a
+    list of rows (name, old_s, new_s, time_ratio, rss_ratio, flags) for the
+    cases present in both, and whether the machines differ.
+    """
+    old_cases = {r["name"]: r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        o = old_cases.get(r["name"])
+        if o is None:
+            continue
+        time_ratio = r["seconds"] / o["seconds"] if o["seconds"] > 0 else float("inf")
+        rss_ratio = None
+        if r.get("peak_rss") and o.get("peak_rss"):
+            rss_ratio = r["peak_rss"] / o["peak_rss"]
+        flags = []
+        if time_ratio > 1.0 + threshold:
+            flags.append("SLOWER")
+        elif time_ratio < 1.0 / (1.0 + threshold):
+            flags.append("faster")
+        if rss_ratio is not None and rss_ratio > 1.0 + memory_threshold:
+            flags.append("MORE MEMORY")
+        rows.append((r["name"], o["seconds"], r["seconds"], time_ratio, rss_ratio, flags))
+    return rows, old.get("tag") != new.get("tag")
+
+
+def regressions(rows):
+    # Rows flagged as slower or using more memory
+    return [row for row in rows if any(flag.isupper() for flag in row[5])]
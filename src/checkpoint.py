@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from src.evolve import SplitOperatorPropagator
+from src.fft_backend import get_fft_backend
+from src.grid import Grid
+
+try:
+    import h5py
+except ImportError:  # HDF5 output is optional
+    h5py = None
+
+LATEST = "latest.json"
+
+
+def potential_hash(V):
+    # Content hash used to check that a resumed run uses the same potential
+    V = np.ascontiguousarray(V)
+    digest = hashlib.sha256()
+    digest.update(str((V.shape, V.dtype.str)).encode())
+    digest.update(V.data)
+    return digest.hexdigest()
+
+
+class CheckpointWriter:
+    """
+    Periodic checkpoints written from a background thread.
+
+    Attach with propagator.add_observer(writer). Every `every` steps the
+    exact momentum-space state handed over by the propagator is copied into
+    one of two preallocated buffers and queued; a worker thread writes it
+    with its metadata (grid, dt, hbar, m, step, time, potential hash), so
+    the time loop only waits if the disk falls two snapshots behind.
+
+    Files are written under a temporary name and renamed, and latest.json
+    is updated last, so it always points at a complete checkpoint.
+    fmt is 'npy' (memory-mappable on resume) or 'hdf5' (chunked, needs h5py).
+    Passing the run's Grid stores it too, so resume() can rebuild it.
+    """
+
+    def __init__(self, directory, every=100, fmt="npy", keep=2, grid=None):
+        if fmt not in ("npy", "hdf5"):
+            raise ValueError(f"Unknown checkpoint format: {fmt}")
+        if fmt == "hdf5" and h5py is None:
+            raise ImportError("HDF5 checkpoints require h5py to be installed")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.every = every
+        self.fmt = fmt
+        self.keep = keep
+        self.grid = grid
+
+        self._buffers = None
+        self._free = queue.Queue()
+        self._jobs = queue.Queue()
+        self._error = None
+        self._written = []
+        self._V_id = None
+        self._V_hash = None
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Observer interface ---
+    def due(self, step):
+        return step > 0 and step % self.every == 0
+
+    def sample_position(self, propagator, psi):
+        pass
+
+    def sample_momentum(self, propagator, psi_k):
+        self._raise_pending()
+        if self._buffers is None:
+            # Double buffering: one snapshot on disk, one being filled
+            self._buffers = [np.empty_like(psi_k), np.empty_like(psi_k)]
+            self._free.put(0)
+            self._free.put(1)
+        index = self._free.get()  # only blocks if the writer is two behind
+        np.copyto(self._buffers[index], psi_k)
+        self._jobs.put((index, self._metadata(propagator)))
+
+    # --- Lifecycle ---
+    def flush(self):
+        self._jobs.join()
+        self._raise_pending()
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
+        self._raise_pending()
+
+    # --- Internals ---
+    def _metadata(self, propagator):
+        V = propagator._static_potential()
+        if V is not self._V_id:
+            self._V_id = V
+            self._V_hash = potential_hash(V)
+        meta = {
+            "step": int(propagator.step_count),
+            "time": float(propagator.time),
+            "dt": float(propagator.dt),
+            "hbar": float(propagator.hbar),
+            "m": float(propagator.m),
+            "space": "momentum",
+            "shape": list(self._buffers[0].shape),
+            "dtype": self._buffers[0].dtype.str,
+            "potential_hash": self._V_hash,
+        }
+        if self.grid is not None:
+            meta["grid"] = {
+                "mins": [float(ax[0]) for ax in self.grid.axes],
+                "maxs": [float(ax[0]) + n * d for ax, n, d
+                         in zip(self.grid.axes, self.grid.shape, self.grid.spacing)],
+                "shape": list(self.grid.shape),
+                "dtype": self.grid.dtype.str,
+            }
+        return meta
+
+    def _raise_pending(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Checkpoint writer failed") from error
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            index, meta = job
+            try:
+                self._write(self._buffers[index], meta)
+            except Exception as error:  # reported on the caller's thread
+                self._error = error
+            finally:
+                self._free.put(index)
+                self._jobs.task_done()
+
+    def _write(self, psi_k, meta):
+        name = f"ckpt_{meta['step']:08d}"
+        if self.fmt == "npy":
+            data_file = name + ".npy"
+            tmp = os.path.join(self.directory, data_file + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, psi_k)
+        else:
+            data_file = name + ".h5"
+            tmp = os.path.join(self.directory, data_file + ".tmp")
+            with h5py.File(tmp, "w") as f:
+                # One chunk per leading-axis slab
+                chunks = (1,) + psi_k.shape[1:] if psi_k.ndim > 1 else None
+                f.create_dataset("psi", data=psi_k, chunks=chunks)
+                f.attrs["metadata"] = json.dumps(meta)
+        os.replace(tmp, os.path.join(self.directory, data_file))
+
+        meta = dict(meta, file=data_file, format=self.fmt)
+        _write_json(os.path.join(self.directory, name + ".json"), meta)
+        _write_json(os.path.join(self.directory, LATEST), meta)
+
+        self._written.append(name)
+        while len(self._written) > self.keep:
+            old = self._written.pop(0)
+            for ext in (".npy", ".h5", ".json"):
+                path = os.path.join(self.directory, old + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def latest_checkpoint(directory):
+    # Metadata of the last complete checkpoint, or None
+    path = os.path.join(directory, LATEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_checkpoint(directory, meta=None, fft_backend=None):
+    # (psi in position space, metadata) of the last complete checkpoint
+    meta = meta or latest_checkpoint(directory)
+    if meta is None:
+        raise FileNotFoundError(f"No checkpoint found in {directory}")
+    path = os.path.join(directory, meta["file"])
+    if meta["format"] == "npy":
+        psi_k = np.load(path, mmap_mode="r")
+    else:
+        if h5py is None:
+            raise ImportError("Reading HDF5 checkpoints requires h5py to be installed")
+        with h5py.File(path, "r") as f:
+            psi_k = f["psi"][...]
+    psi = get_fft_backend(fft_backend).ifftn(np.array(psi_k))
+    return psi, meta
+
+
+def resume(directory, V, KX=None, KY=None, KZ=None, fft_backend=None, check_potential=True):
+    # A SplitOperatorPropagator positioned at the last complete checkpoint,
+    # with dt, hbar, m, step and time restored from its metadata. Without
+    # KX the grid stored by the writer is rebuilt.
+    psi, meta = load_checkpoint(directory, fft_backend=fft_backend)
+    if check_potential and potential_hash(V) != meta["potential_hash"]:
+        raise ValueError("Potential does not match the one used for the checkpoint")
+    if KX is None:
+        if "grid" not in meta:
+            raise ValueError("Checkpoint has no grid; pass KX, KY, KZ or a Grid")
+        g = meta["grid"]
+        KX = Grid.uniform(g["mins"], g["maxs"], g["shape"], dtype=g["dtype"])
+
+    propagator = SplitOperatorPropagator(psi, V, meta["dt"], KX, KY, KZ,
+                                         hbar=meta["hbar"], m=meta["m"],
+                                         fft_backend=fft_backend)
+    propagator.step_count = meta["step"]
+    propagator.time = meta["time"]
+    return propagator
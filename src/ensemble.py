@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+
+from src.evolve import SplitOperatorPropagator
+from src.grid import complex_dtype
+from src.td_potential import TimeDependentPotential
+
+
+class EnsemblePropagator(SplitOperatorPropagator):
+    """
+    B independent runs stacked along a leading batch axis.
+
+    psis is a (B, N, N, N) array or a list of B wavefunctions. Vs is either
+    one potential shared by every member (static or a
+    TimeDependentPotential) or B static potentials, and dt may be a scalar
+    or one value per member. One vectorised run() advances the
+    whole batch. A TimeDependentPotential needs a scalar dt: with per-member
+    dt the members' clocks differ, which its terms do not support.
+    """
+
+    def __init__(self, psis, Vs, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0, fft_backend=None):
+        psis = np.asarray(psis)
+        if not isinstance(Vs, TimeDependentPotential):
+            Vs = np.asarray(Vs)
+        super().__init__(psis, Vs, dt, KX, KY, KZ, hbar=hbar, m=m, fft_backend=fft_backend)
+        if self.psi.ndim != self._k2.ndim + 1:
+            raise ValueError("psis must have exactly one leading batch axis")
+        if np.ndim(dt) not in (0, 1) or np.size(dt) not in (1, self.batch_size):
+            raise ValueError("dt must be a scalar or hold one value per member")
+        if isinstance(Vs, TimeDependentPotential) and np.ndim(dt) > 0:
+            raise ValueError("A TimeDependentPotential needs the same (scalar) dt for every member")
+
+    @property
+    def batch_size(self):
+        return self.psi.shape[0]
+
+    def norms(self, dV):
+        # Per-member integral of |psi|^2
+        return np.sum(np.abs(self.psi)**2, axis=self._axes) * dV
+
+    def energies(self, dV):
+        # Per-member <T> + <V>, same normalisation as compute_total_energy
+        prob_density = np.abs(self.psi)**2
+        E_potential = np.sum(prob_density * self.potential_at(self.time), axis=self._axes) * dV
+
+        psi_k = self.fft.fftn(self.psi, axes=self._axes)
+        T_of_k = (self._hbar**2 / (2.0 * self._m)) * self._k2
+        n_points = self._k2.size
+        E_kinetic = np.sum(np.abs(psi_k)**2 * T_of_k, axis=self._axes) * dV / n_points
+        return E_kinetic + E_potential
+
+
+def available_memory():
+    # Bytes the OS reports as available (Linux), or None if unknown
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def choose_batch_size(grid_shape, n_members, memory_budget=None,
+                      per_member_potential=True, per_member_dt=False, dtype=np.complex128):
+    # Largest batch that fits the budget (default: half the available memory).
+    # With c and r the complex and real item sizes of dtype (16 and 8 B for
+    # complex128), per member: psi plus an FFT temporary (2c per point), and
+    # when each member has its own V: V (r) and its potential phase (c);
+    # with its own dt the two kinetic phases (2c) and the potential phase,
+    # which then differs per member even for a shared V.
+    # Shared: |k|^2 (r), shared kinetic phases and shared V + phase.
+    n_points = int(np.prod(grid_shape))
+    if memory_budget is None:
+        available = available_memory()
+        memory_budget = available // 2 if available else 2 * 1024**3
+    c = np.dtype(complex_dtype(dtype)).itemsize
+    r = c // 2
+
+    per_member = 2 * c
+    shared = r
+    if per_member_potential:
+        per_member += r + c
+    else:
+        shared += r
+        if per_member_dt:
+            per_member += c
+        else:
+            shared += c
+    if per_member_dt:
+        per_member += 2 * c
+    else:
+        shared += 2 * c
+
+    free = memory_budget - shared * n_points
+    batch = free // (per_member * n_points)
+    return int(max(1, min(n_members, batch)))
+
+
+def run_sweep(build, params, n_steps, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0,
+              dV=None, batch_size=None, memory_budget=None, fft_backend=None):
+    # Run build(p) -> (psi, V) for every p in params, batch_size members at a
+    # time. dt is a scalar or one value per parameter. Yields
+    # (param, psi_final, norm, energy); norm/energy are None without dV.
+    params = list(params)
+    dts = np.broadcast_to(np.asarray(dt, dtype=float), (len(params),))
+    per_member_dt = np.ndim(dt) > 0
+
+    i = 0
+    while i < len(params):
+        first_psi, first_V = build(params[i])
+        if batch_size is None:
+            batch_size = choose_batch_size(np.shape(first_psi), len(params), memory_budget,
+                                           per_member_dt=per_member_dt,
+                                           dtype=np.asarray(first_psi).dtype)
+        chunk = params[i:i + batch_size]
+        members = [(first_psi, first_V)] + [build(p) for p in chunk[1:]]
+        chunk_dt = dts[i:i + len(chunk)] if per_member_dt else dts[0]
+
+        ensemble = EnsemblePropagator([psi for psi, _ in members], [V for _, V in members],
+                                      chunk_dt, KX, KY, KZ, hbar=hbar, m=m,
+                                      fft_backend=fft_backend)
+        ensemble.run(n_steps)
+
+        norms = ensemble.norms(dV) if dV is not None else [None] * len(chunk)
+        energies = ensemble.energies(dV) if dV is not None else [None] * len(chunk)
+        for j, p in enumerate(chunk):
+            yield p, ensemble.psi[j].copy(), norms[j], energies[j]
+        i += len(chunk)
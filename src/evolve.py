@@ -1,28 +1,296 @@
 import numpy as np
 
-def evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar, m):
+from src import instrument
+from src.fft_backend import get_fft_backend
+from src.grid import complex_dtype, k_squared
+from src.kernels import get_kernels
+from src.td_potential import TimeDependentPotential
+
+@instrument.timed("evolve_wavefunction")
+def evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar, m, fft_backend=None, kernels=None):
+
+    fft = instrument.instrumented(get_fft_backend(fft_backend))
+    kernels = get_kernels(kernels)
 
     # Kinetic operator: T = (hbar^2 / 2m) * (KX^2 + KY^2 + KZ^2)
     # Full operator: exp(-i T dt / hbar)
     # But we do half-step (split-operator)
     T_factor = 0.5 * dt * (hbar**2 / (2.0 * m * hbar))  # factoring out some constants
-    kinetic_phase_half = np.exp(
-        -1j * T_factor * (KX**2 + KY**2 + KZ**2)
-    )
+    # Phases in psi's precision, so complex64 runs stay single precision
+    dtype = complex_dtype(np.result_type(psi))
+    kinetic_phase_half = kernels.exp_phase(k_squared(KX, KY, KZ), T_factor, dtype)
 
     # 1) Half-step kinetic in momentum space
-    psi_k = np.fft.fftn(psi)
-    psi_k *= kinetic_phase_half
-    psi_mid = np.fft.ifftn(psi_k)
+    psi_k = fft.fftn(psi)
+    kernels.multiply(psi_k, kinetic_phase_half)
+    psi_mid = fft.ifftn(psi_k, out=psi_k)
 
     # 2) Full-step potential in real space
-    potential_phase = np.exp(-1j * V * dt / hbar)
-    psi_mid *= potential_phase
+    potential_phase = kernels.exp_phase(V, dt / hbar, dtype)
+    kernels.multiply(psi_mid, potential_phase)
 
     # 3) Another half-step kinetic
-    psi_k = np.fft.fftn(psi_mid)
-    psi_k *= kinetic_phase_half
-    psi_new = np.fft.ifftn(psi_k)
+    psi_k = fft.fftn(psi_mid, out=psi_mid)
+    kernels.multiply(psi_k, kinetic_phase_half)
+    psi_new = fft.ifftn(psi_k, out=psi_k)
 
     return psi_new
 
+
+class SplitOperatorPropagator:
+    """
+    Stateful version of evolve_wavefunction.
+
+    The kinetic and potential phase arrays are built once and only rebuilt
+    when dt, V, hbar or m change. The wavefunction lives in an owned buffer
+    (self.psi) that is transformed in place, so a step allocates nothing.
+    fft_backend is a name or object understood by get_fft_backend(), and
+    kernels one understood by get_kernels() (the elementwise phase
+    multiplies; see src/kernels.py).
+    KX, KY, KZ may be dense, sparse (broadcastable), or a Grid passed as KX.
+
+    Any leading axes of psi beyond the grid's are treated as batch axes:
+    the FFTs run over the last grid.ndim axes and the phases broadcast,
+    so V and dt may also carry the batch axes (see src/ensemble.py).
+
+    A complex64 psi keeps the whole propagation (phases, FFTs) in single
+    precision; anything else runs in complex128.
+
+    V may be a TimeDependentPotential: its static part is cached like any
+    potential and its terms update the phase at the midpoint of each step.
+    """
+
+    def __init__(self, psi, V, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0, fft_backend=None,
+                 kernels=None):
+        self.fft = get_fft_backend(fft_backend)
+        self.kernels = get_kernels(kernels)
+        # Owned work buffer, aligned for the backend's in-place transforms
+        self.psi = self.fft.empty(np.shape(psi), complex_dtype(np.asarray(psi).dtype))
+        self.psi[...] = psi
+        self._k2 = k_squared(KX, KY, KZ)
+        self._axes = tuple(range(-self._k2.ndim, 0))  # spatial (FFT) axes
+        self._V = V
+        self._dt = dt
+        self._hbar = hbar
+        self._m = m
+
+        # Phase caches, filled lazily by _build_phases()
+        self._kinetic_half = None
+        self._kinetic_full = None
+        self._potential_phase = None
+        self._kinetic_energy = None
+
+        self.step_count = 0
+        self.time = 0.0
+        self.fft_count = 0
+        self._observers = []
+        self._stop = False
+        self.sums = None
+
+    # --- Parameters: changing any of them invalidates the matching phases ---
+    @property
+    def dt(self):
+        return self._dt
+
+    @dt.setter
+    def dt(self, value):
+        self._dt = value
+        self._invalidate_kinetic()
+        self._potential_phase = None
+
+    @property
+    def V(self):
+        return self._V
+
+    @V.setter
+    def V(self, value):
+        self._V = value
+        self._potential_phase = None
+
+    @property
+    def hbar(self):
+        return self._hbar
+
+    @hbar.setter
+    def hbar(self, value):
+        self._hbar = value
+        self._invalidate_kinetic()
+        self._potential_phase = None
+
+    @property
+    def m(self):
+        return self._m
+
+    @m.setter
+    def m(self, value):
+        self._m = value
+        self._invalidate_kinetic()
+
+    def potential_at(self, t):
+        # The potential as an array at time t
+        if isinstance(self._V, TimeDependentPotential):
+            return self._V.evaluate(t)
+        return self._V
+
+    def _static_potential(self):
+        if isinstance(self._V, TimeDependentPotential):
+            return self._V.static
+        return self._V
+
+    def _apply_time_dependent(self, psi, t, tau):
+        if isinstance(self._V, TimeDependentPotential):
+            self._V.apply_phase(psi, t, tau, self._hbar)
+
+    def _invalidate_kinetic(self):
+        self._kinetic_half = None
+        self._kinetic_full = None
+        self._kinetic_energy = None
+
+    @property
+    def fuses_sums(self):
+        # Whether run() fills self.sums for fused_sums observers (not for
+        # batched ensembles)
+        return self.psi.ndim == self._k2.ndim
+
+    def _wants_sums(self, observers):
+        return self.fuses_sums and any(getattr(obs, "fused_sums", False) for obs in observers)
+
+    def _kinetic_weight(self):
+        if self._kinetic_energy is None:
+            self._kinetic_energy = (self._hbar**2 / (2.0 * self._m)) * self._k2
+        return self._kinetic_energy
+
+    def _batched(self, value):
+        # Per-member scalars (e.g. dt of shape (B,)) broadcast over the grid
+        value = np.asarray(value)
+        return value.reshape(value.shape + (1,) * self._k2.ndim)
+
+    def _build_phases(self, fused=False):
+        dt = self._batched(self._dt)
+        if self._kinetic_half is None:
+            # Same constants as evolve_wavefunction: exp(-i T dt / (2 hbar))
+            T_factor = 0.5 * dt * (self._hbar / (2.0 * self._m))
+            self._kinetic_half = np.exp(-1j * T_factor * self._k2).astype(self.psi.dtype, copy=False)
+        if fused and self._kinetic_full is None:
+            # Two back-to-back half-steps of consecutive Strang steps
+            self._kinetic_full = self._kinetic_half * self._kinetic_half
+        if self._potential_phase is None:
+            V = self._static_potential()
+            self._potential_phase = np.exp(-1j * V * dt / self._hbar).astype(self.psi.dtype, copy=False)
+
+    def add_observer(self, observer):
+        # Observers (e.g. observables.ObservableRecorder) are sampled from
+        # the arrays each step already produces; see run().
+        self._observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer):
+        self._observers.remove(observer)
+
+    def request_stop(self):
+        # For observers: called from sample_momentum(), run() returns at the
+        # end of that step (psi exact there) instead of doing the rest
+        self._stop = True
+
+    def step(self):
+        # One Strang step, identical to evolve_wavefunction (4 FFTs)
+        return self.run(1)
+
+    def run(self, n_steps):
+        # n Strang steps with the inner kinetic half-steps merged:
+        # T/2 V T/2 T/2 V T/2 ... = T/2 V T V T ... V T/2, i.e. 2n+2 FFTs.
+        #
+        # Observers due at a step get sample_position() with the real-space
+        # midpoint array and sample_momentum() with the exact momentum-space
+        # state at the end of the step; step 0 is sampled exactly from the
+        # first transform. Neither costs an extra FFT. An observer may end
+        # the run early with request_stop().
+        #
+        # Observers with fused_sums = True also find self.sums filled when
+        # sample_momentum() is called: the norm and <T> of the exact state
+        # and <V> of the midpoint array (divided by dV), reduced by the
+        # kernels inside the phase multiplies that already pass over psi.
+        if n_steps <= 0:
+            return self.psi
+        self._stop = False
+        prof = instrument.active()
+        timed = prof.phase if prof is not None else instrument.null_phase
+        with timed("build_phases"):
+            self._build_phases(fused=n_steps > 1)
+        self.sums = None
+        psi = self.psi
+        fft = instrument.instrumented(self.fft)
+        kernels = self.kernels
+        axes = self._axes
+        observers = self._observers
+        n_points = self._k2.size
+
+        initial = [obs for obs in observers if self.step_count == 0 and obs.due(0)]
+        sums = self._wants_sums(initial)
+        with timed("observers"):
+            for obs in initial:
+                obs.sample_position(self, psi)
+            if sums:
+                _, E_V = kernels.sums(psi, self.potential_at(self.time))
+        fft.fftn(psi, axes=axes, out=psi)
+        with timed("observers"):
+            if sums:
+                norm, E_T = kernels.sums(psi, self._kinetic_weight())
+                self.sums = {"norm": norm / n_points, "T": E_T / n_points, "V": E_V}
+            for obs in initial:
+                obs.sample_momentum(self, psi)
+        with timed("kinetic"):
+            kernels.multiply(psi, self._kinetic_half)
+
+        for i in range(n_steps):
+            last = i == n_steps - 1
+            stop = False
+            due = [obs for obs in observers if obs.due(self.step_count + 1)] if observers else ()
+            sums = due and self._wants_sums(due)
+
+            fft.ifftn(psi, axes=axes, out=psi)
+            if due:
+                with timed("observers"):
+                    for obs in due:
+                        obs.sample_position(self, psi)
+            with timed("potential"):
+                if sums:
+                    # |psi|^2 is unchanged by the phase, so <V> of the midpoint
+                    # array comes out of the same pass
+                    V = self.potential_at(self.time)
+                    _, E_V = kernels.multiply_sums(psi, self._potential_phase, V)
+                else:
+                    kernels.multiply(psi, self._potential_phase)
+                self._apply_time_dependent(psi, self.time + 0.5 * self._dt, self._dt)
+            fft.fftn(psi, axes=axes, out=psi)
+            self.step_count += 1
+            self.time += self._dt
+
+            if due:
+                # Close the step exactly, sample, then open the next one
+                with timed("kinetic"):
+                    if sums:
+                        norm, E_T = kernels.multiply_sums(psi, self._kinetic_half, self._kinetic_weight())
+                        self.sums = {"norm": norm / n_points, "T": E_T / n_points, "V": E_V}
+                    else:
+                        kernels.multiply(psi, self._kinetic_half)
+                with timed("observers"):
+                    for obs in due:
+                        obs.sample_momentum(self, psi)
+                stop = self._stop
+                if not last and not stop:
+                    with timed("kinetic"):
+                        kernels.multiply(psi, self._kinetic_half)
+            else:
+                with timed("kinetic"):
+                    kernels.multiply(psi, self._kinetic_full if not last else self._kinetic_half)
+            if prof is not None:
+                prof.step(self)
+            if stop:
+                n_steps = i + 1
+                break
+        fft.ifftn(psi, axes=axes, out=psi)
+        self._stop = False
+
+        self.fft_count += 2 * n_steps + 2
+        return psi
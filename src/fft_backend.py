@@ -0,0 +1,217 @@
+import os
+import pickle
+
+import numpy as np
+
+try:
+    import scipy.fft as scipy_fft
+except ImportError:  # scipy is optional
+    scipy_fft = None
+
+try:
+    import pyfftw
+except ImportError:  # pyFFTW is optional
+    pyfftw = None
+
+# Environment variables used when no backend is passed explicitly
+FFT_BACKEND_ENV = "SOFT_FFT_BACKEND"   # 'numpy', 'scipy', 'pyfftw' or 'auto'
+FFT_WORKERS_ENV = "SOFT_FFT_WORKERS"   # thread count for scipy / pyFFTW
+FFTW_WISDOM_ENV = "SOFT_FFTW_WISDOM"   # file used to persist FFTW wisdom
+
+
+def _default_workers():
+    workers = os.environ.get(FFT_WORKERS_ENV)
+    if workers:
+        return int(workers)
+    return os.cpu_count() or 1
+
+
+def _resolve_axes(a, axes):
+    if axes is None:
+        return tuple(range(a.ndim))
+    return tuple(ax % a.ndim for ax in axes)
+
+
+class NumpyFFT:
+    """Single-threaded np.fft; kept as the reference backend."""
+
+    name = "numpy"
+
+    def __init__(self, workers=None):
+        self.workers = 1
+
+    def empty(self, shape, dtype=np.complex128):
+        return np.empty(shape, dtype=dtype)
+
+    def fftn(self, a, axes=None, out=None):
+        return self._call(np.fft.fftn, a, axes, out)
+
+    def ifftn(self, a, axes=None, out=None):
+        return self._call(np.fft.ifftn, a, axes, out)
+
+    @staticmethod
+    def _call(func, a, axes, out):
+        if out is None:
+            return func(a, axes=axes)
+        try:
+            return func(a, axes=axes, out=out)
+        except TypeError:  # NumPy < 2.0 has no out= argument
+            out[...] = func(a, axes=axes)
+            return out
+
+
+class ScipyFFT:
+    """scipy.fft with a thread pool of `workers` threads."""
+
+    name = "scipy"
+
+    def __init__(self, workers=None):
+        if scipy_fft is None:
+            raise ImportError("The 'scipy' FFT backend requires scipy to be installed")
+        self.workers = workers or _default_workers()
+
+    def empty(self, shape, dtype=np.complex128):
+        return np.empty(shape, dtype=dtype)
+
+    def fftn(self, a, axes=None, out=None):
+        return self._call(scipy_fft.fftn, a, axes, out)
+
+    def ifftn(self, a, axes=None, out=None):
+        return self._call(scipy_fft.ifftn, a, axes, out)
+
+    def _call(self, func, a, axes, out):
+        result = func(a, axes=axes, workers=self.workers, overwrite_x=out is a)
+        if out is None or result is out:
+            return result
+        out[...] = result
+        return out
+
+
+class PyFFTW:
+    """
+    pyFFTW with plans cached per (shape, dtype, axes, direction, in-place)
+    and FFTW wisdom persisted between runs.
+
+    Arrays from empty() are SIMD-aligned, so in-place transforms on them
+    run directly on the caller's buffer without any copy.
+    """
+
+    name = "pyfftw"
+
+    def __init__(self, workers=None, planner_effort="FFTW_MEASURE", wisdom_file=None):
+        if pyfftw is None:
+            raise ImportError("The 'pyfftw' FFT backend requires pyFFTW to be installed")
+        self.workers = workers or _default_workers()
+        self.planner_effort = planner_effort
+        self.wisdom_file = wisdom_file or os.environ.get(FFTW_WISDOM_ENV)
+        self._plans = {}
+        if self.wisdom_file and os.path.exists(self.wisdom_file):
+            self.load_wisdom(self.wisdom_file)
+
+    def empty(self, shape, dtype=np.complex128):
+        return pyfftw.empty_aligned(shape, dtype=dtype)
+
+    def fftn(self, a, axes=None, out=None):
+        return self._execute(a, axes, out, "FFTW_FORWARD")
+
+    def ifftn(self, a, axes=None, out=None):
+        return self._execute(a, axes, out, "FFTW_BACKWARD")
+
+    def load_wisdom(self, path):
+        with open(path, "rb") as f:
+            pyfftw.import_wisdom(pickle.load(f))
+
+    def save_wisdom(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(pyfftw.export_wisdom(), f)
+
+    def _get_plan(self, shape, dtype, axes, direction, inplace):
+        key = (shape, np.dtype(dtype).str, axes, direction, inplace)
+        plan = self._plans.get(key)
+        if plan is None:
+            # Plan on scratch arrays: FFTW_MEASURE overwrites its inputs
+            src = pyfftw.empty_aligned(shape, dtype=dtype)
+            dst = src if inplace else pyfftw.empty_aligned(shape, dtype=dtype)
+            plan = pyfftw.FFTW(src, dst, axes=axes, direction=direction,
+                               flags=(self.planner_effort,), threads=self.workers)
+            self._plans[key] = plan
+            if self.wisdom_file:
+                self.save_wisdom(self.wisdom_file)
+        return plan
+
+    def _execute(self, a, axes, out, direction):
+        axes = _resolve_axes(a, axes)
+        if out is None:
+            out = self.empty(a.shape, a.dtype)
+        inplace = out is a
+        plan = self._get_plan(a.shape, a.dtype, axes, direction, inplace)
+
+        if self._usable(a) and self._usable(out):
+            plan(a, out)
+        else:
+            # Misaligned caller arrays: run on the plan's own buffers
+            plan.input_array[...] = a
+            plan()
+            out[...] = plan.output_array
+        return out
+
+    @staticmethod
+    def _usable(arr):
+        return arr.flags.c_contiguous and pyfftw.is_byte_aligned(arr)
+
+
+FFT_BACKENDS = {
+    "numpy": NumpyFFT,
+    "scipy": ScipyFFT,
+    "pyfftw": PyFFTW,
+}
+
+_instances = {}
+
+
+def available_fft_backends():
+    names = ["numpy"]
+    if scipy_fft is not None:
+        names.append("scipy")
+    if pyfftw is not None:
+        names.append("pyfftw")
+    return names
+
+
+def get_fft_backend(backend=None, workers=None):
+    # Backend objects are passed through untouched
+    if backend is not None and not isinstance(backend, str):
+        return backend
+
+    name = backend or os.environ.get(FFT_BACKEND_ENV, "numpy")
+    name = name.lower()
+    if name == "auto":
+        name = available_fft_backends()[-1]
+    if name not in FFT_BACKENDS:
+        raise ValueError(f"Unknown FFT backend: {name}")
+
+    # One instance per (name, workers) so plans are shared between callers
+    key = (name, workers)
+    if key not in _instances:
+        _instances[key] = FFT_BACKENDS[name](workers=workers)
+    return _instances[key]
+
+
+def compare_fft_backends(shape=(16, 16, 16), names=None, seed=0):
+    # Max abs deviation of each backend from NumPy on a random complex array,
+    # for forward and inverse transforms.
+    rng = np.random.default_rng(seed)
+    a = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+    ref_fwd = np.fft.fftn(a)
+    ref_inv = np.fft.ifftn(a)
+
+    errors = {}
+    for name in names or available_fft_backends():
+        backend = get_fft_backend(name)
+        buf = backend.empty(shape, a.dtype)
+        buf[...] = a
+        fwd = backend.fftn(buf).copy()
+        backend.ifftn(buf, out=buf)  # in place
+        errors[name] = max(np.max(np.abs(fwd - ref_fwd)),
+                           np.max(np.abs(buf - ref_inv)))
+    return errors
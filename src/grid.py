@@ -0,0 +1,169 @@
+import numpy as np
+
+
+class Grid:
+    """
+    Uniform periodic grid stored as its 1D axes only.
+
+    Any number of dimensions is supported, each axis with its own size and
+    extent. Coordinates and wave numbers are handed out as broadcastable
+    sparse views, e.g. (Nx,1,1), (1,Ny,1), (1,1,Nz) in 3D, like
+    np.meshgrid(sparse=True), so memory scales with psi rather than with
+    dense meshes. A Grid can be passed wherever X (or KX) is expected,
+    leaving Y, Z (or KY, KZ) as None. dtype (float64 or float32) applies to
+    every array the grid hands out.
+    """
+
+    def __init__(self, axes, dtype=np.float64):
+        axes = [np.asarray(ax, dtype=np.float64) for ax in axes]
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(len(ax) for ax in axes)
+        self.ndim = len(axes)
+        self.spacing = tuple(float(ax[1] - ax[0]) for ax in axes)
+        self.dx = self.spacing[0]
+        self.dV = float(np.prod(self.spacing))
+        self.axes = tuple(ax.astype(self.dtype) for ax in axes)
+
+        # For an N-point grid, d(k) = 2pi / (N * dx)
+        self.k_axes = tuple(
+            (np.fft.fftfreq(n, d=d) * 2.0 * np.pi).astype(self.dtype)
+            for n, d in zip(self.shape, self.spacing)
+        )
+        self.dk = tuple(2.0 * np.pi / (n * d) for n, d in zip(self.shape, self.spacing))
+        self._k2 = None
+
+    @classmethod
+    def cube(cls, xmin, xmax, N, ndim=3, dtype=np.float64):
+        # Same range & step on every axis, as initialize_system uses
+        x = np.linspace(xmin, xmax, N, endpoint=False)
+        return cls([x] * ndim, dtype=dtype)
+
+    @classmethod
+    def uniform(cls, mins, maxs, shape, fft_friendly=False, dtype=np.float64):
+        # Per-axis extents [min, max) and sizes; the number of dimensions is
+        # len(shape). fft_friendly rounds every size up to a 5-smooth number.
+        shape = np.atleast_1d(shape)
+        ndim = len(shape)
+        mins = np.broadcast_to(mins, (ndim,))
+        maxs = np.broadcast_to(maxs, (ndim,))
+        if fft_friendly:
+            shape = [next_fast_size(n) for n in shape]
+        axes = [np.linspace(lo, hi, int(n), endpoint=False)
+                for lo, hi, n in zip(mins, maxs, shape)]
+        return cls(axes, dtype=dtype)
+
+    def _sparse(self, arrays):
+        views = []
+        for axis, arr in enumerate(arrays):
+            shape = [1] * self.ndim
+            shape[axis] = -1
+            views.append(arr.reshape(shape))
+        return tuple(views)
+
+    @property
+    def coords(self):
+        return self._sparse(self.axes)
+
+    @property
+    def k(self):
+        return self._sparse(self.k_axes)
+
+    @property
+    def X(self):
+        return self.coords[0]
+
+    @property
+    def Y(self):
+        return self.coords[1]
+
+    @property
+    def Z(self):
+        return self.coords[2]
+
+    @property
+    def KX(self):
+        return self.k[0]
+
+    @property
+    def KY(self):
+        return self.k[1]
+
+    @property
+    def KZ(self):
+        return self.k[2]
+
+    @property
+    def k2(self):
+        # Dense |k|^2, built on first use only
+        if self._k2 is None:
+            self._k2 = sum(k**2 for k in self.k)
+        return self._k2
+
+    def kinetic_energy(self, hbar, m):
+        # T(k) = (hbar^2 / 2m) |k|^2
+        return (hbar**2 / (2.0 * m)) * self.k2
+
+    def dense(self):
+        # Full meshgrids, for code that still needs them
+        return np.meshgrid(*self.axes, indexing='ij')
+
+
+def next_fast_size(n):
+    # Smallest 5-smooth integer (2^a 3^b 5^c) >= n; every FFT backend is
+    # fast on these sizes.
+    n = max(int(n), 1)
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+
+def volume_element(dx, ndim):
+    # dV from a Grid, a tuple of per-axis spacings, or a scalar spacing
+    if isinstance(dx, Grid):
+        return dx.dV
+    if np.ndim(dx) > 0:
+        return float(np.prod(dx))
+    return dx**ndim
+
+
+def real_dtype(dtype):
+    # float32 for complex64/float32, float64 for complex128/float64
+    return np.finfo(dtype).dtype
+
+
+def complex_dtype(dtype):
+    # complex64 for complex64/float32, complex128 otherwise
+    return np.result_type(dtype, np.complex64)
+
+
+def grid_coords(X, Y=None, Z=None):
+    # Coordinate arrays from a Grid, or the given ones (dense or sparse);
+    # 1D and 2D callers leave Z (and Y) as None.
+    if isinstance(X, Grid):
+        return X.coords
+    return tuple(c for c in (X, Y, Z) if c is not None)
+
+
+def axis_values(c, axis):
+    # 1D values along `axis` of a dense or sparse coordinate (or k) array
+    index = [0] * c.ndim
+    index[axis] = slice(None)
+    return np.asarray(c[tuple(index)], dtype=np.float64)
+
+
+def grid_axes(X, Y=None):
+    # 1D x and y axes from a Grid or from dense/sparse coordinate arrays
+    if isinstance(X, Grid):
+        return X.axes[0], X.axes[1]
+    return X[:, 0, 0], Y[0, :, 0]
+
+
+def k_squared(KX, KY=None, KZ=None):
+    if isinstance(KX, Grid):
+        return KX.k2
+    return sum(k**2 for k in (KX, KY, KZ) if k is not None)
@@ -0,0 +1,184 @@
+import numpy as np
+
+from src.evolve import SplitOperatorPropagator
+from src.grid import Grid, next_fast_size, real_dtype, volume_element
+from src.td_potential import TimeDependentPotential
+from src.utils import compute_total_energy
+
+
+class ImaginaryTimePropagator(SplitOperatorPropagator):
+    """
+    Split-operator propagation in imaginary time, psi -> exp(-H dtau / hbar) psi,
+    which relaxes any start state onto the lowest eigenstate it overlaps.
+
+    The same fused Strang loop as SplitOperatorPropagator runs with real
+    decay factors instead of phases. At the end of every step, on the exact
+    momentum-space state (no extra FFTs), psi is projected out of `states`
+    (previously found eigenstates, Gram-Schmidt) and renormalised. The norm
+    lost in the step gives the energy for free: E = -hbar ln(norm) / (2 dtau),
+    which converges to the eigenvalue of the split propagator, O(dtau^2)
+    from the exact one.
+
+    dx is needed for the normalisation unless KX is a Grid. V must be
+    static.
+    """
+
+    def __init__(self, psi, V, dtau, KX, KY=None, KZ=None, hbar=1.0, m=1.0, dx=None, states=(),
+                 fft_backend=None):
+        if isinstance(V, TimeDependentPotential):
+            raise ValueError("Imaginary-time propagation needs a static potential")
+        super().__init__(psi, V, dtau, KX, KY, KZ, hbar=hbar, m=m, fft_backend=fft_backend)
+        self.dV = volume_element(dx if dx is not None else KX, self.psi.ndim)
+        self.energy = np.inf
+        self.energies = []
+        self.converged = False
+
+        # Momentum-space copies of the states to project out, normalised so
+        # that sum |phi_k|^2 dV / N = 1
+        scale = self.dV / self.psi.size
+        self._states_k = []
+        for phi in states:
+            phi_k = self.fft.fftn(np.array(phi, dtype=self.psi.dtype))
+            phi_k /= np.sqrt(np.sum(np.abs(phi_k)**2, dtype=np.float64) * scale)
+            self._states_k.append(phi_k)
+
+        self._normalise(self.psi, self.dV)
+        self.add_observer(self)
+
+    @staticmethod
+    def _normalise(psi, dV):
+        norm = np.sum(np.abs(psi)**2, dtype=np.float64) * dV
+        psi /= np.sqrt(norm)
+        return norm
+
+    def _build_phases(self, fused=False):
+        # exp(-T dtau / (2 hbar)) and exp(-V dtau / hbar), real
+        dtau = self._batched(self._dt)
+        dtype = real_dtype(self.psi.dtype)
+        if self._kinetic_half is None:
+            T_factor = 0.5 * dtau * (self._hbar / (2.0 * self._m))
+            self._kinetic_half = np.exp(-T_factor * self._k2).astype(dtype, copy=False)
+        if fused and self._kinetic_full is None:
+            self._kinetic_full = self._kinetic_half * self._kinetic_half
+        if self._potential_phase is None:
+            self._potential_phase = np.exp(-self._V * dtau / self._hbar).astype(dtype, copy=False)
+
+    # --- Observer interface (the propagator watches itself) ---
+    def due(self, step):
+        return step > 0
+
+    def sample_position(self, propagator, psi):
+        pass
+
+    def sample_momentum(self, propagator, psi_k):
+        scale = self.dV / psi_k.size
+        for phi_k in self._states_k:
+            overlap = np.vdot(phi_k, psi_k) * scale
+            psi_k -= overlap * phi_k
+        norm = self._normalise(psi_k, scale)
+        # |psi|^2 decays as exp(-2 E dtau / hbar)
+        self.energy = -0.5 * self._hbar * np.log(norm) / self._dt
+        self.energies.append(self.energy)
+
+    def relax(self, tol=1e-8, max_steps=100000, check_every=10):
+        # Propagate until the energy changes by less than tol between checks
+        # (every check_every steps); returns the number of steps taken.
+        self.converged = False
+        steps = 0
+        previous = self.energy
+        while steps < max_steps:
+            n = min(check_every, max_steps - steps)
+            self.run(n)
+            steps += n
+            if abs(self.energy - previous) < tol:
+                self.converged = True
+                break
+            previous = self.energy
+        return steps
+
+
+def fourier_interpolate(psi, shape):
+    # psi resampled onto a grid with the same periodic box and the given
+    # shape by zero-padding (or truncating) its spectrum axis by axis
+    out = np.asarray(psi)
+    for axis, n_new in enumerate(shape):
+        n = out.shape[axis]
+        if n == n_new:
+            continue
+        spectrum = np.fft.fft(out, axis=axis)
+        resized = np.zeros(out.shape[:axis] + (n_new,) + out.shape[axis + 1:], dtype=spectrum.dtype)
+        keep = min(n, n_new)
+        pos, neg = (keep + 1) // 2, keep // 2
+        src = [slice(None)] * out.ndim
+        dst = [slice(None)] * out.ndim
+        src[axis] = dst[axis] = slice(0, pos)
+        resized[tuple(dst)] = spectrum[tuple(src)]
+        if neg:
+            src[axis] = slice(n - neg, n)
+            dst[axis] = slice(n_new - neg, n_new)
+            resized[tuple(dst)] = spectrum[tuple(src)]
+        out = np.fft.ifft(resized, axis=axis) * (n_new / n)
+    return out.astype(np.result_type(psi, np.complex64), copy=False)
+
+
+def coarsen(grid, level):
+    # Grid over the same box with each axis size divided by 2**level
+    # (rounded to a 5-smooth size, at least 8 points)
+    mins = [float(ax[0]) for ax in grid.axes]
+    maxs = [float(ax[0]) + n * d for ax, n, d in zip(grid.axes, grid.shape, grid.spacing)]
+    shape = [next_fast_size(max(n >> level, 8)) if level else n for n in grid.shape]
+    return Grid.uniform(mins, maxs, shape, dtype=grid.dtype)
+
+
+def initial_guess(grid, seed=0, dtype=np.complex128):
+    # Smooth random start state: noise under a broad Gaussian envelope, so
+    # it overlaps every low-lying state
+    rng = np.random.default_rng(seed)
+    envelope = 1.0
+    for x, ax in zip(grid.coords, grid.axes):
+        centre = 0.5 * (ax[0] + ax[-1])
+        width = 0.25 * (ax[-1] - ax[0])
+        envelope = envelope * np.exp(-((x - centre) / width)**2)
+    return (envelope * (1.0 + 0.5 * rng.standard_normal(grid.shape))).astype(dtype)
+
+
+def find_eigenstates(grid, potential, n_states=1, dtau=0.01, tol=1e-8, levels=1, max_steps=100000,
+                     check_every=10, hbar=1.0, m=1.0, psi0=None, fft_backend=None):
+    """
+    Lowest n_states eigenstates of H = T + V on `grid` by imaginary-time
+    propagation with Gram-Schmidt against the states already found.
+
+    potential is an array on `grid` or a callable potential(grid), e.g.
+    lambda g: potential_function(g, potential_type='harmonic'). With a
+    callable and levels > 1 the states are first converged on grids
+    coarsened by 2**(levels-1), ..., 2 with dtau scaled up by the same
+    factor, and each level is Fourier-interpolated onto the next as its
+    start state; the fine grid then only has to remove the residual error.
+
+    Returns (energies, states) with energies as <H> on the final grid.
+    """
+    if levels > 1 and not callable(potential):
+        raise ValueError("Coarse-to-fine refinement needs potential as a callable of the grid")
+    dtype = np.asarray(psi0).dtype if psi0 is not None else np.complex128
+
+    guesses = None
+    for level in reversed(range(levels)):
+        g = coarsen(grid, level)
+        V = potential(g) if callable(potential) else potential
+        if guesses is None:
+            guesses = [fourier_interpolate(psi0, g.shape) if psi0 is not None and i == 0
+                       else initial_guess(g, seed=i, dtype=dtype) for i in range(n_states)]
+        else:
+            guesses = [fourier_interpolate(psi, g.shape) for psi in guesses]
+
+        states = []
+        for guess in guesses:
+            prop = ImaginaryTimePropagator(guess, V, dtau * 2**level, g, hbar=hbar, m=m,
+                                           states=states, fft_backend=fft_backend)
+            prop.relax(tol, max_steps=max_steps, check_every=check_every)
+            states.append(prop.psi.copy())
+        guesses = states
+
+    energies = np.array([compute_total_energy(psi, V, g, g, None, None, hbar, m, fft_backend)
+                         for psi in guesses])
+    return energies, guesses
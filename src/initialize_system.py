@@ -1,37 +1,63 @@
 import numpy as np
 
+from src import instrument
+from src.grid import Grid, real_dtype
+
+@instrument.timed("initialize_system")
 def initialize_system(
         xmin, xmax, N,
         x0, y0, z0,
         sigma,
         kx0, ky0, kz0,
-        hbar, m
+        hbar, m,
+        sparse=False,
+        dtype=np.complex128
     ):
 
-    # 1) Spatial grids along each axis
-    x = np.linspace(xmin, xmax, N, endpoint=False)
-    dx = (xmax - xmin) / N
-    # For simplicity, use the same range & step for y, z
-    y = x.copy()
-    z = x.copy()
-
-    # 2) Create 3D mesh
-    X, Y, Z = np.meshgrid(x, y, z, indexing='ij')  # shape (N, N, N)
-
-    # 3) 3D Gaussian wave packet
-    # psi(r) = A exp[-((x - x0)^2 + (y - y0)^2 + (z - z0)^2) / (2 sigma^2)]
-    #          * exp[i(kx0*x + ky0*y + kz0*z)]
-    # Normalization: (1 / (sqrt(pi)*sigma))^(3/2) in 3D, approximate
-    A = (1.0 / (np.pi**(3/2) * sigma**3))**0.5
-    exp_factor = -((X - x0)**2 + (Y - y0)**2 + (Z - z0)**2) / (2.0 * sigma**2)
-    plane_wave = 1j * (kx0 * X + ky0 * Y + kz0 * Z)
-    psi = A * np.exp(exp_factor) * np.exp(plane_wave)
-
-    # 4) Momentum-space grids
-    # For an N-point grid, d(k) = 2pi / (N * dx), but np.fft.fftfreq is simpler:
-    k1d = np.fft.fftfreq(N, d=dx) * 2.0 * np.pi  # 1D array of k-values in each dimension
-    KX, KY, KZ = np.meshgrid(k1d, k1d, k1d, indexing='ij')  # shape (N, N, N)
-    dkx = k1d[1] - k1d[0]  # spacing in k-space (same for x,y,z)
+    # 1) Spatial grid: same range & step for x, y, z.
+    # dtype=np.complex64 runs the whole pipeline in single precision:
+    # grids come out as float32 and psi as complex64.
+    grid = Grid.cube(xmin, xmax, N, dtype=real_dtype(dtype))
+    dx = grid.dx
+
+    # 2) 3D Gaussian wave packet
+    psi = gaussian_wavepacket(grid, (x0, y0, z0), sigma, (kx0, ky0, kz0))
+
+    # 3) Coordinate and momentum-space grids.
+    # sparse=True returns broadcastable (N,1,1), (1,N,1), (1,1,N) views
+    # instead of six dense (N, N, N) meshes.
+    if sparse:
+        X, Y, Z = grid.coords
+        KX, KY, KZ = grid.k
+    else:
+        X, Y, Z = np.meshgrid(*grid.axes, indexing='ij')  # shape (N, N, N)
+        KX, KY, KZ = np.meshgrid(*grid.k_axes, indexing='ij')  # shape (N, N, N)
+    dkx = grid.dk[0]  # spacing in k-space (same for x,y,z)
 
     return X, Y, Z, dx, psi, KX, KY, KZ, dkx
 
+
+def initialize_grid(mins, maxs, shape, r0, sigma, k0, fft_friendly=True, dtype=np.complex128):
+
+    # Dimension-generic, anisotropic counterpart of initialize_system:
+    # mins/maxs/shape give each axis its own extent and size (1D, 2D or 3D,
+    # Nx != Ny != Nz). fft_friendly rounds every size up to a 5-smooth
+    # number. Returns (grid, psi).
+    grid = Grid.uniform(mins, maxs, shape, fft_friendly=fft_friendly, dtype=real_dtype(dtype))
+    psi = gaussian_wavepacket(grid, r0, sigma, k0)
+    return grid, psi
+
+
+def gaussian_wavepacket(grid, r0, sigma, k0):
+
+    # psi(r) = A exp[-sum_i (r_i - r0_i)^2 / (2 sigma_i^2)] * exp[i k0 . r]
+    # Normalization: prod_i (1 / (sqrt(pi)*sigma_i))^(1/2), approximate.
+    # sigma may be one width or one per axis. The packet is separable, so it
+    # is built as an outer product of 1D factors, in the complex counterpart
+    # of grid.dtype.
+    sigmas = np.broadcast_to(sigma, (grid.ndim,)).tolist()  # Python floats keep grid.dtype
+    psi = 1.0
+    for r, r0_i, s_i, k0_i in zip(grid.coords, r0, sigmas, k0):
+        A = (1.0 / (np.pi**0.5 * s_i))**0.5
+        psi = psi * (A * np.exp(-(r - r0_i)**2 / (2.0 * s_i**2) + 1j * k0_i * r))
+    return psi
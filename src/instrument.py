@@ -0,0 +1,256 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_active = None
+_NULL = contextlib.nullcontext()
+
+
+def active():
+    # The enabled Profiler, or None; hot loops look this up once per call
+    return _active
+
+
+def null_phase(name):
+    return _NULL
+
+
+def phase(name):
+    # Time a block under the active profiler, if any
+    return _active.phase(name) if _active is not None else _NULL
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def instrumented(fft):
+    # The FFT backend, timed and counted if a profiler is active
+    return _active.wrap_fft(fft) if _active is not None else fft
+
+
+def timed(name):
+    # Decorator timing every call of a function as phase `name`
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start", "mem", "peak")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            # The peak is reset per span; the enclosing span keeps the peak
+            # seen so far so that nesting does not hide it
+            stack = self.profiler._spans
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.mem = current
+            self.peak = current
+            stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        allocated = 0
+        if self.profiler.track_memory:
+            stack = self.profiler._spans
+            stack.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak)
+            allocated = peak - self.mem
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+        self.profiler._record(self.name, self.start, end, allocated)
+
+
+class _TimedFFT:
+    # FFT backend proxy: every transform is a phase 'fft' and counted,
+    # with the bytes it transforms
+    def __init__(self, fft, profiler):
+        self._fft = fft
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._fft, name)
+
+    def fftn(self, a, axes=None, out=None):
+        self._profiler.count("fft_calls")
+        self._profiler.count("fft_bytes", a.nbytes)
+        with self._profiler.phase("fft"):
+            return self._fft.fftn(a, axes=axes, out=out)
+
+    def ifftn(self, a, axes=None, out=None):
+        self._profiler.count("fft_calls")
+        self._profiler.count("fft_bytes", a.nbytes)
+        with self._profiler.phase("ifft"):
+            return self._fft.ifftn(a, axes=axes, out=out)
+
+
+class Profiler:
+    """
+    Per-phase timers, counters and step hooks for the time loop.
+
+    Enable with a with block; propagators, FFTs and the @timed pipeline
+    functions (initialize_system, potential_function, evolve_wavefunction,
+    compute_total_energy, visualize_results_3d) then report into it. With
+    no profiler active every hook is a single None check.
+
+        with Profiler() as prof:
+            propagator.run(1000)
+        print(prof.summary())
+        prof.save_chrome_trace("trace.json")  # chrome://tracing, Perfetto
+
+    Phases nest, so times in the summary are inclusive. track_memory uses
+    tracemalloc (which NumPy reports to) to add the peak bytes allocated
+    per call of each phase, above what was allocated when it began, so
+    temporaries freed within the phase count too; it slows everything down
+    noticeably. At most max_events spans are kept
+    for the timeline; totals are always exact.
+    """
+
+    def __init__(self, track_memory=False, max_events=1_000_000):
+        self.track_memory = track_memory
+        self.max_events = max_events
+        self.totals = {}    # name -> [calls, ns, peak bytes allocated]
+        self.counters = {}
+        self.events = []    # (name, start ns, end ns, thread id)
+        self.steps = 0
+        self._hooks = []
+        self._spans = []
+        self._counter_events = []
+        self._previous = None
+        self._started_tracemalloc = False
+        self._t0 = time.perf_counter_ns()
+        self._t_end = None
+
+    # --- Activation ---
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._t0 = time.perf_counter_ns()
+        self._t_end = None
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self._t_end = time.perf_counter_ns()
+        _active = self._previous
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # --- Recording ---
+    def phase(self, name):
+        return _Span(self, name)
+
+    def _record(self, name, start, end, allocated):
+        total = self.totals.get(name)
+        if total is None:
+            total = self.totals[name] = [0, 0, 0]
+        total[0] += 1
+        total[1] += end - start
+        total[2] += allocated
+        if len(self.events) < self.max_events:
+            self.events.append((name, start, end, threading.get_ident()))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def wrap_fft(self, fft):
+        return _TimedFFT(fft, self)
+
+    def add_hook(self, callback):
+        # callback(profiler, propagator) at every step boundary
+        self._hooks.append(callback)
+        return callback
+
+    def step(self, propagator):
+        # Called by propagators at the end of each step
+        self.steps += 1
+        if len(self._counter_events) < self.max_events:
+            self._counter_events.append((time.perf_counter_ns(), dict(self.counters)))
+        for hook in self._hooks:
+            hook(self, propagator)
+
+    # --- Output ---
+    @property
+    def elapsed(self):
+        end = self._t_end if self._t_end is not None else time.perf_counter_ns()
+        return (end - self._t0) * 1e-9
+
+    def summary(self):
+        # Table of phases by total time, then counters and step rate
+        elapsed = max(self.elapsed, 1e-12)
+        lines = [f"{'phase':<24} {'calls':>9} {'total ms':>11} {'mean us':>10} {'% wall':>7}"
+                 + (f" {'alloc MB':>9}" if self.track_memory else "")]
+        for name, (calls, ns, allocated) in sorted(self.totals.items(), key=lambda kv: -kv[1][1]):
+            line = (f"{name:<24} {calls:>9} {ns * 1e-6:>11.2f} {ns * 1e-3 / calls:>10.1f} "
+                    f"{100.0 * ns * 1e-9 / elapsed:>7.1f}")
+            if self.track_memory:
+                line += f" {allocated / 2**20:>9.1f}"
+            lines.append(line)
+        lines.append("")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24} {value:>12}")
+        lines.append(f"{'wall time s':<24} {elapsed:>12.3f}")
+        if self.steps:
+            lines.append(f"{'steps':<24} {self.steps:>12}")
+            lines.append(f"{'steps/s':<24} {self.steps / elapsed:>12.1f}")
+        if self.counters.get("fft_calls"):
+            lines.append(f"{'FFTs/s':<24} {self.counters['fft_calls'] / elapsed:>12.1f}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        # Trace Event Format: complete ('X') events per span, counter ('C')
+        # events at step boundaries; timestamps in microseconds
+        pid = os.getpid()
+        events = [{"name": name, "cat": "soft", "ph": "X", "pid": pid, "tid": tid,
+                   "ts": (start - self._t0) / 1e3, "dur": (end - start) / 1e3}
+                  for name, start, end, tid in self.events]
+        for t, counters in self._counter_events:
+            events.append({"name": "counters", "ph": "C", "pid": pid,
+                           "ts": (t - self._t0) / 1e3, "args": counters})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"steps": self.steps, "counters": self.counters}}
+
+    def save_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+@contextlib.contextmanager
+def profile_from_env(variable="SOFT_PROFILE"):
+    # Profile the block if $SOFT_PROFILE names a trace file: the summary is
+    # printed and the Chrome trace written on exit
+    path = os.environ.get(variable)
+    if not path:
+        yield None
+        return
+    with Profiler() as prof:
+        yield prof
+    print(prof.summary())
+    print(f"Trace written to {prof.save_chrome_trace(path)}")
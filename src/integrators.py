@@ -0,0 +1,327 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from src import instrument
+from src.evolve import SplitOperatorPropagator
+from src.grid import volume_element
+
+# A splitting scheme is a palindromic list of stages (kind, c): kind 'T'
+# applies exp(-i c dt T / hbar) in momentum space and kind 'V' applies
+# exp(-i c dt V / hbar) in position space. All schemes here start and end
+# with a kinetic stage, so consecutive steps merge their boundary stages
+# and a step costs 2 FFTs per potential stage.
+
+
+def _merge(stages):
+    merged = []
+    for kind, c in stages:
+        if merged and merged[-1][0] == kind:
+            merged[-1] = (kind, merged[-1][1] + c)
+        else:
+            merged.append((kind, c))
+    return merged
+
+
+def compose(stages, weights):
+    # Product of the scheme run with substeps w_i * dt
+    return _merge([(kind, w * c) for w in weights for kind, c in stages])
+
+
+def triple_jump(stages, order):
+    # Yoshida: symmetric scheme of even order p -> order p + 2 (3 substeps)
+    w1 = 1.0 / (2.0 - 2.0**(1.0 / (order + 1)))
+    return compose(stages, [w1, 1.0 - 2.0 * w1, w1])
+
+
+def suzuki_fractal(stages, order):
+    # Suzuki: symmetric scheme of even order p -> order p + 2 (5 substeps)
+    p = 1.0 / (4.0 - 4.0**(1.0 / (order + 1)))
+    return compose(stages, [p, p, 1.0 - 4.0 * p, p, p])
+
+
+STRANG = [('T', 0.5), ('V', 1.0), ('T', 0.5)]
+
+
+def _blanes_moan_s6():
+    # Blanes & Moan (2002), optimised 6-stage 4th-order S6 in ABA form with
+    # A = kinetic, B = potential.
+    a1, a2, a3 = 0.0792036964311957, 0.353172906049774, -0.0420650803577195
+    a4 = 1.0 - 2.0 * (a1 + a2 + a3)
+    b1, b2 = 0.209515106613362, -0.143851773179818
+    b3 = 0.5 - (b1 + b2)
+    half = [('T', a1), ('V', b1), ('T', a2), ('V', b2), ('T', a3), ('V', b3)]
+    return half + [('T', a4)] + half[::-1]
+
+
+# name -> (stages, order)
+SCHEMES = {
+    'strang': (STRANG, 2),
+    'yoshida4': (triple_jump(STRANG, 2), 4),
+    'suzuki4': (suzuki_fractal(STRANG, 2), 4),
+    'blanes_moan4': (_blanes_moan_s6(), 4),
+    'yoshida6': (triple_jump(triple_jump(STRANG, 2), 4), 6),
+}
+
+
+class CompositionPropagator(SplitOperatorPropagator):
+    """
+    Split-operator propagator for any kinetic-outer splitting scheme
+    (see SCHEMES), e.g. 4th-order Yoshida/Suzuki or Blanes-Moan.
+
+    Phase arrays are cached per stage coefficient times dt in a small LRU,
+    so switching between a few time steps (as AdaptivePropagator does)
+    does not rebuild them. Observers are sampled as in the base class, with
+    position quantities taken after the last potential stage of the step.
+    """
+
+    # Observers' sums are not fused into the stages here
+    fuses_sums = False
+
+    def __init__(self, psi, V, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0, fft_backend=None,
+                 scheme='yoshida4', max_cached_phases=32, kernels=None):
+        super().__init__(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m, fft_backend=fft_backend,
+                         kernels=kernels)
+        if isinstance(scheme, str):
+            self.stages, self.order = SCHEMES[scheme]
+        else:
+            self.stages, self.order = scheme
+        if self.stages[0][0] != 'T' or self.stages[-1][0] != 'T':
+            raise ValueError("Splitting schemes must start and end with a kinetic stage")
+        self.max_cached_phases = max_cached_phases
+        self._phases = OrderedDict()
+        self._phase_token = None
+
+    @property
+    def potential_stages(self):
+        return sum(1 for kind, _ in self.stages if kind == 'V')
+
+    def _phase(self, kind, c):
+        # exp(-i c dt T / hbar) or exp(-i c dt V / hbar), LRU-cached per c*dt
+        token = (self._hbar, self._m, id(self._V))
+        if token != self._phase_token:
+            self._phases.clear()
+            self._phase_token = token
+        tau = self._batched(self._dt) * c
+        key = (kind, tuple(np.ravel(tau)))
+        phase = self._phases.get(key)
+        if phase is None:
+            if kind == 'T':
+                phase = np.exp(-1j * tau * (self._hbar / (2.0 * self._m)) * self._k2)
+            else:
+                phase = np.exp(-1j * tau * self._static_potential() / self._hbar)
+            phase = phase.astype(self.psi.dtype, copy=False)
+            self._phases[key] = phase
+            while len(self._phases) > self.max_cached_phases:
+                self._phases.popitem(last=False)
+        else:
+            self._phases.move_to_end(key)
+        return phase
+
+    def run(self, n_steps):
+        if n_steps <= 0:
+            return self.psi
+        prof = instrument.active()
+        timed = prof.phase if prof is not None else instrument.null_phase
+        psi = self.psi
+        fft = instrument.instrumented(self.fft)
+        kernels = self.kernels
+        axes = self._axes
+        observers = self._observers
+
+        first, last_c = self.stages[0][1], self.stages[-1][1]
+        inner = self.stages[1:-1]
+        last_V = max(i for i, (kind, _) in enumerate(inner) if kind == 'V')
+        # Time-dependent terms see the time advanced by the kinetic stages
+        # so far (time treated as a coordinate moved by T), which keeps the
+        # scheme's order.
+        offsets = np.cumsum([0.0] + [c if kind == 'T' else 0.0 for kind, c in self.stages])[1:-1]
+
+        self._stop = False
+
+        initial = [obs for obs in observers if self.step_count == 0 and obs.due(0)]
+        with timed("observers"):
+            for obs in initial:
+                obs.sample_position(self, psi)
+        fft.fftn(psi, axes=axes, out=psi)
+        with timed("observers"):
+            for obs in initial:
+                obs.sample_momentum(self, psi)
+        with timed("kinetic"):
+            kernels.multiply(psi, self._phase('T', first))
+
+        for i in range(n_steps):
+            last = i == n_steps - 1
+            stop = False
+            due = [obs for obs in observers if obs.due(self.step_count + 1)] if observers else ()
+
+            for j, (kind, c) in enumerate(inner):
+                if kind == 'T':
+                    with timed("kinetic"):
+                        kernels.multiply(psi, self._phase('T', c))
+                    continue
+                fft.ifftn(psi, axes=axes, out=psi)
+                if j == last_V and due:
+                    with timed("observers"):
+                        for obs in due:
+                            obs.sample_position(self, psi)
+                with timed("potential"):
+                    kernels.multiply(psi, self._phase('V', c))
+                    self._apply_time_dependent(psi, self.time + offsets[j] * self._dt, c * self._dt)
+                fft.fftn(psi, axes=axes, out=psi)
+            self.step_count += 1
+            self.time += self._dt
+
+            with timed("kinetic"):
+                if due:
+                    kernels.multiply(psi, self._phase('T', last_c))
+                elif not last:
+                    kernels.multiply(psi, self._phase('T', first + last_c))
+                else:
+                    kernels.multiply(psi, self._phase('T', last_c))
+            if due:
+                with timed("observers"):
+                    for obs in due:
+                        obs.sample_momentum(self, psi)
+                stop = self._stop
+                if not last and not stop:
+                    with timed("kinetic"):
+                        kernels.multiply(psi, self._phase('T', first))
+            if prof is not None:
+                prof.step(self)
+            if stop:
+                n_steps = i + 1
+                break
+        fft.ifftn(psi, axes=axes, out=psi)
+        self._stop = False
+
+        self.fft_count += 2 * n_steps * self.potential_stages + 2
+        return psi
+
+
+class AdaptivePropagator:
+    """
+    Adaptive time stepping by step doubling.
+
+    Each trial step of size dt is also taken as two steps of dt/2; for a
+    scheme of order p the local error is estimated as
+    ||psi_dt - psi_dt/2|| / (2^p - 1). `tol` is an error per unit time:
+    steps are accepted when that estimate is below tol * dt, so the global
+    L2 error after time T is roughly tol * T. dt moves on a power-of-two
+    ladder dt0 * 2^j, which keeps the number of distinct cached phase
+    sets small.
+
+    Rejected and trial steps leave time and step_count untouched, so
+    time-dependent potentials see each step's true interval. Observers
+    (add_observer) are only sampled at accepted steps, from the end-of-step
+    state, at the price of one FFT per sample.
+    """
+
+    def __init__(self, psi, V, KX, KY=None, KZ=None, hbar=1.0, m=1.0, tol=1e-6, dt=0.01,
+                 dt_min=None, dt_max=None, dx=None, scheme='yoshida4', safety=0.9,
+                 fft_backend=None):
+        self.propagator = CompositionPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m,
+                                                fft_backend=fft_backend, scheme=scheme)
+        self.tol = tol
+        self.dt0 = dt
+        self.dt = dt
+        self.dt_min = dt_min if dt_min is not None else dt * 2.0**-20
+        self.dt_max = dt_max
+        self.safety = safety
+        self.dV = volume_element(dx if dx is not None else KX, self.propagator.psi.ndim)
+        self.time = 0.0
+        self.accepted = 0
+        self.rejected = 0
+        self._saved = np.empty_like(self.propagator.psi)
+        self._coarse = np.empty_like(self.propagator.psi)
+
+    @property
+    def psi(self):
+        return self.propagator.psi
+
+    @property
+    def fft_count(self):
+        return self.propagator.fft_count
+
+    def _ladder(self, dt):
+        # Largest dt0 * 2^j not above dt
+        j = np.floor(np.log2(dt / self.dt0))
+        dt = self.dt0 * 2.0**j
+        if self.dt_max is not None:
+            dt = min(dt, self.dt_max)
+        return dt
+
+    def add_observer(self, observer):
+        # Sampled at accepted steps only (step = number of accepted steps);
+        # see _sample()
+        return self.propagator.add_observer(observer)
+
+    def _sample(self, observers):
+        # Trial steps run without observers, so the accepted state is
+        # sampled here: position space is the end-of-step state rather than
+        # a Strang midpoint, and the momentum-space state costs one FFT
+        prop = self.propagator
+        due = [obs for obs in observers if obs.due(prop.step_count)]
+        if not due:
+            return False
+        prop.sums = None
+        for obs in due:
+            obs.sample_position(prop, prop.psi)
+        np.copyto(self._coarse, prop.psi)
+        prop.fft.fftn(self._coarse, axes=prop._axes, out=self._coarse)
+        prop.fft_count += 1
+        for obs in due:
+            obs.sample_momentum(prop, self._coarse)
+        stop, prop._stop = prop._stop, False
+        return stop
+
+    def run_until(self, t_end):
+        prop = self.propagator
+        p = prop.order
+        # Trials must neither advance the clock nor be sampled: time and
+        # step_count are restored around them and the observers detached
+        observers, prop._observers = prop._observers, []
+        try:
+            prop.time = self.time
+            if prop.step_count == 0 and self._sample(observers):
+                return prop.psi
+            while self.time < t_end * (1.0 - 1e-12):
+                dt = min(self.dt, t_end - self.time)
+                step_count = prop.step_count
+
+                np.copyto(self._saved, prop.psi)
+                prop.dt = dt
+                prop.run(1)
+                np.copyto(self._coarse, prop.psi)
+
+                np.copyto(prop.psi, self._saved)
+                prop.time = self.time
+                prop.dt = 0.5 * dt
+                prop.run(2)
+
+                err = np.sqrt(np.sum(np.abs(prop.psi - self._coarse)**2) * self.dV) / (2.0**p - 1.0)
+                stop = False
+                if err <= self.tol * dt:
+                    self.time += dt
+                    self.accepted += 1
+                    prop.time = self.time
+                    prop.step_count = step_count + 1
+                    stop = self._sample(observers)
+                else:
+                    np.copyto(prop.psi, self._saved)
+                    prop.time = self.time
+                    prop.step_count = step_count
+                    self.rejected += 1
+
+                # err ~ C dt^(p+1) against a target of tol * dt
+                factor = self.safety * (self.tol * dt / max(err, 1e-300))**(1.0 / p)
+                self.dt = self._ladder(dt * min(max(factor, 0.2), 2.0))
+                if stop:
+                    break
+                if self.dt < self.dt_min:
+                    raise RuntimeError(f"Time step fell below dt_min={self.dt_min:g} "
+                                       f"at t={self.time:g}; is the grid resolved?")
+        finally:
+            prop._observers = observers
+
+        return prop.psi
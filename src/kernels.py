@@ -0,0 +1,293 @@
+import math
+import os
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:  # numexpr is optional
+    numexpr = None
+
+try:
+    import numba
+except ImportError:  # Numba is optional
+    numba = None
+
+# Environment variable used when no backend is passed explicitly
+KERNEL_BACKEND_ENV = "SOFT_KERNELS"   # 'numpy', 'numexpr', 'numba' or 'auto'
+
+# Points per block of the NumPy kernels: a block of psi and its
+# temporaries stay in cache between the multiply and the reductions
+BLOCK_POINTS = 2**15
+
+
+def _blocks(shape, block_points=BLOCK_POINTS):
+    # Index tuples covering `shape` in C order, each about block_points
+    # points: whole trailing axes, split along the first axis they fit in
+    shape = tuple(shape)
+    if not shape:
+        yield ()
+        return
+    axis = 0
+    while axis < len(shape) - 1 and int(np.prod(shape[axis + 1:])) > block_points:
+        axis += 1
+    rows = max(1, block_points // max(int(np.prod(shape[axis + 1:])), 1))
+    for outer in np.ndindex(*shape[:axis]):
+        for start in range(0, shape[axis], rows):
+            yield outer + (slice(start, min(start + rows, shape[axis])),)
+
+
+class NumpyKernels:
+    """
+    Elementwise phase kernels and the density reductions taken alongside.
+
+    multiply(psi, phase) applies a phase in place. multiply_sums(psi,
+    phase, weight) does the same and returns (sum |psi|^2, sum |psi|^2 *
+    weight) of the result, float64-accumulated; sums() only reduces.
+    exp_phase(values, factor) is exp(-i factor values).
+
+    This is the reference backend. Plain NumPy cannot fuse ufuncs, so the
+    combined kernels walk psi in cache-sized blocks: each block is
+    multiplied and reduced while it is still in cache, so main memory sees
+    one pass over psi, the phase and the weight instead of one per ufunc
+    and temporary. The multiply and the phases are bitwise those of the
+    plain expressions; the sums differ from np.sum(np.abs(psi)**2) only
+    by summation order and re^2 + im^2 vs |psi|^2 (a few ulps).
+    """
+
+    name = "numpy"
+
+    def multiply(self, psi, phase):
+        psi *= phase
+        return psi
+
+    def multiply_sums(self, psi, phase, weight=None):
+        return self._reduce(psi, phase, weight)
+
+    def sums(self, psi, weight=None):
+        return self._reduce(psi, None, weight)
+
+    def exp_phase(self, values, factor, dtype=np.complex128):
+        values = np.asarray(values)
+        out = np.empty(values.shape, dtype=dtype)
+        for block in _blocks(values.shape):
+            out[block] = np.exp(-1j * factor * values[block])
+        return out
+
+    def _reduce(self, psi, phase, weight):
+        shape = psi.shape
+        if phase is not None:
+            phase = np.broadcast_to(phase, shape)
+        if weight is not None:
+            weight = np.broadcast_to(weight, shape)
+        real = psi.real.dtype
+        norm = weighted = 0.0
+        for block in _blocks(shape):
+            b = psi[block]
+            if phase is not None:
+                b *= phase[block]
+            rho = np.multiply(b.real, b.real, dtype=real)
+            rho += b.imag * b.imag
+            norm += float(np.sum(rho, dtype=np.float64))
+            if weight is not None:
+                rho *= weight[block]
+                weighted += float(np.sum(rho, dtype=np.float64))
+        return norm, weighted
+
+
+class NumexprKernels(NumpyKernels):
+    """
+    numexpr kernels: multithreaded, temporary-free multiply and phase
+    construction. numexpr cannot write an array and reduce it in one
+    expression, so multiply_sums is two threaded passes (still instead of
+    five NumPy passes). complex64 arrays, which numexpr does not support,
+    use the NumPy kernels, as do complex64 phases.
+    """
+
+    name = "numexpr"
+
+    def multiply(self, psi, phase):
+        if psi.dtype != np.complex128:
+            return super().multiply(psi, phase)
+        numexpr.evaluate("psi * phase", out=psi, casting="same_kind")
+        return psi
+
+    def multiply_sums(self, psi, phase, weight=None):
+        if psi.dtype != np.complex128:
+            return super().multiply_sums(psi, phase, weight)
+        self.multiply(psi, phase)
+        return self.sums(psi, weight)
+
+    def sums(self, psi, weight=None):
+        if psi.dtype != np.complex128:
+            return super().sums(psi, weight)
+        norm = float(numexpr.evaluate("sum(real(psi)**2 + imag(psi)**2)"))
+        if weight is None:
+            return norm, 0.0
+        weighted = float(numexpr.evaluate("sum((real(psi)**2 + imag(psi)**2) * weight)"))
+        return norm, weighted
+
+    def exp_phase(self, values, factor, dtype=np.complex128):
+        if np.dtype(dtype) != np.complex128:
+            # numexpr has no complex64: a complex128 result would double
+            # the temporary, so single precision stays blockwise NumPy
+            return super().exp_phase(values, factor, dtype)
+        values = np.asarray(values)
+        theta = -float(factor)
+        out = numexpr.evaluate("complex(cos(theta * values), sin(theta * values))")
+        return out.astype(dtype, copy=False)
+
+
+if numba is not None:
+    @numba.njit(parallel=True)
+    def _nb_multiply(psi, phase):
+        for i in numba.prange(psi.size):
+            psi[i] *= phase[i]
+
+    # weight of size 1 stands for no weight
+    @numba.njit(parallel=True)
+    def _nb_multiply_sums(psi, phase, weight):
+        norm = 0.0
+        weighted = 0.0
+        weigh = weight.size == psi.size
+        for i in numba.prange(psi.size):
+            v = psi[i] * phase[i]
+            psi[i] = v
+            rho = v.real * v.real + v.imag * v.imag
+            norm += rho
+            if weigh:
+                weighted += rho * weight[i]
+        return norm, weighted
+
+    @numba.njit(parallel=True)
+    def _nb_sums(psi, weight):
+        norm = 0.0
+        weighted = 0.0
+        weigh = weight.size == psi.size
+        for i in numba.prange(psi.size):
+            v = psi[i]
+            rho = v.real * v.real + v.imag * v.imag
+            norm += rho
+            if weigh:
+                weighted += rho * weight[i]
+        return norm, weighted
+
+    @numba.njit(parallel=True)
+    def _nb_exp_phase(values, factor, out):
+        for i in numba.prange(values.size):
+            theta = -factor * values[i]
+            out[i] = complex(math.cos(theta), math.sin(theta))
+
+
+class NumbaKernels(NumpyKernels):
+    """
+    Numba kernels: one multithreaded loop multiplies, squares and
+    accumulates, so psi, the phase and the weight are each read once and
+    psi written once. They work on flat views, so the operands must be
+    C-contiguous arrays of psi's shape (as the propagator's phases are);
+    anything else (broadcast phases, batched ensembles) falls back to the
+    NumPy kernels. The first call of each signature compiles.
+    """
+
+    name = "numba"
+
+    @staticmethod
+    def _flat(psi, *operands):
+        if not psi.flags.c_contiguous:
+            return None
+        flat = [psi.reshape(-1)]
+        for a in operands:
+            if a is None:
+                flat.append(np.zeros(1))
+                continue
+            if np.shape(a) != psi.shape or not a.flags.c_contiguous:
+                return None
+            flat.append(a.reshape(-1))
+        return flat
+
+    def multiply(self, psi, phase):
+        flat = self._flat(psi, phase)
+        if flat is None:
+            return super().multiply(psi, phase)
+        _nb_multiply(*flat)
+        return psi
+
+    def multiply_sums(self, psi, phase, weight=None):
+        flat = self._flat(psi, phase, weight)
+        if flat is None:
+            return super().multiply_sums(psi, phase, weight)
+        norm, weighted = _nb_multiply_sums(*flat)
+        return float(norm), float(weighted)
+
+    def sums(self, psi, weight=None):
+        flat = self._flat(psi, weight)
+        if flat is None:
+            return super().sums(psi, weight)
+        norm, weighted = _nb_sums(*flat)
+        return float(norm), float(weighted)
+
+    def exp_phase(self, values, factor, dtype=np.complex128):
+        values = np.ascontiguousarray(values)
+        out = np.empty(values.shape, dtype=dtype)
+        _nb_exp_phase(values.reshape(-1), float(factor), out.reshape(-1))
+        return out
+
+
+KERNEL_BACKENDS = {
+    "numpy": NumpyKernels,
+    "numexpr": NumexprKernels,
+    "numba": NumbaKernels,
+}
+
+_instances = {}
+
+
+def available_kernel_backends():
+    names = ["numpy"]
+    if numexpr is not None:
+        names.append("numexpr")
+    if numba is not None:
+        names.append("numba")
+    return names
+
+
+def get_kernels(backend=None):
+    # Backend objects are passed through untouched
+    if backend is not None and not isinstance(backend, str):
+        return backend
+
+    name = backend or os.environ.get(KERNEL_BACKEND_ENV, "numpy")
+    name = name.lower()
+    if name == "auto":
+        name = available_kernel_backends()[-1]
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name}")
+    if name not in available_kernel_backends():
+        raise ValueError(f"Kernel backend {name} is not installed")
+
+    if name not in _instances:
+        _instances[name] = KERNEL_BACKENDS[name]()
+    return _instances[name]
+
+
+def compare_kernel_backends(shape=(16, 16, 16), names=None, seed=0):
+    # Max relative deviation of each backend from plain NumPy expressions on
+    # random data, over the phase product, the sums and exp_phase
+    rng = np.random.default_rng(seed)
+    psi = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+    phase = np.exp(1j * rng.uniform(0.0, 2.0 * np.pi, shape))
+    weight = rng.uniform(0.0, 5.0, shape)
+    ref = psi * phase
+    rho = np.abs(ref)**2
+    ref_sums = np.array([np.sum(rho, dtype=np.float64), np.sum(rho * weight, dtype=np.float64)])
+    ref_exp = np.exp(-1j * 0.3 * weight)
+
+    errors = {}
+    for name in names or available_kernel_backends():
+        kernels = get_kernels(name)
+        out = psi.copy()
+        sums = np.array(kernels.multiply_sums(out, phase, weight))
+        errors[name] = max(np.max(np.abs(out - ref)),
+                           np.max(np.abs(sums - ref_sums) / ref_sums),
+                           np.max(np.abs(kernels.exp_phase(weight, 0.3) - ref_exp)))
+    return errors
@@ -1,8 +1,10 @@
 import numpy as np
-from initialize_system import initialize_system
-from potential import potential_function
-from evolve import evolve_wavefunction
-from visualize import visualize_results_3d  # <- a 3D visualization function
+from src.initialize_system import initialize_system
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.checkpoint import CheckpointWriter, latest_checkpoint, resume
+from src.visualize import visualize_results_3d  # <- a 3D visualization function
+from src.instrument import profile_from_env
 
 def main():
     # --- Example parameters for a quick 3D run ---
@@ -19,6 +21,10 @@ def main():
     dt = 0.01
     total_time = 2.0
 
+    # Set to a directory to snapshot psi every 50 steps from a background
+    # thread; re-running then continues from the last complete checkpoint.
+    checkpoint_dir = None
+
     # --- Initialize the 3D system ---
     (X, Y, Z,
      dx,
@@ -29,7 +35,8 @@ def main():
          x0, y0, z0,
          sigma,
          kx0, ky0, kz0,
-         hbar, m
+         hbar, m,
+         sparse=True  # broadcastable grids: memory scales with psi alone
     )
 
     # --- Define a 3D barrier potential ---
@@ -40,8 +47,17 @@ def main():
 
     # --- Main time evolution loop ---
     num_steps = int(total_time / dt)
-    for step in range(num_steps):
-        psi = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar, m)
+    if checkpoint_dir and latest_checkpoint(checkpoint_dir):
+        propagator = resume(checkpoint_dir, V, KX, KY, KZ)
+    else:
+        propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m)
+
+    if checkpoint_dir:
+        with CheckpointWriter(checkpoint_dir, every=50) as writer:
+            propagator.add_observer(writer)
+            psi = propagator.run(num_steps - propagator.step_count)
+    else:
+        psi = propagator.run(num_steps)
 
     # --- Final visualization of a cross-section (z = mid-plane, for instance) ---
     visualize_results_3d(
@@ -54,5 +70,7 @@ def main():
     print("3D default simulation finished.")
 
 if __name__ == "__main__":
-    main()
+    # SOFT_PROFILE=trace.json prints per-phase timings and writes a Chrome trace
+    with profile_from_env():
+        main()
 
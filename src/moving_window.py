@@ -0,0 +1,188 @@
+import numpy as np
+
+from src import instrument
+from src.evolve import SplitOperatorPropagator
+from src.grid import Grid
+
+
+class _MomentumTracker:
+    # Observer reading <k> per axis from the exact momentum-space state at
+    # the end of a segment (no extra FFT)
+    def __init__(self, grid):
+        self.grid = grid
+        self.step = None
+        self.k_mean = None
+
+    def due(self, step):
+        return step == self.step
+
+    def sample_position(self, propagator, psi):
+        pass
+
+    def sample_momentum(self, propagator, psi_k):
+        rho_k = np.abs(psi_k)**2
+        total = np.sum(rho_k, dtype=np.float64)
+        means = []
+        for axis, k in enumerate(self.grid.k_axes):
+            others = tuple(i for i in range(rho_k.ndim) if i != axis)
+            means.append(float(np.dot(np.sum(rho_k, axis=others, dtype=np.float64), k) / total))
+        self.k_mean = np.array(means)
+
+
+class MovingWindowPropagator:
+    """
+    Split-operator propagation on a small box that follows the packet
+    across a larger domain.
+
+    The run is cut into segments of recenter_every steps. After each one
+    the window is re-centred on where the packet will be half a segment
+    later: <r> from the final psi, <k> from the exact momentum-space state
+    the propagator already has at the segment end (via an observer, no
+    extra FFT), predicted centre <r> + lead * hbar<k>/m * segment time.
+    Shifts are whole grid cells along the moving `axes`, so the FFT phase
+    shift psi_k * exp(i k d) is exactly a roll of psi by d/dx cells and is
+    done as one; the potential is then re-evaluated on the new window
+    coordinates, so it needs no interpolation. The strip leaving at the
+    trailing edge would wrap round to the leading edge; it is zeroed.
+
+    potential is a potential_library Potential or any callable(coords) ->
+    array on sparse coordinates, in the fixed (lab) frame. grid is the
+    window at its start position; `window` is the current one, `origin`
+    the shift from the start in cells. domain=(mins, maxs) keeps the
+    window inside a lab-frame box.
+
+    Error budget (error_budget() reports the measured terms):
+
+    - norm_dropped: probability in the strips that left the window, lost
+      for good (reflected waves left behind end up here too).
+    - max_edge_probability: the largest probability found within `margin`
+      cells of a moving window edge at a re-centring. Between shifts the
+      box is periodic, so this bounds what can wrap around or miss the
+      potential outside the window; if it is not small compared with the
+      accuracy wanted, enlarge the box or shorten recenter_every.
+    - The splitting error per step is that of SplitOperatorPropagator;
+      re-evaluating V on the grid adds nothing. Each re-centring costs two
+      extra FFTs (a fresh run() segment) and one potential evaluation.
+    """
+
+    def __init__(self, psi, potential, dt, grid, hbar=1.0, m=1.0, recenter_every=20,
+                 axes=None, lead=0.5, min_shift=1, margin=4, domain=None, fft_backend=None):
+        self.grid = grid
+        self.potential = potential
+        self.recenter_every = recenter_every
+        self.axes = tuple(range(grid.ndim)) if axes is None else tuple(axes)
+        self.lead = lead
+        self.min_shift = min_shift
+        self.margin = margin
+        self.domain = domain
+        self.origin = np.zeros(grid.ndim, dtype=int)
+
+        self.norm_dropped = 0.0
+        self.max_edge_probability = 0.0
+        self.shifts = 0
+        self.history = []  # (time, <r> lab frame, <k>, origin)
+
+        self._tracker = _MomentumTracker(grid)
+        self.propagator = SplitOperatorPropagator(psi, self._evaluate(), dt, grid,
+                                                  hbar=hbar, m=m, fft_backend=fft_backend)
+        self.propagator.add_observer(self._tracker)
+
+    # --- Window ---
+    @property
+    def window(self):
+        # The current window as a Grid in lab coordinates
+        return Grid([ax.astype(np.float64) + o * d for ax, o, d
+                     in zip(self.grid.axes, self.origin, self.grid.spacing)], dtype=self.grid.dtype)
+
+    def _evaluate(self):
+        coords = self.window.coords
+        if hasattr(self.potential, "evaluate"):
+            return self.potential.evaluate(coords)
+        return np.broadcast_to(self.potential(coords), self.grid.shape)
+
+    @property
+    def psi(self):
+        return self.propagator.psi
+
+    @property
+    def time(self):
+        return self.propagator.time
+
+    @property
+    def step_count(self):
+        return self.propagator.step_count
+
+    # --- Propagation ---
+    def run(self, n_steps):
+        done = 0
+        while done < n_steps:
+            k = min(self.recenter_every, n_steps - done)
+            self._tracker.step = self.propagator.step_count + k
+            self.propagator.run(k)
+            done += k
+            with instrument.phase("recenter"):
+                self._recenter(k)
+        return self.psi
+
+    def _recenter(self, steps):
+        psi = self.propagator.psi
+        rho = np.abs(psi)**2
+        dV = self.grid.dV
+        total = np.sum(rho, dtype=np.float64)
+        if total == 0.0:
+            return
+        window = self.window
+        r_mean = np.zeros(self.grid.ndim)
+        for axis, x in enumerate(window.axes):
+            others = tuple(i for i in range(rho.ndim) if i != axis)
+            marginal = np.sum(rho, axis=others, dtype=np.float64)
+            r_mean[axis] = np.dot(marginal, x) / total
+            if axis in self.axes and self.margin:
+                edge = marginal[:self.margin].sum() + marginal[-self.margin:].sum()
+                self.max_edge_probability = max(self.max_edge_probability, float(edge) * dV)
+        k_mean = self._tracker.k_mean
+        self.history.append((self.time, r_mean, k_mean, self.origin.copy()))
+
+        velocity = self.propagator.hbar * k_mean / self.propagator.m
+        target = r_mean + self.lead * velocity * steps * self.propagator.dt
+        cells = np.zeros(self.grid.ndim, dtype=int)
+        for axis in self.axes:
+            x = window.axes[axis]
+            center = 0.5 * (float(x[0]) + float(x[-1]))
+            n = int(round((target[axis] - center) / self.grid.spacing[axis]))
+            if self.domain is not None:
+                lo = self.domain[0][axis] - float(x[0])
+                hi = self.domain[1][axis] - (float(x[-1]) + self.grid.spacing[axis])
+                n = int(np.clip(n, np.ceil(lo / self.grid.spacing[axis]),
+                                np.floor(hi / self.grid.spacing[axis])))
+            if abs(n) >= self.min_shift:
+                cells[axis] = n
+        if not cells.any():
+            return
+
+        for axis in np.flatnonzero(cells):
+            self._shift(psi, axis, int(cells[axis]))
+        self.origin += cells
+        self.shifts += 1
+        self.propagator.V = self._evaluate()
+
+    def _shift(self, psi, axis, n):
+        # psi(x) -> psi(x + n dx): roll by -n cells and zero the strip that
+        # wrapped around from the trailing edge
+        n = int(np.clip(n, -psi.shape[axis], psi.shape[axis]))
+        strip = [slice(None)] * psi.ndim
+        strip[axis] = slice(0, n) if n > 0 else slice(n, None)
+        strip = tuple(strip)
+        self.norm_dropped += float(np.sum(np.abs(psi[strip])**2, dtype=np.float64)) * self.grid.dV
+        np.copyto(psi, np.roll(psi, -n, axis=axis))
+        strip = list(strip)
+        strip[axis] = slice(-n, None) if n > 0 else slice(0, -n)
+        psi[tuple(strip)] = 0.0
+
+    def error_budget(self):
+        return {
+            "norm_dropped": self.norm_dropped,
+            "max_edge_probability": self.max_edge_probability,
+            "shifts": self.shifts,
+            "origin": self.origin.tolist(),
+        }
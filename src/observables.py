@@ -0,0 +1,188 @@
+import numpy as np
+
+from src.kernels import get_kernels
+
+AXIS_NAMES = ('x', 'y', 'z')
+
+
+class ObservableRecorder:
+    """
+    Streaming observables for a SplitOperatorPropagator.
+
+    Attach with propagator.add_observer(recorder). Every `every` steps the
+    propagator hands over the arrays it already has, so no extra FFTs are
+    done:
+
+    - momentum space (exact at the end of the step): norm, <T>, <k>, k widths
+    - position space (the Strang midpoint array, i.e. after the first
+      kinetic half-step, whose |psi|^2 is unchanged by the potential
+      phase): <V>, <r>, r widths. These lag the step boundary by half a
+      kinetic sub-step, an O(dt) offset; step 0 is exact.
+
+    Samples are kept in a compact float64 table and can be exported with
+    to_numpy() or to_csv().
+    """
+
+    def __init__(self, grid, every=1):
+        self.grid = grid
+        self.every = every
+        names = AXIS_NAMES if grid.ndim <= 3 else [f"r{i}" for i in range(grid.ndim)]
+        self.axis_names = list(names[:grid.ndim])
+        self.fields = (['step', 'time', 'norm', 'T', 'V', 'E']
+                       + [f"<{a}>" for a in self.axis_names]
+                       + [f"<k{a}>" for a in self.axis_names]
+                       + [f"d{a}" for a in self.axis_names]
+                       + [f"dk{a}" for a in self.axis_names])
+        self._table = np.empty((16, len(self.fields)))
+        self._n = 0
+        self._position = None
+
+    def __len__(self):
+        return self._n
+
+    def due(self, step):
+        return step % self.every == 0
+
+    # --- Called by the propagator ---
+    def sample_position(self, propagator, psi):
+        rho = np.abs(psi)**2
+        dV = self.grid.dV
+        V = propagator.potential_at(propagator.time)
+        E_potential = np.sum(rho * V, dtype=np.float64) * dV
+        means, widths = self._moments(rho, self.grid.axes)
+        self._position = (E_potential, means, widths)
+
+    def sample_momentum(self, propagator, psi_k):
+        rho_k = np.abs(psi_k)**2
+        # Parseval for the unnormalised DFT: sum |psi|^2 = sum |psi_k|^2 / N_total
+        scale = self.grid.dV / rho_k.size
+        norm = np.sum(rho_k, dtype=np.float64) * scale
+        T_of_k = (propagator.hbar**2 / (2.0 * propagator.m)) * self.grid.k2
+        E_kinetic = np.sum(rho_k * T_of_k, dtype=np.float64) * scale
+        k_means, k_widths = self._moments(rho_k, self.grid.k_axes)
+
+        E_potential, means, widths = self._position
+        self._position = None
+        row = ([propagator.step_count, propagator.time, norm,
+                E_kinetic, E_potential, E_kinetic + E_potential]
+               + list(means) + list(k_means) + list(widths) + list(k_widths))
+        self._append(row)
+
+    # --- Internals ---
+    @staticmethod
+    def _moments(rho, axes):
+        # Per-axis mean and width from the marginals of rho; the grid is
+        # separable so each marginal is a sum over the other axes.
+        total = np.sum(rho, dtype=np.float64)
+        means, widths = [], []
+        for axis, q in enumerate(axes):
+            others = tuple(i for i in range(rho.ndim) if i != axis)
+            marginal = np.sum(rho, axis=others, dtype=np.float64) / total
+            mean = np.dot(marginal, q)
+            means.append(mean)
+            widths.append(np.sqrt(max(np.dot(marginal, q**2) - mean**2, 0.0)))
+        return means, widths
+
+    def _append(self, row):
+        if self._n == len(self._table):
+            self._table = np.concatenate([self._table, np.empty_like(self._table)])
+        self._table[self._n] = row
+        self._n += 1
+
+    # --- Export ---
+    def to_numpy(self):
+        # Structured array with one named column per observable
+        table = self._table[:self._n]
+        dtype = [(name, np.float64) for name in self.fields]
+        out = np.empty(self._n, dtype=dtype)
+        for i, name in enumerate(self.fields):
+            out[name] = table[:, i]
+        return out
+
+    def to_csv(self, path):
+        np.savetxt(path, self._table[:self._n], delimiter=',',
+                   header=','.join(self.fields), comments='')
+
+    def __getitem__(self, name):
+        return self._table[:self._n, self.fields.index(name)]
+
+
+class EnergyRecorder:
+    """
+    Streaming norm, <T>, <V> and E only: the cheap subset of
+    ObservableRecorder for monitoring long runs.
+
+    On a SplitOperatorPropagator the sums are reduced inside the phase
+    multiplies the step does anyway (fused_sums, see run()), so sampling
+    adds no pass over psi at all; elsewhere (CompositionPropagator,
+    batched ensembles) they are reduced here. Either way <V> is that of
+    the Strang midpoint array, like ObservableRecorder's, and norm and <T>
+    are exact at the step's end.
+
+    On a batched propagator (leading axes beyond the grid's) norm, T, V
+    and E are per member: recorder['E'] has shape (samples, B) and
+    to_numpy() shape (samples, fields, B).
+    """
+
+    fused_sums = True
+    fields = ['step', 'time', 'norm', 'T', 'V', 'E']
+
+    def __init__(self, grid, every=1):
+        self.grid = grid
+        self.every = every
+        self._rows = []
+        self._V = None
+        self._batched = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def due(self, step):
+        return step % self.every == 0
+
+    # --- Called by the propagator ---
+    def sample_position(self, propagator, psi):
+        if getattr(propagator, "fuses_sums", False):
+            return
+        V = propagator.potential_at(propagator.time)
+        if psi.ndim > self.grid.ndim:
+            self._V = np.sum(np.abs(psi)**2 * V, axis=self._grid_axes(psi), dtype=np.float64)
+        else:
+            kernels = get_kernels(getattr(propagator, "kernels", None))
+            _, self._V = kernels.sums(psi, V)
+
+    def sample_momentum(self, propagator, psi_k):
+        dV = self.grid.dV
+        self._batched = psi_k.ndim > self.grid.ndim
+        sums = getattr(propagator, "sums", None)
+        if sums is None:
+            T_of_k = (propagator.hbar**2 / (2.0 * propagator.m)) * self.grid.k2
+            if self._batched:
+                # Per member: reduce over the grid axes only
+                axes = self._grid_axes(psi_k)
+                rho_k = np.abs(psi_k)**2
+                norm = np.sum(rho_k, axis=axes, dtype=np.float64)
+                E_kinetic = np.sum(rho_k * T_of_k, axis=axes, dtype=np.float64)
+            else:
+                kernels = get_kernels(getattr(propagator, "kernels", None))
+                norm, E_kinetic = kernels.sums(psi_k, T_of_k)
+            n_points = np.prod(psi_k.shape[-self.grid.ndim:])
+            sums = {"norm": norm / n_points, "T": E_kinetic / n_points, "V": self._V}
+        norm, E_kinetic, E_potential = sums["norm"] * dV, sums["T"] * dV, sums["V"] * dV
+        self._rows.append((propagator.step_count, propagator.time, norm,
+                           E_kinetic, E_potential, E_kinetic + E_potential))
+
+    def _grid_axes(self, psi):
+        return tuple(range(psi.ndim - self.grid.ndim, psi.ndim))
+
+    def to_numpy(self):
+        if not self._rows:
+            return np.empty((0, len(self.fields)))
+        n = len(self._rows)
+        columns = np.broadcast_arrays(*[np.asarray(column, dtype=np.float64).reshape(n, -1)
+                                        for column in zip(*self._rows)])
+        table = np.stack(columns, axis=1)
+        return table if self._batched else table[:, :, 0]
+
+    def __getitem__(self, name):
+        return self.to_numpy()[:, self.fields.index(name)]
@@ -0,0 +1,222 @@
+import os
+
+import numpy as np
+
+from src import instrument
+from src.fft_backend import get_fft_backend
+from src.grid import Grid, axis_values, complex_dtype
+
+
+def _blocks(n, size):
+    for start in range(0, n, size):
+        yield slice(start, min(start + size, n))
+
+
+class OutOfCorePropagator:
+    """
+    Split-operator propagation of a psi kept in a memory-mapped file, for
+    grids that do not fit in RAM.
+
+    The n-D FFT is done as two kinds of passes over the file, each reading
+    and writing blocks that fit in memory_budget:
+
+      A: slabs psi[i0:i1] along axis 0, transformed over axes 1, 2, ...
+      B: blocks psi[:, j0:j1] across axis 0, transformed along axis 0
+
+    and the Strang steps are arranged so every pass does all the work it
+    can on a block while it is in memory: a B pass finishes the forward
+    transform, applies the kinetic phase (separable, built from 1D factors)
+    and starts the inverse; an A pass finishes the inverse, applies the
+    potential phase and starts the next forward transform. run(n) is thus
+    2n + 3 passes, roughly two reads and two writes of psi per step, with
+    the same fused T/2 V T ... V T/2 sequence (and results) as
+    SplitOperatorPropagator.
+
+    V is an array (a numpy.memmap works) read slab by slab, or a
+    potential_library Potential evaluated slab by slab, so it need not be
+    in memory either; its phase is exponentiated per slab. psi is an
+    array, a callable psi(coords) on slabs of sparse coordinates (needs KX
+    to be a Grid), or None to continue from the data already in `path`.
+
+    bytes_read / bytes_written count the I/O of every pass (psi and V) to
+    help tune memory_budget; io_report() summarises them.
+    """
+
+    def __init__(self, path, psi, V, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0,
+                 memory_budget=2**30, shape=None, dtype=np.complex128, fft_backend=None):
+        self.grid = KX if isinstance(KX, Grid) else None
+        if self.grid is not None:
+            k_axes = [np.asarray(k, dtype=np.float64) for k in self.grid.k_axes]
+        else:
+            k_axes = [axis_values(k, axis) for axis, k in enumerate(k for k in (KX, KY, KZ) if k is not None)]
+        shape = tuple(len(k) for k in k_axes) if shape is None else tuple(shape)
+        if len(shape) < 2:
+            raise ValueError("Out-of-core propagation needs at least a 2D grid")
+        if psi is not None and not callable(psi):
+            dtype = complex_dtype(np.asarray(psi[(0,) * len(shape)]).dtype)
+
+        self.path = path
+        self.shape = shape
+        self.dt = dt
+        self.hbar = hbar
+        self.m = m
+        self.V = V
+        self.memory_budget = memory_budget
+        self.fft = get_fft_backend(fft_backend)
+        self.step_count = 0
+        self.time = 0.0
+        self.fft_count = 0
+        self.passes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+        if psi is None and not os.path.exists(path):
+            raise FileNotFoundError(f"No wavefunction to continue from at {path}")
+        self._psi = np.memmap(path, dtype=dtype, mode="r+" if psi is None else "w+", shape=shape)
+        itemsize = self._psi.itemsize
+
+        # A block plus the transform's temporaries and one phase block
+        block_bytes = memory_budget // 3
+        plane = int(np.prod(shape[1:])) * itemsize
+        column = shape[0] * int(np.prod(shape[2:])) * itemsize
+        if block_bytes < max(plane, column):
+            raise ValueError(f"memory_budget of {memory_budget} bytes is too small; "
+                             f"need at least {3 * max(plane, column)}")
+        self.slab_rows = max(1, min(shape[0], block_bytes // plane))
+        self.block_cols = max(1, min(shape[1], block_bytes // column))
+
+        self._k_axes = k_axes
+        self._kinetic = {}
+        if psi is not None:
+            self._fill(psi)
+
+    # --- Setup ---
+    def _slab_coords(self, sl):
+        return tuple(c[sl] if c.shape[0] > 1 else c for c in self.grid.coords)
+
+    def _fill(self, psi):
+        for sl in _blocks(self.shape[0], self.slab_rows):
+            if callable(psi):
+                if self.grid is None:
+                    raise ValueError("A callable psi needs KX to be a Grid")
+                block = np.broadcast_to(psi(self._slab_coords(sl)), (sl.stop - sl.start,) + self.shape[1:])
+            else:
+                block = psi[sl]
+            self._write((sl,), block)
+        self.bytes_written = 0  # setup I/O is not part of the propagation
+        self._psi.flush()
+
+    def _kinetic_factors(self, c):
+        # exp(-i c dt T / hbar) = e0(k0) * e_rest(k1, k2, ...), cached per c
+        factors = self._kinetic.get(c)
+        if factors is None:
+            scale = c * self.dt * (self.hbar / (2.0 * self.m))
+            e = [np.exp(-1j * scale * k**2).astype(self._psi.dtype) for k in self._k_axes]
+            rest = e[1]
+            for ek in e[2:]:
+                rest = np.multiply.outer(rest, ek)
+            factors = (e[0].reshape((-1,) + (1,) * (len(self.shape) - 1)), rest)
+            self._kinetic[c] = factors
+        return factors
+
+    def _potential_phase(self, sl):
+        if hasattr(self.V, "evaluate"):
+            V = self.V.evaluate(self._slab_coords(sl))
+        else:
+            V = np.asarray(self.V[sl])
+            self.bytes_read += V.nbytes
+        return np.exp(-1j * V * (self.dt / self.hbar)).astype(self._psi.dtype, copy=False)
+
+    # --- I/O ---
+    def _read(self, index):
+        block = np.array(self._psi[index])
+        self.bytes_read += block.nbytes
+        return block
+
+    def _write(self, index, block):
+        self._psi[index] = block
+        self.bytes_written += self._psi[index].nbytes
+
+    # --- Passes ---
+    def _pass_a(self, inverse, potential, forward):
+        axes = tuple(range(1, len(self.shape)))
+        with instrument.phase("ooc_pass_a"):
+            for sl in _blocks(self.shape[0], self.slab_rows):
+                block = self._read((sl,))
+                if inverse:
+                    self.fft.ifftn(block, axes=axes, out=block)
+                if potential:
+                    block *= self._potential_phase(sl)
+                if forward:
+                    self.fft.fftn(block, axes=axes, out=block)
+                self._write((sl,), block)
+        self.passes += 1
+
+    def _pass_b(self, c):
+        e0, rest = self._kinetic_factors(c)
+        with instrument.phase("ooc_pass_b"):
+            for sl in _blocks(self.shape[1], self.block_cols):
+                index = (slice(None), sl)
+                block = self._read(index)
+                self.fft.fftn(block, axes=(0,), out=block)
+                block *= e0
+                block *= rest[sl]
+                self.fft.ifftn(block, axes=(0,), out=block)
+                self._write(index, block)
+        self.passes += 1
+
+    def run(self, n_steps):
+        if n_steps <= 0:
+            return self._psi
+        read, written = self.bytes_read, self.bytes_written
+        self._pass_a(inverse=False, potential=False, forward=True)
+        self._pass_b(0.5)
+        for i in range(n_steps):
+            self._pass_a(inverse=True, potential=True, forward=True)
+            self._pass_b(1.0 if i < n_steps - 1 else 0.5)
+        self._pass_a(inverse=True, potential=False, forward=False)
+        self._psi.flush()
+
+        self.step_count += n_steps
+        self.time += n_steps * self.dt
+        self.fft_count += 2 * n_steps + 2
+        instrument.count("fft_calls", 2 * n_steps + 2)
+        instrument.count("io_bytes_read", self.bytes_read - read)
+        instrument.count("io_bytes_written", self.bytes_written - written)
+        return self._psi
+
+    def step(self):
+        return self.run(1)
+
+    @property
+    def psi(self):
+        return self._psi
+
+    def norm(self, dV):
+        # Streaming integral of |psi|^2 (read-only pass)
+        total = 0.0
+        for sl in _blocks(self.shape[0], self.slab_rows):
+            block = self._read((sl,))
+            total += np.sum(np.abs(block)**2, dtype=np.float64)
+        return total * dV
+
+    def io_report(self):
+        # I/O volume so far, per step and relative to the size of psi
+        psi_bytes = self._psi.nbytes
+        steps = max(self.step_count, 1)
+        return {
+            "psi_bytes": psi_bytes,
+            "memory_budget": self.memory_budget,
+            "slab_rows": self.slab_rows,
+            "block_cols": self.block_cols,
+            "passes": self.passes,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "read_per_step": self.bytes_read / steps,
+            "written_per_step": self.bytes_written / steps,
+            "psi_reads_per_step": self.bytes_read / steps / psi_bytes,
+        }
+
+    def close(self):
+        self._psi.flush()
+        del self._psi
@@ -0,0 +1,228 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src import instrument
+from src.fft_backend import get_fft_backend
+from src.grid import Grid, axis_values, complex_dtype
+
+
+def slab_bounds(n, parts):
+    # [start, stop) of `parts` near-equal slabs of n planes
+    edges = np.linspace(0, n, parts + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def _k_axes(KX, KY=None, KZ=None):
+    # 1D wave-number axes from a Grid or dense/sparse K arrays
+    if isinstance(KX, Grid):
+        return [np.asarray(k, dtype=np.float64) for k in KX.k_axes]
+    return [axis_values(k, axis) for axis, k in enumerate(k for k in (KX, KY, KZ) if k is not None)]
+
+
+def _worker(rank, spec, V_slab, conn, barrier):
+    # One slab of the grid: x-slab rank of the position-space buffer A
+    # (shape (N0, N1, ...)) and y-slab rank of the transposed momentum-space
+    # buffer B (shape (N1, N0, ...)).
+    shm_a = shared_memory.SharedMemory(name=spec["a"])
+    shm_b = shared_memory.SharedMemory(name=spec["b"])
+    try:
+        shape = spec["shape"]
+        shape_t = (shape[1], shape[0]) + shape[2:]
+        A = np.ndarray(shape, dtype=spec["dtype"], buffer=shm_a.buf)
+        B = np.ndarray(shape_t, dtype=spec["dtype"], buffer=shm_b.buf)
+        xs = slice(*spec["x_bounds"][rank])
+        ys = slice(*spec["y_bounds"][rank])
+        a, b = A[xs], B[ys]
+        fft = get_fft_backend(spec["fft_backend"], workers=1)
+        local_axes = tuple(range(1, len(shape)))
+
+        # Phases for the local slabs only; k2 in the transposed layout
+        dt, hbar, m = spec["dt"], spec["hbar"], spec["m"]
+        k = spec["k_axes"]
+        k_t = [k[1][ys], k[0]] + list(k[2:])
+        k2 = sum((kk**2).reshape([-1 if i == j else 1 for j in range(len(shape))])
+                 for i, kk in enumerate(k_t))
+        kinetic_half = np.exp(-1j * 0.5 * dt * (hbar / (2.0 * m)) * k2).astype(b.dtype)
+        kinetic_full = kinetic_half * kinetic_half
+        potential = np.exp(-1j * V_slab * dt / hbar).astype(a.dtype)
+        del V_slab
+
+        def forward():
+            fft.fftn(a, axes=local_axes, out=a)
+            barrier.wait()  # all x-slabs transformed
+            np.copyto(b, np.swapaxes(A[:, ys], 0, 1))
+            fft.fftn(b, axes=(1,), out=b)
+
+        def inverse():
+            fft.ifftn(b, axes=(1,), out=b)
+            barrier.wait()  # all y-slabs transformed
+            np.copyto(a, np.swapaxes(B[:, xs], 0, 1))
+            fft.ifftn(a, axes=local_axes, out=a)
+
+        conn.send(("ready", None))
+        while True:
+            command, n_steps = conn.recv()
+            if command == "stop":
+                break
+            try:
+                # Same fused Strang loop as SplitOperatorPropagator.run()
+                forward()
+                b *= kinetic_half
+                for i in range(n_steps):
+                    inverse()
+                    a *= potential
+                    forward()
+                    b *= kinetic_full if i < n_steps - 1 else kinetic_half
+                inverse()
+                conn.send(("done", None))
+            except Exception as error:  # unblock the other workers, report
+                barrier.abort()
+                conn.send(("error", repr(error)))
+        del a, b, A, B
+    finally:
+        shm_a.close()
+        shm_b.close()
+
+
+class SlabPropagator:
+    """
+    Split-operator propagator with the grid split into slabs across worker
+    processes on one node.
+
+    psi lives in multiprocessing.shared_memory in two layouts: position
+    space in slabs along axis 0, and momentum space transposed to slabs
+    along axis 1. A distributed FFT is a local FFT over axes 1.. of each
+    x-slab, a transpose (every worker copies its y-slab out of the shared
+    buffer, the only all-to-all step) and a local FFT along the old axis 0;
+    the inverse runs the other way. Each worker builds and applies the
+    potential and kinetic phases for its own slabs, so phase memory is
+    split too; the second buffer doubles the memory of psi itself.
+
+    The steps are the same fused Strang steps as SplitOperatorPropagator
+    (2n+2 distributed FFTs for run(n)), so results agree with
+    evolve_wavefunction to round-off. psi must have at least two axes and no
+    batch axes. Call close() (or use a with block) to stop the workers and
+    free the shared memory; psi stays readable afterwards as a copy.
+    """
+
+    def __init__(self, psi, V, dt, KX, KY=None, KZ=None, hbar=1.0, m=1.0, workers=2,
+                 fft_backend=None):
+        psi = np.asarray(psi)
+        if psi.ndim < 2:
+            raise ValueError("Slab decomposition needs at least a 2D grid")
+        k_axes = _k_axes(KX, KY, KZ)
+        if len(k_axes) != psi.ndim:
+            raise ValueError("psi must have exactly the grid's axes (no batch axes)")
+        shape = psi.shape
+        workers = max(1, min(int(workers), shape[0], shape[1]))
+        dtype = complex_dtype(psi.dtype)
+
+        self.shape = shape
+        self.workers = workers
+        self.dt = dt
+        self.hbar = hbar
+        self.m = m
+        self.step_count = 0
+        self.time = 0.0
+        self.fft_count = 0
+        self._closed = False
+        self._result = None
+
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self._shm = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(2)]
+        self._psi = np.ndarray(shape, dtype=dtype, buffer=self._shm[0].buf)
+        np.copyto(self._psi, psi)
+
+        spec = {
+            "a": self._shm[0].name,
+            "b": self._shm[1].name,
+            "shape": shape,
+            "dtype": np.dtype(dtype).str,
+            "x_bounds": slab_bounds(shape[0], workers),
+            "y_bounds": slab_bounds(shape[1], workers),
+            "k_axes": k_axes,
+            "dt": float(dt),
+            "hbar": float(hbar),
+            "m": float(m),
+            "fft_backend": fft_backend,
+        }
+        V = np.broadcast_to(V, shape)
+        ctx = mp.get_context()
+        barrier = ctx.Barrier(workers)
+        self._conns = []
+        self._procs = []
+        try:
+            for rank, (x0, x1) in enumerate(spec["x_bounds"]):
+                parent, child = ctx.Pipe()
+                proc = ctx.Process(target=_worker, daemon=True,
+                                   args=(rank, spec, np.array(V[x0:x1]), child, barrier))
+                proc.start()
+                child.close()
+                self._conns.append(parent)
+                self._procs.append(proc)
+            self._collect()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def psi(self):
+        return self._psi if not self._closed else self._result
+
+    def _collect(self):
+        errors = []
+        for conn in self._conns:
+            try:
+                status, message = conn.recv()
+            except EOFError:
+                status, message = "error", "worker exited"
+            if status == "error":
+                errors.append(message)
+        if errors:
+            raise RuntimeError(f"Slab worker failed: {errors[0]}")
+
+    def run(self, n_steps):
+        if self._closed:
+            raise RuntimeError("SlabPropagator is closed")
+        if n_steps <= 0:
+            return self.psi
+        with instrument.phase("slab_run"):
+            for conn in self._conns:
+                conn.send(("run", int(n_steps)))
+            self._collect()
+        instrument.count("fft_calls", 2 * n_steps + 2)
+        self.step_count += n_steps
+        self.time += n_steps * self.dt
+        self.fft_count += 2 * n_steps + 2
+        return self.psi
+
+    def step(self):
+        return self.run(1)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for conn, proc in zip(self._conns, self._procs):
+            if proc.is_alive():
+                try:
+                    conn.send(("stop", None))
+                except (BrokenPipeError, OSError):
+                    pass
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        self._result = np.array(self._psi)
+        del self._psi
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,313 @@
+import time
+import warnings
+
+import numpy as np
+
+from src import instrument
+from src.ensemble import available_memory
+from src.evolve import SplitOperatorPropagator
+from src.grid import Grid, complex_dtype, next_fast_size, real_dtype
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+
+# Bytes per point held by a SplitOperatorPropagator run: psi, the FFT
+# temporary, the potential phase and both kinetic phases (complex), plus
+# V and |k|^2 (real)
+COMPLEX_ARRAYS = 5
+REAL_ARRAYS = 2
+
+
+class Plan:
+    """
+    Grid and time step chosen by plan_grid(), with the evidence for them.
+
+    mins, maxs, shape and dt describe the run; grid() builds it, cube()
+    gives (xmin, xmax, N) for initialize_system, which wants the same
+    range and size on every axis, and params() the grid/dt entries of a
+    src.batch run table. memory (bytes) and seconds estimate the cost of
+    the full run; checks holds the measured convergence errors, and
+    converged is False when they still exceed the tolerance.
+    """
+
+    def __init__(self, mins, maxs, shape, dt, n_steps, total_time, k_max, energy_range,
+                 dtype, checks, memory, seconds, converged=True):
+        self.mins = mins
+        self.maxs = maxs
+        self.shape = shape
+        self.dt = dt
+        self.n_steps = n_steps
+        self.total_time = total_time
+        self.k_max = k_max
+        self.energy_range = energy_range
+        self.dtype = np.dtype(dtype)
+        self.checks = checks
+        self.memory = memory
+        self.seconds = seconds
+        self.converged = converged
+
+    def grid(self):
+        return Grid.uniform(self.mins, self.maxs, self.shape, dtype=real_dtype(self.dtype))
+
+    def cube(self):
+        # One range covering every axis and one N fine enough for all of them
+        xmin, xmax = min(self.mins), max(self.maxs)
+        dx = min((hi - lo) / n for lo, hi, n in zip(self.mins, self.maxs, self.shape))
+        return xmin, xmax, next_fast_size(int(np.ceil((xmax - xmin) / dx)))
+
+    def params(self):
+        return {
+            "grid": {"mins": list(self.mins), "maxs": list(self.maxs), "shape": list(self.shape)},
+            "dt": self.dt,
+            "total_time": self.total_time,
+            "dtype": self.dtype.name,
+        }
+
+    def __str__(self):
+        lines = [f"grid  {' x '.join(map(str, self.shape))} on "
+                 + ", ".join(f"[{lo:.4g}, {hi:.4g})" for lo, hi in zip(self.mins, self.maxs)),
+                 f"dt    {self.dt:.4g} ({self.n_steps} steps to t = {self.total_time:.4g})",
+                 f"cost  {self.memory / 2**20:.1f} MiB, ~{self.seconds:.3g} s"]
+        for name, value in self.checks.items():
+            lines.append(f"check {name} = {value:.3g}")
+        if not self.converged:
+            lines.append("check not converged to the requested tolerance")
+        return "\n".join(lines)
+
+
+def _evaluator(potential):
+    # grid -> V for a potential_library Potential, a callable(coords) or a
+    # dict of potential_function keyword arguments
+    if potential is None:
+        return lambda grid: np.zeros(grid.shape)
+    if isinstance(potential, dict):
+        return lambda grid: potential_function(grid, **potential)
+    if hasattr(potential, "evaluate"):
+        return lambda grid: potential.evaluate(grid)
+    return lambda grid: np.broadcast_to(potential(grid.coords), grid.shape)
+
+
+def _probe(box, ndim, points):
+    n = points or min(1024, int(round(2**21 ** (1.0 / ndim))))
+    return Grid.uniform([lo for lo, _ in box], [hi for _, hi in box], [n] * ndim)
+
+
+def _edges(line, x, center, energy, decay, lo, hi, hbar, m):
+    # Walk outwards from center accumulating the WKB decay exponent
+    # int kappa dx, kappa = sqrt(2m (V - E)) / hbar over the forbidden parts;
+    # the box ends where the amplitude has fallen below tol (exponent
+    # `decay`), or at the probed limits lo/hi
+    kappa = np.sqrt(2.0 * m * np.maximum(line - energy, 0.0)) / hbar
+    dx = x[1] - x[0]
+    i0 = int(np.clip(np.searchsorted(x, center), 0, len(x) - 1))
+    edges = []
+    for idx, limit in ((np.arange(i0, -1, -1), lo), (np.arange(i0, len(x)), hi)):
+        exponent = np.cumsum(kappa[idx]) * dx
+        beyond = np.flatnonzero(exponent > decay)
+        edges.append(float(x[idx[beyond[0]]]) if len(beyond) else limit)
+    return max(edges[0], lo), min(edges[1], hi)
+
+
+def _difference(psi_a, psi_b, dV_a, dV_b):
+    # L2 distance between two states on grids of one box but different
+    # sizes: their Fourier coefficients share the coarse grid's k values,
+    # so the coarse one is zero-padded in k (exact band-limited interpolation)
+    ka = np.fft.fftn(psi_a) * np.sqrt(dV_a / psi_a.size)
+    kb = np.fft.fftn(psi_b) * np.sqrt(dV_b / psi_b.size)
+    if ka.shape != kb.shape:
+        small, large = (ka, kb) if ka.size < kb.size else (kb, ka)
+        padded = np.zeros_like(large)
+        index = tuple(np.r_[0:(n + 1) // 2, N - n // 2:N] for n, N in zip(small.shape, large.shape))
+        padded[np.ix_(*index)] = small
+        ka, kb = padded, large
+    return float(np.sqrt(np.sum(np.abs(ka - kb)**2)))
+
+
+def _memory(shape, dtype):
+    itemsize = np.dtype(complex_dtype(dtype)).itemsize
+    return int(np.prod(shape)) * (COMPLEX_ARRAYS * itemsize + REAL_ARRAYS * itemsize // 2)
+
+
+def _run(grid, r0, sigma, k0, evaluate, dt, n_steps, hbar, m, dtype, fft_backend):
+    psi = gaussian_wavepacket(grid, r0, sigma, k0).astype(dtype)
+    propagator = SplitOperatorPropagator(psi, evaluate(grid), dt, grid, hbar=hbar, m=m,
+                                         fft_backend=fft_backend)
+    start = time.perf_counter()
+    propagator.run(n_steps)
+    return propagator.psi, (time.perf_counter() - start) / n_steps
+
+
+@instrument.timed("plan_grid")
+def plan_grid(r0, sigma, k0, potential=None, total_time=1.0, hbar=1.0, m=1.0, tol=1e-6,
+              domain=None, dtype=np.complex128, check=True, check_steps=20, check_work=1e7, refinements=2,
+              probe_points=None, fft_backend=None):
+    """
+    Smallest FFT-friendly grid and largest time step for propagating the
+    Gaussian packet of initialize_system / gaussian_wavepacket (centre r0,
+    width sigma, mean wave vector k0, one value or one per axis) in
+    `potential` up to total_time with an error around tol.
+
+    potential is a potential_library Potential, a callable(coords) or a
+    dict of potential_function keywords ({'potential_type': 'harmonic',
+    'omega': 2.0}); None is free space.
+
+    - Momentum: the packet's amplitude falls to tol at
+      |k - k0| = sqrt(2 ln(1/tol)) / sigma; falling from the packet's
+      potential energy to the lowest V in the box adds kinetic energy.
+      dx = pi / k_max per axis.
+    - Box: where the packet can get to in total_time at that momentum,
+      cut where the WKB amplitude in classically forbidden regions has
+      decayed below tol (a confining or reflecting V ends the box, a thin
+      barrier does not). Without any potential, the free packet's own
+      path and spreading. domain=(mins, maxs) caps it. V is probed on a
+      uniform grid of probe_points per axis over the candidate box.
+    - dt: no more than pi hbar / (energy range), beyond which phases
+      alias, then set by the check below. Split-operator steps are unitary,
+      so any dt is stable; dt only controls the O(dt^2) error.
+
+    With check=True the plan is propagated with dt and dt/2, and with dt/2
+    on a grid about 1.5x finer over the same box, for the whole run or,
+    on large grids, for as many steps as check_work point-steps allow (at
+    least check_steps). The Richardson estimate (4/3 of the dt vs dt/2
+    difference) is scaled to total_time (the error grows about linearly)
+    and dt shrunk and re-checked until it meets tol; if the finer grid
+    differs by more than tol the grid is refined, up to `refinements`
+    times. A plan still above tol warns (RuntimeWarning) and has
+    converged=False. A shortened check
+    only sees the start of the dynamics, so later stages (a barrier hit
+    later) are covered by the a-priori estimates alone. The step time of
+    the check gives the wall time estimate. The check is skipped (checks
+    left empty) when it would not fit in the available memory.
+    """
+    ndim = len(r0)
+    r0 = np.asarray(r0, dtype=np.float64)
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=np.float64), (ndim,))
+    k0 = np.asarray(k0, dtype=np.float64)
+    evaluate = _evaluator(potential)
+    decay = np.log(1.0 / tol)
+    n_sig = np.sqrt(2.0 * decay)
+
+    # Free flight: path of the centre plus spreading, and momentum content
+    k_packet = np.abs(k0) + n_sig / sigma
+    v0 = hbar * k0 / m
+    width = n_sig * sigma * np.sqrt(1.0 + (hbar * total_time / (m * sigma**2))**2)
+    free = [(min(r, r + v * total_time) - w, max(r, r + v * total_time) + w)
+            for r, v, w in zip(r0, v0, width)]
+
+    def cap(box):
+        if domain is None:
+            return box
+        return [(max(lo, dlo), min(hi, dhi)) for (lo, hi), dlo, dhi in zip(box, domain[0], domain[1])]
+
+    box = cap(free)
+    k_max = k_packet.copy()
+    energy = float(np.sum(hbar**2 * k_packet**2 / (2.0 * m)))
+    v_min = 0.0
+    probe = _probe(box, ndim, probe_points)
+    V = np.asarray(evaluate(probe), dtype=np.float64)
+    if np.ptp(V) > 0.0:
+        # Grow the box to the reach at the momentum the packet can pick up
+        # in it (a lower V_min means more), then cut it with the WKB decay
+        # Highest energy in the packet: its potential energy within 2 sigma
+        # plus the kinetic energy of its momentum tail
+        local = np.asarray(evaluate(Grid.uniform(r0 - 2.0 * sigma, r0 + 2.0 * sigma, [17] * ndim)))
+        v_packet = float(local.max())
+        energy = v_packet + float(np.sum(hbar**2 * k_packet**2 / (2.0 * m)))
+        for _ in range(4):
+            v_min = min(float(V.min()), float(local.min()))
+            gain = 2.0 * m * max(v_packet - v_min, 0.0) / hbar**2
+            k_max = np.sqrt(k_packet**2 + gain)
+            reach = hbar * k_max * total_time / m + n_sig * sigma
+            new = cap([(r - d, r + d) for r, d in zip(r0, reach)])
+            if all(lo >= blo - 1e-9 * abs(blo) and hi <= bhi + 1e-9 * abs(bhi)
+                   for (lo, hi), (blo, bhi) in zip(new, box)):
+                break
+            box = new
+            probe = _probe(box, ndim, probe_points)
+            V = np.asarray(evaluate(probe), dtype=np.float64)
+
+        edges = []
+        for axis in range(ndim):
+            others = tuple(i for i in range(ndim) if i != axis)
+            line = V.min(axis=others) if others else V
+            x = np.asarray(probe.axes[axis], dtype=np.float64)
+            edges.append(_edges(line, x, r0[axis], energy, decay, *box[axis], hbar, m))
+            # Features of V scatter into wave numbers up to where its
+            # spectrum falls below tol; sharp edges are capped at 2 k_max
+            # and left to the convergence check. The window hides the jump
+            # between the probe's ends.
+            profile = V.max(axis=others) if others else V
+            features = np.abs(np.fft.rfft((profile - profile.mean()) * np.hanning(len(x))))[1:]
+            if features.max() > 0.0:
+                k = 2.0 * np.pi * np.fft.rfftfreq(len(x), d=x[1] - x[0])[1:]
+                k_feature = k[np.flatnonzero(features > tol * features.max())[-1]]
+                k_max[axis] = max(k_max[axis], min(k_feature, 2.0 * k_max[axis]))
+        box = edges
+
+    mins = [lo for lo, _ in box]
+    maxs = [hi for _, hi in box]
+    shape = [next_fast_size(int(np.ceil((hi - lo) * k / np.pi))) for (lo, hi), k in zip(box, k_max)]
+    energy_range = max(energy - v_min, float(np.sum(hbar**2 * k_max**2 / (2.0 * m))))
+    dt = min(total_time, np.pi * hbar / energy_range)
+
+    checks = {}
+    converged = True
+    step_seconds = None
+    available = available_memory()
+    if check and available is not None and 6 * _memory(shape, dtype) > available:
+        # The finer grid alone is ~3.4x the plan in 3D: too big to check
+        check = False
+    if check:
+        with instrument.phase("plan_check"):
+            for attempt in range(refinements + 1):
+                grid = Grid.uniform(mins, maxs, shape, dtype=real_dtype(dtype))
+                steps = max(check_steps, int(check_work // np.prod(shape)))
+                steps = max(1, min(steps, int(np.ceil(total_time / dt))))
+                args = (r0, sigma, k0, evaluate)
+                psi, step_seconds = _run(grid, *args, dt, steps, hbar, m, dtype, fft_backend)
+                half, _ = _run(grid, *args, 0.5 * dt, 2 * steps, hbar, m, dtype, fft_backend)
+                fine_shape = [next_fast_size(int(np.ceil(1.5 * n))) for n in shape]
+                fine_grid = Grid.uniform(mins, maxs, fine_shape, dtype=real_dtype(dtype))
+                fine, _ = _run(fine_grid, *args, 0.5 * dt, 2 * steps, hbar, m, dtype, fft_backend)
+
+                checked = steps * dt
+                time_error = 4.0 / 3.0 * _difference(psi, half, grid.dV, grid.dV)
+                checks["grid_error"] = _difference(half, fine, grid.dV, fine_grid.dV)
+                checks["time_error"] = time_error * total_time / checked
+                checks["checked_time"] = checked
+                if checks["grid_error"] <= tol or attempt == refinements:
+                    break
+                shape = fine_shape
+            for _ in range(3):
+                if checks["time_error"] <= tol:
+                    break
+                # error ~ dt^2: shrink with a little safety margin, then
+                # measure again at the new dt
+                dt *= 0.9 * np.sqrt(tol / checks["time_error"])
+                steps = max(1, int(checked / dt))
+                psi, step_seconds = _run(grid, *args, dt, steps, hbar, m, dtype, fft_backend)
+                half, _ = _run(grid, *args, 0.5 * dt, 2 * steps, hbar, m, dtype, fft_backend)
+                checked = steps * dt
+                time_error = 4.0 / 3.0 * _difference(psi, half, grid.dV, grid.dV)
+                checks["time_error"] = time_error * total_time / checked
+                checks["checked_time"] = checked
+        converged = checks["grid_error"] <= tol and checks["time_error"] <= tol
+        if not converged:
+            warnings.warn(
+                f"Plan not converged to tol={tol:.1e}: grid error {checks['grid_error']:.2e}, "
+                f"time error {checks['time_error']:.2e} (raise refinements or tol)",
+                RuntimeWarning,
+            )
+
+    n_steps = max(1, int(np.ceil(total_time / dt - 1e-9)))
+    dt = total_time / n_steps
+    n_points = int(np.prod(shape))
+    memory = _memory(shape, dtype)
+    if step_seconds is None:
+        # Time a few steps on a small grid and scale by N log N
+        small = [min(n, 32) for n in shape]
+        grid = Grid.uniform(mins, maxs, small, dtype=real_dtype(dtype))
+        _, step_seconds = _run(grid, r0, sigma, k0, evaluate, dt, 3, hbar, m, dtype, fft_backend)
+        ratio = n_points / np.prod(small)
+        step_seconds *= ratio * np.log2(max(n_points, 2)) / np.log2(max(np.prod(small), 2))
+    return Plan(mins, maxs, tuple(shape), dt, n_steps, total_time, k_max, energy_range,
+                complex_dtype(dtype), checks, memory, step_seconds * n_steps, converged)
@@ -1,30 +1,44 @@
 import numpy as np
 
-def potential_function(X, Y, Z, potential_type='free', V0=0.0, a=1.0, m=1.0, omega=1.0):
+from src import instrument
+from src.grid import grid_coords
+from src.potential_library import Ball, Box, Constant, Harmonic, double_slit
+
+@instrument.timed("potential_function")
+def potential_function(X, Y=None, Z=None, potential_type='free', V0=0.0, a=1.0, m=1.0, omega=1.0,
+                       dtype=np.float64):
+
+    # X, Y, Z may be dense meshes, broadcastable sparse views, or a Grid
+    # passed as X; the result always has the full broadcast shape.
+    # 1D and 2D problems leave Z (and Y) as None or pass a 1D/2D Grid.
+    # Each type is a primitive of src.potential_library, which also offers
+    # composition and caching.
+    coords = grid_coords(X, Y, Z)
 
     if potential_type == 'free':
         # V(r) = 0
-        return np.zeros_like(X)
+        potential = Constant(0.0)
 
     elif potential_type == 'harmonic':
-        # 3D harmonic oscillator: V(r) = 0.5 * m * omega^2 * (x^2 + y^2 + z^2)
-        return 0.5 * m * omega**2 * (X**2 + Y**2 + Z**2)
+        # Harmonic oscillator: V(r) = 0.5 * m * omega^2 * (x^2 + y^2 + z^2)
+        potential = Harmonic(omega=omega, m=m)
 
     elif potential_type == 'barrier':
-        # 3D "box" barrier: V0 for |x| < a AND |y| < a AND |z| < a
-        V = np.zeros_like(X)
-        mask = (abs(X) < a) & (abs(Y) < a) & (abs(Z) < a)
-        V[mask] = V0
-        return V
+        # "Box" barrier: V0 for |x| < a AND |y| < a AND |z| < a
+        potential = Box(a) * V0
 
     elif potential_type == 'sphere':
         # Spherical barrier: radius = a
         # V0 inside sphere, 0 outside (or vice versa)
-        V = np.zeros_like(X)
-        r2 = X**2 + Y**2 + Z**2
-        V[r2 < a**2] = V0
-        return V
+        potential = Ball(a) * V0
 
     else:
         raise ValueError(f"Unknown potential type: {potential_type}")
 
+    return potential.evaluate(coords, dtype=dtype)
+
+
+def double_slit_3d(X, Y, Z, V0):
+    # Wall of thickness 0.5 across x with two slits along y (half width
+    # 0.2, 1.5 apart), uniform in z
+    return double_slit(V0).evaluate(grid_coords(X, Y, Z))
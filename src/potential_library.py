@@ -0,0 +1,377 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from src import instrument
+from src.grid import axis_values, grid_coords
+
+# Chunks are sized so that one chunk of the output plus a few same-size
+# temporaries stays within this many bytes.
+CHUNK_BYTES = 64 * 2**20
+
+
+# --- Regions: boolean masks, combined with &, | and ~ ---
+
+class Region:
+    # Subclasses implement _mask(coords) -> bool array broadcastable to the
+    # coords' shape, and key() -> a hashable, repr-stable tuple.
+
+    def __and__(self, other):
+        return Intersection(self, other)
+
+    def __or__(self, other):
+        return Union(self, other)
+
+    def __invert__(self):
+        return Complement(self)
+
+    def __mul__(self, value):
+        # region * V0: V0 inside the region, 0 outside
+        return Filled(self, value)
+
+    __rmul__ = __mul__
+
+    def mask(self, grid, chunk_bytes=CHUNK_BYTES):
+        coords = _coords(grid)
+        out = np.empty(_shape(coords), dtype=bool)
+        for sl, chunk in _chunks(coords, out.itemsize, chunk_bytes):
+            out[sl] = self._mask(chunk)
+        return out
+
+
+class Box(Region):
+    # |r_i - center_i| < half_width_i on every axis (scalars broadcast)
+
+    def __init__(self, half_width, center=0.0):
+        self.half_width = half_width
+        self.center = center
+
+    def key(self):
+        return ('box', _freeze(self.half_width), _freeze(self.center))
+
+    def _mask(self, coords):
+        n = len(coords)
+        hw = np.broadcast_to(self.half_width, (n,))
+        c0 = np.broadcast_to(self.center, (n,))
+        mask = True
+        for c, h, x0 in zip(coords, hw, c0):
+            mask = mask & (abs(c - x0) < h)
+        return mask
+
+
+class Ball(Region):
+    # |r - center| < radius
+
+    def __init__(self, radius, center=0.0):
+        self.radius = radius
+        self.center = center
+
+    def key(self):
+        return ('ball', float(self.radius), _freeze(self.center))
+
+    def _mask(self, coords):
+        c0 = np.broadcast_to(self.center, (len(coords),))
+        return sum((c - x0)**2 for c, x0 in zip(coords, c0)) < self.radius**2
+
+
+class Slab(Region):
+    # lo < r_axis < hi, unbounded along the other axes
+
+    def __init__(self, axis, lo, hi):
+        self.axis = axis
+        self.lo = lo
+        self.hi = hi
+
+    def key(self):
+        return ('slab', self.axis, float(self.lo), float(self.hi))
+
+    def _mask(self, coords):
+        c = coords[self.axis]
+        return (c > self.lo) & (c < self.hi)
+
+
+class Intersection(Region):
+    def __init__(self, *regions):
+        self.regions = regions
+
+    def key(self):
+        return ('and',) + tuple(r.key() for r in self.regions)
+
+    def _mask(self, coords):
+        mask = True
+        for region in self.regions:
+            mask = mask & region._mask(coords)
+        return mask
+
+
+class Union(Region):
+    def __init__(self, *regions):
+        self.regions = regions
+
+    def key(self):
+        return ('or',) + tuple(r.key() for r in self.regions)
+
+    def _mask(self, coords):
+        mask = False
+        for region in self.regions:
+            mask = mask | region._mask(coords)
+        return mask
+
+
+class Complement(Region):
+    def __init__(self, region):
+        self.region = region
+
+    def key(self):
+        return ('not', self.region.key())
+
+    def _mask(self, coords):
+        return ~np.asarray(self.region._mask(coords))
+
+
+def slits(thickness, centers, half_width, axis=0, slit_axis=1):
+    # A wall |r_axis| < thickness/2 with openings of the given half width
+    # around each center along slit_axis
+    openings = Union(*(Slab(slit_axis, c - half_width, c + half_width) for c in centers))
+    return Slab(axis, -0.5 * thickness, 0.5 * thickness) & ~openings
+
+
+# --- Potentials: real arrays, combined with +, scalar * and .where() ---
+
+class Potential:
+    # Subclasses implement _eval(coords) -> array broadcastable to the
+    # coords' shape, and key().
+
+    def __add__(self, other):
+        return Sum(self, other)
+
+    def __mul__(self, scale):
+        return Scaled(self, scale)
+
+    __rmul__ = __mul__
+
+    def where(self, region):
+        # This potential inside region, 0 outside
+        return Masked(self, region)
+
+    @instrument.timed("potential_evaluate")
+    def evaluate(self, grid, dtype=np.float64, chunk_bytes=CHUNK_BYTES, cache=None):
+        """
+        The potential on a Grid (or a tuple of dense/sparse coordinate
+        arrays) as a full array, computed chunk by chunk along the first
+        axis so temporaries stay within chunk_bytes. Separable terms are
+        broadcast from their 1D pieces inside each chunk.
+
+        With a PotentialCache the result is looked up by (potential, grid,
+        dtype) first and stored afterwards; cached arrays are read-only.
+        """
+        coords = _coords(grid)
+        if cache is not None:
+            return cache.get_or_build(self, coords, dtype, chunk_bytes)
+        out = np.empty(_shape(coords), dtype=dtype)
+        for sl, chunk in _chunks(coords, out.itemsize, chunk_bytes):
+            out[sl] = self._eval(chunk)
+        return out
+
+    __call__ = evaluate
+
+
+class Constant(Potential):
+    def __init__(self, value):
+        self.value = value
+
+    def key(self):
+        return ('const', float(self.value))
+
+    def _eval(self, coords):
+        return self.value
+
+
+class Harmonic(Potential):
+    # 0.5 m sum_i omega_i^2 (r_i - center_i)^2, separable
+
+    def __init__(self, omega=1.0, m=1.0, center=0.0):
+        self.omega = omega
+        self.m = m
+        self.center = center
+
+    def key(self):
+        return ('harmonic', _freeze(self.omega), float(self.m), _freeze(self.center))
+
+    def _eval(self, coords):
+        n = len(coords)
+        omega = np.broadcast_to(self.omega, (n,))
+        c0 = np.broadcast_to(self.center, (n,))
+        # Sum of 1D terms: only the final additions are full size
+        return sum((0.5 * self.m * w**2) * (c - x0)**2 for c, w, x0 in zip(coords, omega, c0))
+
+
+class Filled(Potential):
+    # value inside region, 0 outside
+
+    def __init__(self, region, value):
+        self.region = region
+        self.value = value
+
+    def key(self):
+        return ('filled', self.region.key(), float(self.value))
+
+    def _eval(self, coords):
+        return np.where(self.region._mask(coords), self.value, 0.0)
+
+
+class Sum(Potential):
+    def __init__(self, *terms):
+        self.terms = terms
+
+    def key(self):
+        return ('sum',) + tuple(t.key() for t in self.terms)
+
+    def _eval(self, coords):
+        return sum(t._eval(coords) for t in self.terms)
+
+
+class Scaled(Potential):
+    def __init__(self, potential, scale):
+        self.potential = potential
+        self.scale = scale
+
+    def key(self):
+        return ('scaled', self.potential.key(), float(self.scale))
+
+    def _eval(self, coords):
+        return self.scale * self.potential._eval(coords)
+
+
+class Masked(Potential):
+    def __init__(self, potential, region):
+        self.potential = potential
+        self.region = region
+
+    def key(self):
+        return ('masked', self.potential.key(), self.region.key())
+
+    def _eval(self, coords):
+        return np.where(self.region._mask(coords), self.potential._eval(coords), 0.0)
+
+
+class Custom(Potential):
+    # func(coords) -> array; `key` must identify func and its parameters
+    # for caching (e.g. 'gaussian_well/V0=3/w=0.5')
+
+    def __init__(self, func, key=None):
+        self.func = func
+        self._key = key
+
+    def key(self):
+        if self._key is None:
+            raise ValueError("Custom potentials need a key to be cached")
+        return ('custom', self._key)
+
+    def _eval(self, coords):
+        return self.func(coords)
+
+
+def double_slit(V0, thickness=0.5, separation=1.5, half_width=0.2):
+    # V0 on a wall across x with two slits along y, as in the double-slit example
+    centers = (-0.5 * separation, 0.5 * separation)
+    return slits(thickness, centers, half_width) * V0
+
+
+# --- Evaluation helpers ---
+
+def _coords(grid):
+    # A Grid or a tuple of coordinate arrays (any dimension)
+    return tuple(grid) if isinstance(grid, (tuple, list)) else grid_coords(grid)
+
+
+def _shape(coords):
+    return np.broadcast_shapes(*(np.shape(c) for c in coords))
+
+
+def _chunks(coords, itemsize, chunk_bytes):
+    # (output slice, coords restricted to it) along the first axis; a few
+    # temporaries of the chunk's size are alive during evaluation
+    shape = _shape(coords)
+    plane = int(np.prod(shape[1:])) * max(itemsize, 8) * 4
+    step = max(1, chunk_bytes // max(plane, 1))
+    for start in range(0, shape[0], step):
+        sl = slice(start, min(start + step, shape[0]))
+        yield sl, tuple(c[sl] if np.shape(c)[0] > 1 else c for c in coords)
+
+
+def _freeze(value):
+    # Hashable, repr-stable form of a scalar or per-axis parameter
+    value = np.asarray(value, dtype=np.float64)
+    return float(value) if value.ndim == 0 else tuple(value.tolist())
+
+
+def grid_key(coords):
+    # (size, first point, spacing) per axis
+    key = []
+    for axis, c in enumerate(coords):
+        ax = axis_values(c, axis)
+        key.append((len(ax), float(ax[0]), float(ax[1] - ax[0]) if len(ax) > 1 else 0.0))
+    return tuple(key)
+
+
+class PotentialCache:
+    """
+    LRU cache of evaluated potentials keyed by (potential.key(), grid,
+    dtype), optionally backed by a directory of .npy files so repeated
+    setups (sweeps, restarts, other processes) load instead of recompute.
+    maxsize counts arrays held in memory; files on disk are kept until
+    clear(disk=True).
+    """
+
+    def __init__(self, maxsize=8, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._arrays = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def _digest(self, potential, coords, dtype):
+        key = repr((potential.key(), grid_key(coords), np.dtype(dtype).str))
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get_or_build(self, potential, coords, dtype=np.float64, chunk_bytes=CHUNK_BYTES):
+        digest = self._digest(potential, coords, dtype)
+        V = self._arrays.get(digest)
+        if V is not None:
+            self._arrays.move_to_end(digest)
+            self.hits += 1
+            return V
+
+        path = os.path.join(self.directory, digest + ".npy") if self.directory else None
+        if path is not None and os.path.exists(path):
+            V = np.load(path)
+            self.hits += 1
+        else:
+            V = potential.evaluate(coords, dtype=dtype, chunk_bytes=chunk_bytes)
+            self.misses += 1
+            if path is not None:
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, V)
+                os.replace(tmp, path)
+
+        V.flags.writeable = False
+        self._arrays[digest] = V
+        while len(self._arrays) > self.maxsize:
+            self._arrays.popitem(last=False)
+        return V
+
+    def clear(self, disk=False):
+        self._arrays.clear()
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,230 @@
+import glob
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src import instrument
+from src.grid import grid_axes
+
+FRAME_PATTERN = "frame_{:05d}.png"
+
+
+def density_slice(psi, z_index=None):
+    # |psi|^2 on the z_index plane of a 3D psi (central by default); 2D psi
+    # is used whole. Only the slice is squared and copied.
+    if psi.ndim == 2:
+        return np.abs(psi)**2
+    if z_index is None:
+        z_index = psi.shape[2] // 2
+    return np.abs(psi[:, :, z_index])**2
+
+
+def potential_slice(V, z_index=None):
+    # The z_index plane of a 3D potential as a copy (None passes through)
+    if V is None or np.ndim(V) == 2:
+        return V
+    if z_index is None:
+        z_index = V.shape[2] // 2
+    return np.array(V[:, :, z_index])
+
+
+def _axes(x, y):
+    # 1D x and y axes from a Grid, coordinate arrays or 1D axes
+    if np.ndim(x) == 1:
+        return np.asarray(x), np.asarray(y)
+    return grid_axes(x, y)
+
+
+class FrameRenderer:
+    """
+    Draws |psi|^2 slices to images with one figure reused for every frame.
+
+    The figure, image, colorbar and potential contours are built once with
+    the Agg canvas (no pyplot, so no figure registry to leak into); each
+    frame only swaps the image data, colour limits and title through
+    set_data/set_clim/set_text before redrawing. vmax fixes the colour
+    scale across frames (needed for animations); None rescales per frame.
+    """
+
+    def __init__(self, x, y, potential=None, vmax=None, cmap='viridis', dpi=100,
+                 figsize=(6, 5), title="|psi|^2 at step {step}"):
+        x, y = _axes(x, y)
+        self.vmax = vmax
+        self.title_format = title
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot()
+        self.image = ax.imshow(np.zeros((len(y), len(x))), origin='lower',
+                               extent=[x[0], x[-1], y[0], y[-1]],
+                               cmap=cmap, aspect='equal', vmin=0.0, vmax=1.0)
+        self.figure.colorbar(self.image, ax=ax, label='|psi|^2')
+        if potential is not None:
+            V_min, V_max = np.min(potential), np.max(potential)
+            if V_max > 1e-10:
+                levels = np.linspace(V_min, V_max, 5)
+                ax.contour(x, y, np.asarray(potential).T, levels=levels, colors='red', alpha=0.5)
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        self.title = ax.set_title("")
+
+    def draw(self, density, step):
+        density = np.asarray(density)
+        vmax = self.vmax if self.vmax is not None else max(float(density.max()), 1e-300)
+        self.image.set_data(density.T)
+        self.image.set_clim(0.0, vmax)
+        self.title.set_text(self.title_format.format(step=step))
+        self.canvas.draw()
+
+    def render(self, density, step):
+        # The frame as an (height, width, 4) uint8 RGBA array
+        self.draw(density, step)
+        return np.array(self.canvas.buffer_rgba())
+
+    def save(self, density, step, path):
+        self.draw(density, step)
+        self.figure.savefig(path)
+        return path
+
+
+# One renderer per pool process, built by the initializer
+_renderer = None
+
+
+def _init_worker(args, kwargs):
+    global _renderer
+    _renderer = FrameRenderer(*args, **kwargs)
+
+
+def _save_frame(density, step, path):
+    return _renderer.save(density, step, path)
+
+
+class FrameRecorder:
+    """
+    Observer writing a PNG sequence of |psi|^2 slices while a propagator
+    runs, without holding up the time loop.
+
+    Every `every` steps the propagator's position-space array is reduced to
+    the density on one plane (density_slice; the same Strang-midpoint array
+    ObservableRecorder uses), and only that 2D slice is sent to a pool of
+    `workers` processes, each drawing with its own FrameRenderer. At most
+    max_pending frames are in flight; beyond that the loop waits for the
+    oldest, which bounds memory if rendering falls behind. workers=0 draws
+    in the calling process instead.
+
+    Frames are numbered consecutively (frame_00000.png, ...) so they can be
+    encoded with encode_video(); call close() (or use a with block) to wait
+    for the pool. `paths` lists the frames written so far.
+    """
+
+    def __init__(self, directory, x, y, every=10, z_index=None, potential=None, workers=2,
+                 max_pending=None, **renderer_options):
+        self.directory = directory
+        self.every = every
+        self.z_index = z_index
+        self.paths = []
+        self.steps = []
+        self.max_pending = max_pending or 4 * max(workers, 1)
+        self._pending = []
+        self._density = None
+        os.makedirs(directory, exist_ok=True)
+
+        args = _axes(x, y) + (potential_slice(potential, z_index),)
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(args, renderer_options))
+            self._renderer = None
+        else:
+            self._pool = None
+            self._renderer = FrameRenderer(*args, **renderer_options)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def due(self, step):
+        return step % self.every == 0
+
+    def sample_position(self, propagator, psi):
+        self._density = density_slice(psi, self.z_index)
+
+    def sample_momentum(self, propagator, psi_k):
+        # step_count is only final here, once the step is closed
+        self.add(self._density, propagator.step_count)
+        self._density = None
+
+    def add(self, density, step):
+        # Queue one frame from a 2D density; returns its path
+        path = os.path.join(self.directory, FRAME_PATTERN.format(len(self.paths)))
+        self.paths.append(path)
+        self.steps.append(step)
+        with instrument.phase("render_submit"):
+            if self._pool is None:
+                self._renderer.save(density, step, path)
+                return path
+            while len(self._pending) >= self.max_pending:
+                self._pending.pop(0).result()
+            self._pending.append(self._pool.submit(_save_frame, np.ascontiguousarray(density), step, path))
+        return path
+
+    def wait(self):
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def close(self):
+        if self._pool is not None:
+            try:
+                self.wait()
+            finally:
+                self._pool.shutdown()
+                self._pool = None
+        return self.paths
+
+
+def render_frames(densities, directory, x, y, steps=None, workers=2, **options):
+    # Render a sequence of 2D densities (e.g. slices of saved snapshots) as
+    # a PNG sequence in parallel; returns the frame paths
+    with FrameRecorder(directory, x, y, workers=workers, **options) as recorder:
+        for i, density in enumerate(densities):
+            recorder.add(density, i if steps is None else steps[i])
+    return recorder.paths
+
+
+def encode_video(directory, output, fps=25):
+    """
+    Encode the frame_*.png sequence in directory as a video (mp4, gif, ...
+    as the extension of output allows). Uses ffmpeg if it is on the PATH,
+    else imageio if installed; raises RuntimeError with neither or when
+    ffmpeg fails (e.g. a missing codec), with its error output.
+    """
+    pattern = os.path.join(directory, FRAME_PATTERN.replace("{:05d}", "%05d"))
+    ffmpeg = shutil.which("ffmpeg")
+    with instrument.phase("encode_video"):
+        if ffmpeg is not None:
+            command = [ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps), "-i", pattern]
+            if not output.endswith(".gif"):
+                # even frame size and a widely playable pixel format
+                command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+            try:
+                subprocess.run(command + [output], check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as error:
+                raise RuntimeError(f"ffmpeg failed: {error.stderr.strip() or error}") from error
+            except OSError as error:
+                raise RuntimeError(f"Could not run ffmpeg: {error}") from error
+            return output
+        try:
+            import imageio.v2 as imageio
+        except ImportError:
+            raise RuntimeError("Encoding a video needs ffmpeg on the PATH or the imageio package")
+        with imageio.get_writer(output, fps=fps) as writer:
+            for path in sorted(glob.glob(os.path.join(directory, "frame_*.png"))):
+                writer.append_data(imageio.imread(path))
+    return output
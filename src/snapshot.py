@@ -0,0 +1,267 @@
+import itertools
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from src.grid import Grid
+
+MAGIC = b"SOFTSNP1"
+PRECISIONS = ("float32", "float16", "quantized")
+_PREFIX = struct.Struct("<8sQ")  # magic, header offset
+
+
+# --- Encoding of one block ---
+
+def _encode(block, precision, error_bound):
+    # (bytes, storage dtype, quantization step or None)
+    if precision == "float32":
+        return block.astype(np.complex64).tobytes(), "complex64", None
+    pairs = np.stack([block.real, block.imag], axis=-1)
+    if precision == "float16":
+        return pairs.astype(np.float16).tobytes(), "float16", None
+    # Uniform quantization with step 2*error_bound: rounding moves each
+    # real and imaginary part by at most error_bound
+    step = 2.0 * error_bound * (1.0 - 1e-9)
+    q = np.rint(pairs / step)
+    peak = float(np.max(np.abs(q))) if q.size else 0.0
+    dtype = next(t for t in (np.int8, np.int16, np.int32, np.int64) if peak <= np.iinfo(t).max)
+    return q.astype(dtype).tobytes(), np.dtype(dtype).name, step
+
+
+def _decode(data, shape, storage, step):
+    if storage == "complex64":
+        return np.frombuffer(data, dtype=np.complex64).reshape(shape)
+    pairs = np.frombuffer(data, dtype=storage).reshape(tuple(shape) + (2,))
+    if step is not None:
+        pairs = pairs * step
+    out_dtype = np.complex64 if storage == "float16" else np.complex128
+    out = np.empty(shape, dtype=out_dtype)
+    out.real = pairs[..., 0]
+    out.imag = pairs[..., 1]
+    return out
+
+
+# --- Writing ---
+
+def _boxes(shape, tile):
+    tile = np.broadcast_to(tile, (len(shape),))
+    ranges = [range(0, n, t) for n, t in zip(shape, tile)]
+    for start in itertools.product(*ranges):
+        yield tuple(slice(s, min(s + t, n)) for s, t, n in zip(start, tile, shape))
+
+
+def _bounding_box(psi, threshold):
+    # Per-axis extent of |psi|^2 > threshold, built slab by slab along axis
+    # 0 so only one slab's density is in memory
+    shape = psi.shape
+    hits = [np.zeros(n, dtype=bool) for n in shape]
+    for i in range(shape[0]):
+        mask = np.abs(np.asarray(psi[i]))**2 > threshold
+        if not mask.any():
+            continue
+        hits[0][i] = True
+        for axis in range(1, len(shape)):
+            others = tuple(j for j in range(mask.ndim) if j != axis - 1)
+            hits[axis] |= np.any(mask, axis=others)
+    if not hits[0].any():
+        return None
+    box = []
+    for h in hits:
+        idx = np.flatnonzero(h)
+        box.append(slice(int(idx[0]), int(idx[-1]) + 1))
+    return tuple(box)
+
+
+def save_snapshot(path, psi, dV=1.0, threshold=1e-12, tile=16, precision="float32",
+                  error_bound=None, compress=True, grid=None, metadata=None):
+    """
+    Write the part of psi where |psi|^2 > threshold to a compact snapshot.
+
+    With tile=n (an int or one per axis) psi is cut into tiles and only
+    tiles holding a point above threshold are stored; tile=None stores the
+    single bounding box of those points instead. psi is read one tile (or
+    one axis-0 slab) at a time, so a numpy.memmap (e.g. the file of an
+    OutOfCorePropagator) is never loaded whole.
+
+    precision:
+      'float32'    complex64, ~7 significant digits
+      'float16'    real/imag as float16 pairs, ~3 digits, 4 bytes a point
+      'quantized'  integers with step 2*error_bound: every real and
+                   imaginary part is within error_bound of the original
+    compress=True zlib-compresses each tile (quantized data shrinks most).
+
+    The header records the norm of psi, the norm of the dropped tiles
+    (norm_lost), the norm of what was stored after rounding and the
+    largest rounding error actually made. Returns the header.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    if precision == "quantized" and not error_bound:
+        raise ValueError("precision='quantized' needs an error_bound")
+    shape = tuple(psi.shape)
+    if tile is None:
+        box = _bounding_box(psi, threshold)
+        boxes = [box] if box is not None else []
+    else:
+        boxes = _boxes(shape, tile)
+
+    norm_total = norm_kept = norm_stored = max_error = 0.0
+    tiles = []
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, 0))
+        for box in boxes:
+            block = np.asarray(psi[box], dtype=np.complex128)
+            rho = np.abs(block)**2
+            if tile is not None:
+                norm_total += float(np.sum(rho))
+                if not np.any(rho > threshold):
+                    continue
+            norm_kept += float(np.sum(rho))
+            data, storage, step = _encode(block, precision, error_bound)
+            decoded = _decode(data, block.shape, storage, step)
+            norm_stored += float(np.sum(np.abs(decoded)**2, dtype=np.float64))
+            max_error = max(max_error, float(np.max(np.abs(decoded.real - block.real))),
+                            float(np.max(np.abs(decoded.imag - block.imag))))
+            if compress:
+                data = zlib.compress(data, 6)
+            tiles.append({"start": [s.start for s in box], "shape": list(block.shape),
+                          "offset": f.tell(), "nbytes": len(data), "storage": storage, "step": step})
+            f.write(data)
+
+        if tile is None:
+            # One extra pass for the norm outside the box
+            for i in range(shape[0]):
+                norm_total += float(np.sum(np.abs(np.asarray(psi[i]))**2, dtype=np.float64))
+
+        header = {
+            "shape": list(shape),
+            "precision": precision,
+            "error_bound": error_bound,
+            "compressed": compress,
+            "threshold": threshold,
+            "tile": None if tile is None else np.broadcast_to(tile, (len(shape),)).tolist(),
+            "dV": float(dV),
+            "norm": norm_total * dV,
+            "norm_lost": (norm_total - norm_kept) * dV,
+            "norm_stored": norm_stored * dV,
+            "max_abs_error": max_error,
+            "stored_points": int(sum(np.prod(t["shape"]) for t in tiles)),
+            "tiles": tiles,
+            "metadata": metadata or {},
+        }
+        if grid is not None:
+            header["grid"] = {
+                "mins": [float(ax[0]) for ax in grid.axes],
+                "maxs": [float(ax[0]) + n * d for ax, n, d in zip(grid.axes, grid.shape, grid.spacing)],
+                "shape": list(grid.shape),
+            }
+        offset = f.tell()
+        f.write(json.dumps(header).encode())
+        f.seek(0)
+        f.write(_PREFIX.pack(MAGIC, offset))
+    return header
+
+
+# --- Reading ---
+
+class Snapshot:
+    """
+    Lazy reader for save_snapshot files.
+
+    Only the header is read on opening; the file is memory-mapped and a
+    tile is decoded when something inside it is requested, so
+    snap[10], snap[:, :, 32] or snap.tile(i) touch only the tiles they
+    overlap. Points outside the stored tiles read as 0. load() expands
+    the whole array.
+
+        snap = Snapshot("psi_0100.snp")
+        snap.norm_lost       # probability dropped by the threshold
+        rho = np.abs(snap[:, :, snap.shape[2] // 2])**2
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, offset = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a snapshot file")
+            f.seek(offset)
+            self.header = json.loads(f.read().decode())
+        self.shape = tuple(self.header["shape"])
+        self.ndim = len(self.shape)
+        self.tiles = self.header["tiles"]
+        self.dtype = np.dtype(np.complex128 if self.header["precision"] == "quantized" else np.complex64)
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def __getattr__(self, name):
+        # norm, norm_lost, norm_stored, max_abs_error, threshold, ...
+        header = self.__dict__.get("header", {})
+        if name in header:
+            return header[name]
+        raise AttributeError(name)
+
+    @property
+    def grid(self):
+        g = self.header.get("grid")
+        return Grid.uniform(g["mins"], g["maxs"], g["shape"]) if g else None
+
+    def tile(self, i):
+        # Decoded data of tile i (see self.tiles for its start and shape)
+        t = self.tiles[i]
+        data = self._data[t["offset"]:t["offset"] + t["nbytes"]].tobytes()
+        if self.header["compressed"]:
+            data = zlib.decompress(data)
+        return _decode(data, t["shape"], t["storage"], t["step"])
+
+    def __getitem__(self, index):
+        box, squeeze = self._box(index)
+        out = np.zeros(tuple(s.stop - s.start for s in box), dtype=self.dtype)
+        for i, t in enumerate(self.tiles):
+            src, dst = [], []
+            for s, start, n in zip(box, t["start"], t["shape"]):
+                lo, hi = max(s.start, start), min(s.stop, start + n)
+                if lo >= hi:
+                    break
+                src.append(slice(lo - start, hi - start))
+                dst.append(slice(lo - s.start, hi - s.start))
+            else:
+                out[tuple(dst)] = self.tile(i)[tuple(src)]
+        return out[squeeze]
+
+    def _box(self, index):
+        # Contiguous box of the request plus the view that drops integer axes
+        if not isinstance(index, tuple):
+            index = (index,)
+        if Ellipsis in index:
+            i = index.index(Ellipsis)
+            index = index[:i] + (slice(None),) * (self.ndim - len(index) + 1) + index[i + 1:]
+        index = index + (slice(None),) * (self.ndim - len(index))
+        box, squeeze = [], []
+        for ix, n in zip(index, self.shape):
+            if isinstance(ix, slice):
+                start, stop, stride = ix.indices(n)
+                if stride != 1:
+                    raise IndexError("Snapshot slices must be contiguous")
+                box.append(slice(start, max(start, stop)))
+                squeeze.append(slice(None))
+            else:
+                ix = int(ix) + n if int(ix) < 0 else int(ix)
+                if not 0 <= ix < n:
+                    raise IndexError("Snapshot index out of range")
+                box.append(slice(ix, ix + 1))
+                squeeze.append(0)
+        return tuple(box), tuple(squeeze)
+
+    def load(self):
+        return self[...]
+
+    def close(self):
+        del self._data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
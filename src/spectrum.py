@@ -0,0 +1,226 @@
+import numpy as np
+
+
+class AutocorrelationRecorder:
+    """
+    Streaming autocorrelation C(t) = <psi(0)|psi(t)> for spectral analysis.
+
+    Attach with propagator.add_observer(recorder) before the run. The
+    first sample keeps a copy of the momentum-space state as psi(0); every
+    `every` steps after that C(t) is one dot product with the exact
+    momentum-space state the propagator already has (Parseval: dV/N
+    sum conj(psi0_k) psi_k), so no FFT and no position-space pass is added.
+
+    doubling=True records C(2t) = (psi(t)*|psi(t)) instead, which needs a
+    real psi(0) and a real symmetric H (no absorbing layers or complex
+    potentials): the same run then covers twice the time, halving the
+    energy resolution limit. A psi(0) that is not real (e.g. k0 != 0)
+    raises ValueError at the first sample.
+
+    The energies found are those of the split-operator propagator, i.e.
+    of H up to the O(dt^2) splitting error.
+    """
+
+    def __init__(self, dV=1.0, every=1, doubling=False):
+        self.dV = dV
+        self.every = every
+        self.doubling = doubling
+        self._psi0_k = None
+        self._reverse = None
+        self._t0 = None
+        self._times = []
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def due(self, step):
+        return step % self.every == 0
+
+    def sample_position(self, propagator, psi):
+        pass
+
+    def sample_momentum(self, propagator, psi_k):
+        scale = self.dV / np.prod(psi_k.shape)
+        if self._t0 is None:
+            self._t0 = propagator.time
+            if not self.doubling:
+                self._psi0_k = psi_k.copy()
+            else:
+                # psi(x)^2 summed over x = 1/N sum_k psi_k(k) psi_k(-k)
+                self._reverse = np.ix_(*[(-np.arange(n)) % n for n in psi_k.shape])
+                # Real psi(x) <=> psi_k(-k) = conj(psi_k(k))
+                asymmetry = np.linalg.norm(psi_k - np.conj(psi_k[self._reverse]))
+                if asymmetry > 1e-8 * np.linalg.norm(psi_k):
+                    raise ValueError("doubling=True needs a real psi(0); "
+                                     f"relative imaginary part {asymmetry / np.linalg.norm(psi_k):.1e}")
+        t = propagator.time - self._t0
+        if self.doubling:
+            value = np.sum(psi_k * psi_k[self._reverse]) * scale
+            t = 2.0 * t
+        else:
+            value = np.vdot(self._psi0_k, psi_k) * scale
+        self._times.append(t)
+        self._values.append(complex(value))
+
+    @property
+    def times(self):
+        return np.array(self._times)
+
+    @property
+    def values(self):
+        return np.array(self._values)
+
+    @property
+    def dt(self):
+        # Sample spacing of C(t)
+        return self._times[1] - self._times[0] if len(self._times) > 1 else None
+
+    def spectrum(self, **options):
+        return spectrum(self.values, self.dt, **options)
+
+    def resolution(self, hbar=1.0, window='hann'):
+        return resolution(len(self), self.dt, hbar, window)
+
+
+def _window(n, window):
+    # One-sided window over t in [0, T], 1 at t = 0
+    s = np.arange(n) / max(n - 1, 1)
+    if window == 'hann' or window == 'cos2':
+        return np.cos(0.5 * np.pi * s)**2
+    if window == 'gaussian':
+        return np.exp(-0.5 * (3.0 * s)**2)
+    if window == 'none':
+        return np.ones(n)
+    raise ValueError(f"Unknown window: {window}")
+
+
+def spectrum(C, dt, window='hann', pad=4, hbar=1.0):
+    """
+    Spectral density S(E) = Re int_{-T}^{T} C(t) w(t) exp(i E t / hbar) dt
+    from C sampled at t = 0, dt, 2dt, ... (C(-t) = conj C(t)).
+
+    Peaks sit at the eigenenergies in psi(0), with heights proportional to
+    their weights |<n|psi(0)>|^2. The window trades resolution for
+    leakage; pad zero-pads for a finer (interpolated) energy grid.
+    Returns (E, S) with E ascending.
+    """
+    C = np.asarray(C, dtype=np.complex128)
+    n = len(C)
+    Cw = C * _window(n, window)
+    size = pad * n
+    # int_0^T C w e^{iEt} dt by the trapezoidal rule, then 2 Re(...) for
+    # the symmetric extension; the t = 0 term is counted once
+    half = np.fft.ifft(Cw, n=size) * size * dt
+    S = 2.0 * half.real - dt * Cw[0].real
+    E = 2.0 * np.pi * hbar * np.fft.fftfreq(size, d=dt)
+    order = np.argsort(E)
+    return E[order], S[order]
+
+
+def spectral_peaks(E, S, n_peaks=None, threshold=1e-3):
+    """
+    Local maxima of S above threshold * max(S), refined by a parabola
+    through each maximum and its neighbours. Returns (energies, heights)
+    ordered by energy; n_peaks keeps only the highest ones.
+    """
+    S = np.asarray(S)
+    i = np.flatnonzero((S[1:-1] > S[:-2]) & (S[1:-1] >= S[2:])) + 1
+    i = i[S[i] > threshold * S.max()]
+    a, b, c = S[i - 1], S[i], S[i + 1]
+    denom = a - 2.0 * b + c
+    shift = np.where(denom != 0.0, 0.5 * (a - c) / np.where(denom != 0.0, denom, 1.0), 0.0)
+    dE = E[1] - E[0]
+    energies = E[i] + shift * dE
+    heights = b - 0.25 * (a - c) * shift
+    if n_peaks is not None and len(i) > n_peaks:
+        keep = np.sort(np.argsort(heights)[::-1][:n_peaks])
+        energies, heights = energies[keep], heights[keep]
+    return energies, heights
+
+
+def resolution(n_samples, dt, hbar=1.0, window='hann'):
+    """
+    Limits of the FFT spectrum for n_samples of C(t) spaced dt:
+
+    - bin: 2 pi hbar / T, the Fourier spacing of the energy grid (T the
+      total time); zero padding interpolates but resolves nothing finer
+    - separation: smallest gap between two equal peaks that still shows
+      as two maxima, about one window main-lobe half width (2 bins for
+      Hann, 1 without a window)
+    - max_energy: pi hbar / dt; |E| beyond it aliases (so does the
+      kinetic energy cutoff of the grid, hbar^2 k_max^2 / 2m, if larger)
+
+    Filter diagonalization can resolve closer lines than `separation`
+    when the signal is clean, down to roughly bin / (number of lines in
+    the window).
+    """
+    T = (n_samples - 1) * dt
+    bin_width = 2.0 * np.pi * hbar / T
+    lobe = {'hann': 2.0, 'cos2': 2.0, 'gaussian': 2.0, 'none': 1.0}[window]
+    return {
+        "total_time": T,
+        "bin": bin_width,
+        "separation": lobe * bin_width,
+        "max_energy": np.pi * hbar / dt,
+    }
+
+
+def filter_diagonalization(C, dt, E_min, E_max, n_basis=None, hbar=1.0, rcond=1e-8):
+    """
+    Eigenenergies in [E_min, E_max] by filter diagonalization (harmonic
+    inversion of C(t) = sum_k d_k exp(-i E_k t / hbar)).
+
+    With tau = dt and c_n = C(n tau), n = 0 .. 2M+1, a basis of K filtered
+    states Psi_j = sum_{n<=M} z_j^-n U^n psi(0), z_j = exp(-i E_j tau/hbar)
+    for E_j on a grid over the window, gives small matrices
+    U^(p)_jj' = (Psi_j|U^p|Psi_j') in closed form from the c_n, and the
+    generalized eigenproblem U^(1) B = u U^(0) B yields u_k =
+    exp(-i E_k tau / hbar). n_basis defaults to the number of Fourier bins
+    in the window (plus a few); rcond drops near-singular directions of
+    U^(0).
+
+    Returns (energies, amplitudes, widths) sorted by energy: the real
+    parts of E_k inside the window, the weights d_k and -2 Im E_k; lines
+    with a large width or tiny amplitude are usually spurious.
+    """
+    c = np.asarray(C, dtype=np.complex128)
+    M = (len(c) - 2) // 2
+    if M < 2:
+        raise ValueError("Filter diagonalization needs at least 6 samples of C(t)")
+    tau = dt / hbar
+    if n_basis is None:
+        n_basis = int(np.ceil((E_max - E_min) * M * tau / (2.0 * np.pi))) + 4
+    E_grid = np.linspace(E_min, E_max, n_basis)
+    x = np.exp(1j * E_grid * tau)  # 1 / z_j
+
+    s = np.arange(2 * M + 1)
+    powers = x[:, None]**s[None, :]  # x_j^s, s = 0 .. 2M
+    weight = M - np.abs(M - s) + 1
+    matrices = []
+    for p in (0, 1):
+        cp = c[p:p + 2 * M + 1]
+        # U_jj' = [F(x_j') - F(x_j) + x_j'^(M+1) G(x_j) - x_j^(M+1) G(x_j')] / (x_j' - x_j)
+        F = powers[:, :M + 1] @ cp[:M + 1] * x
+        G = powers[:, 1:M + 1] @ cp[M + 1:]
+        xM = x**(M + 1)
+        num = (F[None, :] - F[:, None]) + xM[None, :] * G[:, None] - xM[:, None] * G[None, :]
+        diff = x[None, :] - x[:, None]
+        np.fill_diagonal(diff, 1.0)
+        U = num / diff
+        np.fill_diagonal(U, powers @ (cp * weight))
+        matrices.append(U)
+    U0, U1 = matrices
+
+    u, B = np.linalg.eig(np.linalg.pinv(U0, rcond=rcond) @ U1)
+    keep = np.abs(u) > 0
+    u, B = u[keep], B[:, keep]
+    E = 1j * np.log(u) / tau  # u = exp(-i E tau)
+    # Amplitudes with the complex-symmetric normalisation B^T U0 B = 1
+    norm = np.einsum('jk,jl,lk->k', B, U0, B)
+    C0 = powers[:, :M + 1] @ c[:M + 1]
+    d = (B.T @ C0)**2 / np.where(norm != 0, norm, 1.0)
+
+    inside = (E.real >= E_min) & (E.real <= E_max)
+    order = np.argsort(E.real[inside])
+    return E.real[inside][order], d[inside][order], -2.0 * E.imag[inside][order]
@@ -0,0 +1,113 @@
+import numpy as np
+
+from src.grid import grid_coords
+
+
+class TimeDependentPotential:
+    """
+    V(r, t) = V_static(r) + sum of cheap time-dependent terms.
+
+    The propagator caches exp(-i V_static dt / hbar) once, like a static
+    potential, and each step only lets the terms update the part of the
+    phase they touch (see DipoleTerm, EnvelopeTerm, RegionTerm), instead of
+    recomputing an N^3 complex exponential.
+    """
+
+    def __init__(self, static, terms=()):
+        self.static = static
+        self.terms = list(terms)
+
+    @property
+    def shape(self):
+        return np.shape(self.static)
+
+    def apply_phase(self, psi, t, tau, hbar):
+        # psi *= exp(-i (V(t) - V_static) tau / hbar)
+        for term in self.terms:
+            term.apply_phase(psi, t, tau, hbar)
+
+    def evaluate(self, t):
+        # Full V(r, t), for observables and reference calculations
+        V = np.array(self.static, dtype=np.result_type(self.static, np.float64))
+        for term in self.terms:
+            term.add_to(V, t)
+        return V
+
+
+class DipoleTerm:
+    """
+    Separable dipole coupling E(t) . r, e.g. a laser field in the length
+    gauge. field(t) returns one component per axis. The phase is a product
+    of 1D exponentials, so each step costs O(N) exps plus one multiply per
+    axis with a non-zero component.
+    """
+
+    def __init__(self, field, X, Y=None, Z=None):
+        self.field = field
+        self.coords = grid_coords(X, Y, Z)
+
+    def apply_phase(self, psi, t, tau, hbar):
+        for E, r in zip(self.field(t), self.coords):
+            if E != 0.0:
+                psi *= np.exp(-1j * E * tau / hbar * r).astype(psi.dtype, copy=False)
+
+    def add_to(self, V, t):
+        for E, r in zip(self.field(t), self.coords):
+            V += E * r
+
+
+def bounding_box(mask):
+    # Tuple of slices covering the True entries of mask
+    slices = []
+    for axis in range(mask.ndim):
+        others = tuple(i for i in range(mask.ndim) if i != axis)
+        hits = np.flatnonzero(np.any(mask, axis=others))
+        if hits.size == 0:
+            return tuple(slice(0, 0) for _ in range(mask.ndim))
+        slices.append(slice(hits[0], hits[-1] + 1))
+    return tuple(slices)
+
+
+class EnvelopeTerm:
+    """
+    Scalar envelope times a fixed spatial shape, f(t) * W(r). Only the
+    bounding box of W's support is stored and exponentiated each step.
+    """
+
+    def __init__(self, W, envelope):
+        self.envelope = envelope
+        self.box = bounding_box(W != 0)
+        self.W = np.array(W[self.box])
+
+    def apply_phase(self, psi, t, tau, hbar):
+        f = self.envelope(t)
+        if f != 0.0:
+            box = (Ellipsis,) + self.box
+            psi[box] *= np.exp(-1j * f * tau / hbar * self.W).astype(psi.dtype, copy=False)
+
+    def add_to(self, V, t):
+        V[self.box] += self.envelope(t) * self.W
+
+
+class RegionTerm:
+    """
+    Arbitrary time dependence confined to a sub-region, e.g. a moving
+    barrier inside the box its motion sweeps out. func(t, coords) returns
+    the potential on the region, where coords are the sparse coordinate
+    arrays restricted to it.
+    """
+
+    def __init__(self, func, region, X, Y=None, Z=None):
+        self.func = func
+        self.box = tuple(region)
+        self.coords = tuple(c[tuple(s if c.shape[i] > 1 else slice(None)
+                                    for i, s in enumerate(self.box))]
+                            for c in grid_coords(X, Y, Z))
+
+    def apply_phase(self, psi, t, tau, hbar):
+        box = (Ellipsis,) + self.box
+        V = self.func(t, self.coords)
+        psi[box] *= np.exp(-1j * tau / hbar * V).astype(psi.dtype, copy=False)
+
+    def add_to(self, V, t):
+        V[self.box] += self.func(t, self.coords)
@@ -1,30 +1,100 @@
+import warnings
+
 import numpy as np
 
-def compute_total_energy(psi, V, dx, KX, KY, KZ, hbar, m):
+from src import instrument
+from src.fft_backend import get_fft_backend
+from src.grid import k_squared, volume_element
+
+@instrument.timed("compute_total_energy")
+def compute_total_energy(psi, V, dx, KX, KY, KZ, hbar, m, fft_backend=None):
+
+    # Sums accumulate in float64 so single-precision runs are measured accurately.
 
     # 1) Potential energy
     prob_density = np.abs(psi)**2
-    volume_element = dx**3  # in 3D
-    E_potential = np.sum(prob_density * V) * volume_element
+    # dx may be a scalar spacing, per-axis spacings or a Grid (any dimension)
+    dV = volume_element(dx, psi.ndim)
+    E_potential = np.sum(prob_density * V, dtype=np.float64) * dV
 
     # 2) Kinetic energy
     #   T = (hbar^2 / 2m)(k_x^2 + k_y^2 + k_z^2)
     #   <T> = ∫ psi*(r) T-operator psi(r) d^3r
     # Implementation: go to momentum space, multiply by T(k).
-    psi_k = np.fft.fftn(psi)
-    # For standard numpy FFT, no direct 1/N factor ifftn, but wavefunction normalization is tricky. Therefore we write a simple approximate:
-    T_of_k = (hbar**2 / (2.0*m)) * (KX**2 + KY**2 + KZ**2)
-    # The "prob density" in k-space is |psi_k|^2, though we might need to handle scaling.
+    # KX, KY, KZ may be dense, sparse (broadcastable), or a Grid passed as KX.
+    psi_k = instrument.instrumented(get_fft_backend(fft_backend)).fftn(psi)
+    T_of_k = (hbar**2 / (2.0*m)) * k_squared(KX, KY, KZ)
 
-    # Weighted sum in k-space with factor dk^3 ~ (2*pi/L)^3
+    # Parseval for the unnormalised DFT: sum |psi|^2 = sum |psi_k|^2 / N_total,
+    # so <T> = dV / N_total * sum |psi_k|^2 T(k).
     prob_density_k = np.abs(psi_k)**2
-    # The "k-space volume" factor is (2pi / (N dx))^3:
-    dk = 2.0 * np.pi / (N * dx)  # approximate spacing in each dimension
-    d3k = dk**3
-
-    E_kinetic = np.sum(prob_density_k * T_of_k) * d3k
+    E_kinetic = np.sum(prob_density_k * T_of_k, dtype=np.float64) * dV / psi.size
 
     # 3) Total energy
     E = E_kinetic + E_potential
     return E
 
+
+def compute_norm(psi, dx):
+    # ∫ |psi|^2 d^nr
+    return np.sum(np.abs(psi)**2, dtype=np.float64) * volume_element(dx, psi.ndim)
+
+
+class DriftMonitor:
+    """
+    Tracks the relative drift of the norm and total energy from their
+    initial values. The split-operator scheme is unitary, so norm drift
+    is pure round-off; when either drift passes `tolerance` a
+    RuntimeWarning is issued (once), signalling that single precision is
+    no longer accurate enough for the run.
+    """
+
+    def __init__(self, psi0, V, dx, KX, KY, KZ, hbar, m, tolerance=1e-4, fft_backend=None):
+        self._energy_args = (V, dx, KX, KY, KZ, hbar, m, fft_backend)
+        self.dx = dx
+        self.tolerance = tolerance
+        self.norm0 = compute_norm(psi0, dx)
+        self.energy0 = compute_total_energy(psi0, *self._energy_args)
+
+        self.steps = [0]
+        self.norm_drift = [0.0]
+        self.energy_drift = [0.0]
+        self.exceeded = False
+
+    def update(self, psi, step):
+        norm = compute_norm(psi, self.dx)
+        energy = compute_total_energy(psi, *self._energy_args)
+        self.steps.append(step)
+        self.norm_drift.append(abs(norm - self.norm0) / self.norm0)
+        self.energy_drift.append(abs(energy - self.energy0) / max(abs(self.energy0), 1e-300))
+
+        drift = max(self.norm_drift[-1], self.energy_drift[-1])
+        if self.tolerance is not None and drift > self.tolerance and not self.exceeded:
+            self.exceeded = True
+            warnings.warn(
+                f"Relative drift {drift:.2e} exceeds tolerance {self.tolerance:.1e} "
+                f"at step {step} (psi dtype {psi.dtype})",
+                RuntimeWarning,
+            )
+        return self.norm_drift[-1], self.energy_drift[-1]
+
+    def track(self, propagator, n_steps, every=10):
+        # Run the propagator in chunks of `every` steps, checking after each.
+        # Each chunk is a fused run, so splitting costs 2 extra FFTs per
+        # chunk, and update() adds a third (the fftn of compute_total_energy)
+        # plus a few full passes over psi.
+        done = 0
+        while done < n_steps:
+            chunk = min(every, n_steps - done)
+            propagator.run(chunk)
+            done += chunk
+            self.update(propagator.psi, propagator.step_count)
+        return propagator.psi
+
+    @property
+    def max_norm_drift(self):
+        return max(self.norm_drift)
+
+    @property
+    def max_energy_drift(self):
+        return max(self.energy_drift)
@@ -1,11 +1,15 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from src import instrument
+from src.grid import grid_axes
+
+@instrument.timed("visualize_results_3d")
 def visualize_results_3d(X, Y, psi, step, potential=None, z_index=None, save_fig=False):
 
-    N = psi.shape[0]  # assume Nx=Ny=Nz
+    Nz = psi.shape[2]  # Nx, Ny, Nz may differ
     if z_index is None:
-        z_index = N // 2  # pick central
+        z_index = Nz // 2  # pick central
 
     # Probability density slice
     psi_slice = psi[:, :, z_index]
@@ -15,14 +19,14 @@ def visualize_results_3d(X, Y, psi, step, potential=None, z_index=None, save_fig
     plt.title(f"3D Wavefunction Slice (z_index={z_index}) at step {step}")
 
     # Show probability density
-    # X_2d, Y_2d can be extracted:
-    X_2d = X[:, :, z_index]
-    Y_2d = Y[:, :, z_index]
+    # X, Y may be dense meshes, sparse (broadcastable) views, or a Grid
+    # passed as X; only their 1D axes are needed here.
+    x, y = grid_axes(X, Y)
 
     # Instead of X_2d, Y_2d, we can display prob_density with imshow
     # but we have to define extent if we want real coordinates on axes:
-    x_min, x_max = X_2d[0,0], X_2d[-1,-1]
-    y_min, y_max = Y_2d[0,0], Y_2d[-1,-1]
+    x_min, x_max = x[0], x[-1]
+    y_min, y_max = y[0], y[-1]
 
     plt.imshow(prob_density.T, origin='lower',
                extent=[x_min, x_max, y_min, y_max],
@@ -36,7 +40,7 @@ def visualize_results_3d(X, Y, psi, step, potential=None, z_index=None, save_fig
         if V_max > 1e-10:  # to avoid dividing by zero
             # We can overlay contours:
             levels = np.linspace(V_min, V_max, 5)
-            plt.contour(X_2d, Y_2d, V_slice, levels=levels, colors='red', alpha=0.5)
+            plt.contour(x, y, V_slice.T, levels=levels, colors='red', alpha=0.5)
 
     plt.xlabel('x')
     plt.ylabel('y')
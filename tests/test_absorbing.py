@@ -0,0 +1,97 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator, evolve_wavefunction
+from src.integrators import CompositionPropagator
+from src.td_potential import TimeDependentPotential
+from src.absorbing import AbsorbingBoundary, absorbing_potential, absorbing_strength
+
+class TestAbsorbing(unittest.TestCase):
+    def transmission(self, L, N, absorbing):
+        # 1D barrier scattering; transmitted = right of the barrier + absorbed at x+
+        grid = Grid.uniform(-L, L, N)
+        psi = gaussian_wavepacket(grid, (-6.0,), 1.0, (3.0,))
+        V = potential_function(grid, potential_type='barrier', V0=4.0, a=0.5)
+        boundary = None
+        if absorbing:
+            boundary = AbsorbingBoundary(grid, width=4.0, strength=absorbing_strength(4.0, 3.0, 1e-6))
+            V = TimeDependentPotential(V, [boundary])
+        propagator = SplitOperatorPropagator(psi, V, 0.005, grid)
+        propagator.run(1200)
+        rho = np.abs(propagator.psi)**2 * grid.dV
+        transmitted = np.sum(rho[grid.axes[0] > 0.5])
+        return transmitted, boundary, np.sum(rho)
+
+    def test_small_box_matches_large_box(self):
+
+        reference, _, _ = self.transmission(80.0, 2048, absorbing=False)
+        wrapped, _, _ = self.transmission(20.0, 512, absorbing=False)
+        transmitted, boundary, norm = self.transmission(20.0, 512, absorbing=True)
+        transmitted += boundary.absorbed['x+']
+        self.assertGreater(abs(wrapped - reference), 0.01)
+        self.assertAlmostEqual(transmitted, reference, delta=2e-3)
+        # Every bit of lost probability is credited to a face
+        self.assertAlmostEqual(norm + boundary.total_absorbed, 1.0, places=10)
+
+    def test_matches_complex_potential(self):
+
+        grid = Grid.cube(-6.0, 6.0, 32, ndim=2)
+        psi = gaussian_wavepacket(grid, (2.0, -1.0), 1.0, (4.0, -3.0))
+        V = potential_function(grid, potential_type='harmonic', omega=0.2)
+        W = absorbing_potential(grid, width=2.0, strength=3.0, profile='sin2')
+        boundary = AbsorbingBoundary(grid, width=2.0, strength=3.0, profile='sin2')
+        propagator = SplitOperatorPropagator(psi, TimeDependentPotential(V, [boundary]), 0.01, grid)
+        propagator.run(50)
+
+        reference = psi.copy()
+        for _ in range(50):
+            reference = evolve_wavefunction(reference, V - 1j * W, 0.01, None, grid.KX, grid.KY, None, 1.0, 1.0)
+        self.assertTrue(np.allclose(propagator.psi, reference, atol=1e-10))
+        self.assertEqual(sorted(boundary.absorbed), ['x+', 'x-', 'y+', 'y-'])
+        self.assertGreater(boundary.absorbed['x+'], boundary.absorbed['x-'])
+        self.assertGreater(boundary.absorbed['y-'], boundary.absorbed['y+'])
+
+    def test_composition_schemes(self):
+
+        grid = Grid.uniform(-10.0, 10.0, 128)
+        psi = gaussian_wavepacket(grid, (4.0,), 1.0, (3.0,))
+        V = potential_function(grid, potential_type='harmonic', omega=0.1)
+
+        def run(cls, **options):
+            boundary = AbsorbingBoundary(grid, width=3.0, strength=2.0)
+            propagator = cls(psi, TimeDependentPotential(V, [boundary]), 0.01, grid, **options)
+            propagator.run(100)
+            return propagator.psi, boundary
+
+        reference, _ = run(SplitOperatorPropagator)
+        strang, boundary = run(CompositionPropagator, scheme='strang')
+        self.assertTrue(np.allclose(strang, reference, atol=1e-12))
+        self.assertGreater(boundary.absorbed['x+'], 0.0)
+        for scheme in ('yoshida4', 'suzuki4', 'blanes_moan4'):
+            with self.assertRaises(ValueError, msg=scheme):
+                run(CompositionPropagator, scheme=scheme)
+
+    def test_layers_only_on_requested_faces(self):
+
+        grid = Grid.cube(-5.0, 5.0, 20)
+        W = absorbing_potential(grid, width=1.5, strength=2.0, faces=('x+',))
+        x = grid.axes[0]
+        self.assertTrue(np.all(W[x < 3.5] == 0.0))
+        self.assertTrue(np.all(np.diff(W[x > 3.5, 0, 0]) > 0.0))
+        self.assertLess(W.max(), 2.0)
+        with self.assertRaises(ValueError):
+            absorbing_potential(grid, width=6.0)
+        with self.assertRaises(ValueError):
+            AbsorbingBoundary(grid, faces=('w+',))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import multiprocessing
+import sys
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src import batch
+from src.batch import (expand_jobs, job_hash, job_memory, choose_workers, load_config,
+                       run_job, run_batch)
+
+CONFIG = {
+    "run": {
+        "dt": 0.02,
+        "total_time": 0.1,
+        "grid": {"xmin": -8.0, "xmax": 8.0, "N": 16},
+        "potential": {"type": "barrier", "V0": 5.0, "a": 1.0},
+    },
+    "sweep": {"potential.V0": [1.0, 5.0], "packet.sigma": [1.0, 1.5, 2.0]},
+}
+
+
+def run_or_die(params, directory, fft_workers=1):
+    # Stands in for run_job in forked workers: V0 = 5 kills its process
+    if params["potential"]["V0"] == 5.0:
+        os._exit(1)
+    return run_job(params, directory, fft_workers)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_expand_product_and_zip(self):
+        jobs = expand_jobs(CONFIG)
+        self.assertEqual(len(jobs), 6)
+        overrides, params = jobs[-1]
+        self.assertEqual(overrides, {"potential.V0": 5.0, "packet.sigma": 2.0})
+        self.assertEqual(params["potential"], {"type": "barrier", "V0": 5.0, "a": 1.0})
+        self.assertEqual(params["grid"]["shape"], [16, 16, 16])
+
+        zipped = dict(CONFIG, sweep_mode="zip", sweep={"dt": [0.01, 0.02], "hbar": [1.0, 2.0]})
+        self.assertEqual([o for o, _ in expand_jobs(zipped)],
+                         [{"dt": 0.01, "hbar": 1.0}, {"dt": 0.02, "hbar": 2.0}])
+        with self.assertRaises(ValueError):
+            expand_jobs(dict(zipped, sweep={"dt": [0.01], "hbar": [1.0, 2.0]}))
+
+    def test_hash_depends_on_parameters_only(self):
+        a = expand_jobs(CONFIG)
+        b = expand_jobs(CONFIG)
+        self.assertEqual([job_hash(p) for _, p in a], [job_hash(p) for _, p in b])
+        self.assertEqual(len({job_hash(p) for _, p in a}), 6)
+
+    def test_workers_limited_by_memory(self):
+        jobs = expand_jobs(CONFIG)
+        per_job = job_memory(jobs[0][1])
+        self.assertEqual(choose_workers(jobs, workers=8, memory_budget=2.5 * per_job), 2)
+        self.assertEqual(choose_workers(jobs, workers=8, memory_budget=1), 1)
+        self.assertEqual(choose_workers(jobs[:3], workers=8, memory_budget=100 * per_job), 3)
+
+    def test_load_toml_and_yaml(self):
+        toml_path = os.path.join(self.dir, "run.toml")
+        with open(toml_path, "w") as f:
+            f.write('output = "out"\n[run]\ndt = 0.02\n[sweep]\n"potential.V0" = [1.0, 2.0]\n')
+        config = load_config(toml_path)
+        self.assertEqual(config["sweep"]["potential.V0"], [1.0, 2.0])
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            return
+        yaml_path = os.path.join(self.dir, "run.yaml")
+        with open(yaml_path, "w") as f:
+            f.write("output: out\nrun:\n  dt: 0.02\nsweep:\n  potential.V0: [1.0, 2.0]\n")
+        self.assertEqual(load_config(yaml_path), config)
+
+    def test_cache_and_resume(self):
+        output = os.path.join(self.dir, "out")
+        config = dict(CONFIG, sweep={"potential.V0": [1.0, 5.0]})
+        summary = run_batch(config, output, workers=1, log=lambda *a: None)
+        self.assertEqual([j["status"] for j in summary["jobs"]], ["done", "done"])
+
+        # A lost result is recomputed, the other one comes from the cache
+        os.remove(os.path.join(summary["jobs"][0]["directory"], "result.json"))
+        again = run_batch(config, output, workers=1, log=lambda *a: None)
+        self.assertEqual([j["status"] for j in again["jobs"]], ["done", "cached"])
+        self.assertAlmostEqual(again["jobs"][0]["result"]["norm"], summary["jobs"][0]["result"]["norm"])
+        with open(os.path.join(output, "summary.json")) as f:
+            self.assertEqual(len(json.load(f)["jobs"]), 2)
+
+    def test_job_continues_from_checkpoint(self):
+        _, params = expand_jobs(CONFIG)[0]
+        params.update(checkpoint_every=5, save_psi=True, total_time=0.2)
+        reference = run_job(params, os.path.join(self.dir, "reference"))
+
+        # An interrupted job: 5 of its 10 steps checkpointed
+        directory = os.path.join(self.dir, "job")
+        run_job(dict(params, total_time=0.1), directory)
+        result = run_job(params, directory)
+        self.assertEqual(result["resumed_from_step"], 5)
+        self.assertEqual(result["steps"], 10)
+        np.testing.assert_allclose(np.load(os.path.join(directory, "psi.npy")),
+                                   np.load(os.path.join(self.dir, "reference", "psi.npy")), atol=1e-12)
+        self.assertAlmostEqual(result["norm"], reference["norm"], places=12)
+
+    def test_failed_job_is_reported(self):
+        config = dict(CONFIG, sweep={"potential.type": ["barrier", "no_such_potential"]})
+        summary = run_batch(config, os.path.join(self.dir, "out"), workers=1, log=lambda *a: None)
+        self.assertEqual([j["status"] for j in summary["jobs"]], ["done", "failed"])
+        self.assertIn("no_such_potential", summary["jobs"][1]["error"])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "needs forked workers")
+    def test_dead_worker_is_reported(self):
+        config = dict(CONFIG, sweep={"potential.V0": [1.0, 5.0]})
+        output = os.path.join(self.dir, "out")
+        original = batch.run_job
+        batch.run_job = run_or_die
+        try:
+            summary = run_batch(config, output, workers=2, memory_budget=2**40, log=lambda *a: None)
+        finally:
+            batch.run_job = original
+        statuses = [j["status"] for j in summary["jobs"]]
+        self.assertEqual(statuses[1], "failed")
+        self.assertIn("BrokenProcessPool", summary["jobs"][1]["error"])
+        self.assertNotIn("pending", statuses)
+        with open(os.path.join(output, "summary.json")) as f:
+            self.assertEqual([j["status"] for j in json.load(f)["jobs"]], statuses)
+
+        # The failed job is retried on the next run
+        again = run_batch(config, output, workers=1, log=lambda *a: None)
+        self.assertEqual([j["status"] for j in again["jobs"]][1], "done")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.benchmark import (measure, machine_tag, save_results, load_results, compare_results,
+                           regressions)
+
+def case(name, seconds, rss):
+    return {"name": name, "seconds": seconds, "peak_rss": rss}
+
+class TestBenchmark(unittest.TestCase):
+    def test_measure(self):
+
+        calls = []
+        result = measure(lambda: calls.append(np.ones(1000).sum()), repeat=3, warmup=1)
+        self.assertEqual(len(calls), 4)
+        self.assertLessEqual(result["seconds"], result["median_seconds"])
+        if result["peak_rss"] is not None:
+            self.assertGreater(result["peak_rss"], 0)
+
+    def test_save_and_compare(self):
+
+        old = [case("a", 1.0, 100), case("b", 1.0, 100), case("c", 1.0, 100), case("gone", 1.0, 100)]
+        new = [case("a", 1.05, 100), case("b", 1.5, 100), case("c", 0.5, 200), case("added", 1.0, 100)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path_old = save_results(old, tmp, label="old")
+            path_new = save_results(new, tmp, label="new")
+            self.assertTrue(os.path.basename(path_old).startswith(machine_tag()))
+            rows, different_machine = compare_results(load_results(path_old), load_results(path_new))
+        self.assertFalse(different_machine)
+        flags = {name: flags for name, _, _, _, _, flags in rows}
+        self.assertEqual(flags, {"a": [], "b": ["SLOWER"], "c": ["faster", "MORE MEMORY"]})
+        self.assertEqual([row[0] for row in regressions(rows)], ["b", "c"])
+
+if __name__ == '__main__':
+    unittest.main()
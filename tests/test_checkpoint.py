@@ -0,0 +1,59 @@
+import unittest
+import json
+import tempfile
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.checkpoint import CheckpointWriter, latest_checkpoint, resume
+
+class TestCheckpoint3D(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-5.0, 5.0, 16)
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.0, 0.0), 1.0, (2.0, 0.0, 0.0))
+        self.V = potential_function(self.grid, potential_type='barrier', V0=5.0, a=1.0)
+
+    def test_resume_continues_run_3d(self):
+
+        reference = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        reference.run(20)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+            with CheckpointWriter(tmp, every=4, keep=2, grid=self.grid) as writer:
+                propagator.add_observer(writer)
+                propagator.run(14)  # "dies" after step 14
+
+            meta = latest_checkpoint(tmp)
+            self.assertEqual(meta['step'], 12)
+            self.assertEqual(sorted(f for f in os.listdir(tmp) if f.endswith('.npy')),
+                             ['ckpt_00000008.npy', 'ckpt_00000012.npy'])
+
+            resumed = resume(tmp, self.V)
+            self.assertEqual(resumed.step_count, 12)
+            self.assertAlmostEqual(resumed.time, 0.12)
+            resumed.run(20 - resumed.step_count)
+            self.assertTrue(np.allclose(resumed.psi, reference.psi, atol=1e-12))
+
+    def test_resume_rejects_other_potential_3d(self):
+
+        with tempfile.TemporaryDirectory() as tmp:
+            propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+            with CheckpointWriter(tmp, every=2) as writer:
+                propagator.add_observer(writer)
+                propagator.run(2)
+            with open(os.path.join(tmp, 'latest.json')) as f:
+                self.assertNotIn('grid', json.load(f))
+            with self.assertRaises(ValueError):
+                resume(tmp, 2.0 * self.V, self.grid)
+
+if __name__ == '__main__':
+    unittest.main()
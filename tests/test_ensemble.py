@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.ensemble import EnsemblePropagator, choose_batch_size, run_sweep
+from src.utils import compute_total_energy
+from src.td_potential import TimeDependentPotential, DipoleTerm
+
+class TestEnsemble3D(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-5.0, 5.0, 16)
+        self.params = [(2.0, 5.0), (3.0, 10.0), (1.0, 0.0)]  # (kx0, V0)
+
+    def build(self, p):
+        kx0, V0 = p
+        psi = gaussian_wavepacket(self.grid, (-1.0, 0.0, 0.0), 1.0, (kx0, 0.0, 0.0))
+        V = potential_function(self.grid, potential_type='barrier', V0=V0, a=1.0)
+        return psi, V
+
+    def test_ensemble_matches_single_runs_3d(self):
+
+        dts = np.array([0.01, 0.02, 0.015])
+        members = [self.build(p) for p in self.params]
+        ensemble = EnsemblePropagator([psi for psi, _ in members], [V for _, V in members],
+                                      dts, self.grid)
+        ensemble.run(5)
+        norms = ensemble.norms(self.grid.dV)
+        energies = ensemble.energies(self.grid.dV)
+
+        for j, (psi, V) in enumerate(members):
+            single = SplitOperatorPropagator(psi, V, dts[j], self.grid)
+            single.run(5)
+            self.assertTrue(np.allclose(ensemble.psi[j], single.psi, atol=1e-12))
+            E = compute_total_energy(single.psi, V, self.grid.dx, self.grid, None, None, 1.0, 1.0)
+            self.assertAlmostEqual(energies[j], E)
+            self.assertAlmostEqual(norms[j], np.sum(np.abs(single.psi)**2) * self.grid.dV)
+
+    def test_sweep_in_batches_3d(self):
+
+        results = list(run_sweep(self.build, self.params, 3, 0.01, self.grid,
+                                 dV=self.grid.dV, batch_size=2))
+        self.assertEqual([p for p, _, _, _ in results], self.params)
+        psi, V = self.build(self.params[2])
+        single = SplitOperatorPropagator(psi, V, 0.01, self.grid)
+        single.run(3)
+        self.assertTrue(np.allclose(results[2][1], single.psi, atol=1e-12))
+
+    def test_choose_batch_size(self):
+
+        shape = (32, 32, 32)
+        n_points = 32**3
+        # Budget for shared arrays plus exactly four members
+        budget = (8 + 32) * n_points + 4 * (32 + 24) * n_points
+        self.assertEqual(choose_batch_size(shape, 10, memory_budget=budget), 4)
+        self.assertEqual(choose_batch_size(shape, 2, memory_budget=budget), 2)
+        self.assertEqual(choose_batch_size(shape, 10, memory_budget=0), 1)
+        # A shared V with per-member dt still needs one potential phase each
+        budget = (8 + 8) * n_points + 4 * (32 + 16 + 32) * n_points
+        self.assertEqual(choose_batch_size(shape, 10, memory_budget=budget, per_member_potential=False,
+                                           per_member_dt=True), 4)
+        # Single precision halves every array: twice the members fit
+        budget = (8 + 32) * n_points + 8 * (32 + 24) * n_points
+        self.assertEqual(choose_batch_size(shape, 10, memory_budget=budget // 2, dtype=np.complex64), 8)
+        self.assertEqual(choose_batch_size(shape, 10, memory_budget=budget // 2), 3)
+
+    def test_energies_time_dependent_potential(self):
+
+        psi, V = self.build(self.params[0])
+        field = DipoleTerm(lambda t: (0.5 + t, 0.0, 0.0), self.grid)
+        ensemble = EnsemblePropagator([psi, psi], TimeDependentPotential(V, [field]), 0.01, self.grid)
+        ensemble.run(3)
+        single = SplitOperatorPropagator(psi, TimeDependentPotential(V, [field]), 0.01, self.grid)
+        single.run(3)
+        self.assertTrue(np.allclose(ensemble.psi[1], single.psi, atol=1e-12))
+        V_now = ensemble.potential_at(ensemble.time)
+        E = compute_total_energy(ensemble.psi[0], V_now, self.grid.dx, self.grid, None, None, 1.0, 1.0)
+        np.testing.assert_allclose(ensemble.energies(self.grid.dV), [E, E])
+
+        with self.assertRaises(ValueError):
+            EnsemblePropagator([psi, psi], TimeDependentPotential(V, [field]), np.array([0.01, 0.02]),
+                               self.grid)
+
+if __name__ == '__main__':
+    unittest.main()
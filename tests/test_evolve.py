@@ -9,7 +9,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from src.initialize_system import initialize_system
 from src.potential import potential_function
-from src.evolve import evolve_wavefunction
+from src.evolve import evolve_wavefunction, SplitOperatorPropagator
 
 class TestEvolve3D(unittest.TestCase):
     def test_evolve_free_particle_3d(self):
@@ -39,6 +39,41 @@ class TestEvolve3D(unittest.TestCase):
         # Just ensure shape is still (N,N,N) and we didn't crash
         self.assertEqual(psi.shape, (N, N, N))
 
+    def test_propagator_matches_evolve_3d(self):
+
+        xmin, xmax = -5.0, 5.0
+        N = 16
+        hbar = 1.0
+        m = 1.0
+        dt = 0.02
+        num_steps = 6
+
+        X, Y, Z, dx, psi, KX, KY, KZ, dkx = initialize_system(
+            xmin, xmax, N,
+            -1.0, 0.0, 0.0,
+            1.0,
+            2.0, 0.0, 0.0,
+            hbar, m
+        )
+        V = potential_function(X, Y, Z, potential_type='barrier', V0=5.0, a=1.0)
+
+        psi_ref = psi.copy()
+        for _ in range(num_steps):
+            psi_ref = evolve_wavefunction(psi_ref, V, dt, dx, KX, KY, KZ, hbar, m)
+
+        # Fused run: 2n+2 FFTs instead of 4n
+        propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m)
+        propagator.run(num_steps)
+        self.assertTrue(np.allclose(propagator.psi, psi_ref, atol=1e-12))
+        self.assertEqual(propagator.fft_count, 2 * num_steps + 2)
+        self.assertEqual(propagator.step_count, num_steps)
+
+        # Changing dt must rebuild the cached phases
+        propagator.dt = dt / 2
+        propagator.step()
+        psi_ref = evolve_wavefunction(psi_ref, V, dt / 2, dx, KX, KY, KZ, hbar, m)
+        self.assertTrue(np.allclose(propagator.psi, psi_ref, atol=1e-12))
+
 if __name__ == '__main__':
     unittest.main()
 
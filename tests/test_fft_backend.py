@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.initialize_system import initialize_system
+from src.potential import potential_function
+from src.evolve import evolve_wavefunction, SplitOperatorPropagator
+from src.fft_backend import available_fft_backends, compare_fft_backends, get_fft_backend
+
+class TestFFTBackend(unittest.TestCase):
+    def test_backends_agree(self):
+
+        errors = compare_fft_backends(shape=(8, 12, 16))
+        for name, err in errors.items():
+            self.assertLess(err, 1e-10, msg=name)
+
+    def test_propagator_backends_agree_3d(self):
+
+        N = 16
+        hbar = 1.0
+        m = 1.0
+        dt = 0.02
+        X, Y, Z, dx, psi, KX, KY, KZ, dkx = initialize_system(
+            -5.0, 5.0, N,
+            -1.0, 0.0, 0.0,
+            1.0,
+            2.0, 0.0, 0.0,
+            hbar, m
+        )
+        V = potential_function(X, Y, Z, potential_type='barrier', V0=5.0, a=1.0)
+        psi_ref = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar, m, fft_backend='numpy')
+
+        for name in available_fft_backends():
+            propagator = SplitOperatorPropagator(psi, V, dt, KX, KY, KZ, hbar=hbar, m=m,
+                                                 fft_backend=name)
+            propagator.step()
+            self.assertTrue(np.allclose(propagator.psi, psi_ref, atol=1e-12), msg=name)
+
+    def test_unknown_backend(self):
+
+        with self.assertRaises(ValueError):
+            get_fft_backend('fftpack')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.evolve import SplitOperatorPropagator
+from src.integrators import CompositionPropagator
+from src.flux import FluxAnalyzer
+
+
+class TestFlux(unittest.TestCase):
+    def test_current_of_gaussian_packet(self):
+        # For a Gaussian envelope times exp(i k0 x), j(x) = hbar k0 / m |psi(x)|^2
+        grid = Grid([np.linspace(-20, 20, 256, endpoint=False), np.linspace(-8, 8, 32, endpoint=False)])
+        k0, x0, sigma = 1.5, -1.0, 1.2
+        psi = gaussian_wavepacket(grid, (x0, 0.0), sigma, (k0, 0.0))
+        analyzer = FluxAnalyzer(grid, {'a': (0, 0.3), 'b': (0, -2.71, -1.0), 'y': (1, 0.5)})
+        propagator = SplitOperatorPropagator(psi, np.zeros(grid.shape), 0.01, grid, hbar=1.0, m=2.0)
+        propagator.add_observer(analyzer)
+        propagator.run(1)
+        j0 = analyzer.to_numpy()[0, 3:6]
+
+        # Marginal along y integrates to 1: |psi|^2 along x alone
+        def density(x):
+            return np.exp(-(x - x0)**2 / sigma**2) / (np.pi**0.5 * sigma)
+        np.testing.assert_allclose(j0[:2], [0.75 * density(0.3), -0.75 * density(-2.71)], rtol=1e-8)
+        self.assertAlmostEqual(j0[2], 0.0, places=10)
+
+        # The coordinate arrays of initialize_system describe the same grid
+        same = FluxAnalyzer(grid.coords, {'a': (0, 0.3), 'b': (0, -2.71, -1.0), 'y': (1, 0.5)})
+        propagator = SplitOperatorPropagator(psi, np.zeros(grid.shape), 0.01, grid, hbar=1.0, m=2.0)
+        propagator.add_observer(same)
+        propagator.run(1)
+        np.testing.assert_allclose(same.to_numpy()[0, 3:6], j0, rtol=1e-12, atol=1e-15)
+
+    def test_free_packet_stops_early(self):
+        grid = Grid([np.linspace(-300, 300, 8192, endpoint=False)])
+        psi = gaussian_wavepacket(grid, (-10.0,), 2.0, (2.0,))
+        propagator = SplitOperatorPropagator(psi, np.zeros(grid.shape), 0.01, grid)
+        analyzer = propagator.add_observer(FluxAnalyzer(grid, {'T': (0, 10.0)}, tol=1e-6, patience=50))
+        propagator.run(20000)
+        self.assertTrue(analyzer.converged)
+        self.assertEqual(propagator.step_count, analyzer.stop_step)
+        self.assertLess(propagator.step_count, 5000)
+        x = grid.axes[0]
+        beyond = np.sum(np.abs(propagator.psi[x > 10.0])**2) * grid.dV
+        self.assertAlmostEqual(analyzer.fractions['T'], beyond, places=6)
+        self.assertAlmostEqual(analyzer.fractions['T'], 1.0, places=4)
+
+    def test_barrier_transmission_and_reflection(self):
+        grid = Grid([np.linspace(-300, 300, 8192, endpoint=False)])
+        x = grid.axes[0]
+        V = 2.0 * np.exp(-2.0 * x**2)
+        psi = gaussian_wavepacket(grid, (-12.0,), 2.0, (2.0,))
+        propagator = SplitOperatorPropagator(psi, V, 0.01, grid)
+        analyzer = propagator.add_observer(FluxAnalyzer.barrier(grid, -25.0, 8.0, tol=1e-5))
+        propagator.run(20000)
+        self.assertTrue(analyzer.converged)
+        self.assertLess(propagator.step_count, 10000)
+        self.assertLess(analyzer.inside, 1e-5)
+
+        T, R = analyzer.fractions['transmitted'], analyzer.fractions['reflected']
+        rho = np.abs(propagator.psi)**2 * grid.dV
+        self.assertAlmostEqual(T, rho[x > 8.0].sum(), places=6)
+        self.assertAlmostEqual(R, rho[x < -25.0].sum(), places=6)
+        self.assertAlmostEqual(T + R, 1.0, places=4)
+        self.assertGreater(T, 0.2)
+        self.assertGreater(R, 0.2)
+
+    def test_stop_leaves_exact_state(self):
+        grid = Grid([np.linspace(-40, 40, 512, endpoint=False)])
+        psi = gaussian_wavepacket(grid, (-5.0,), 1.0, (3.0,))
+        V = np.zeros(grid.shape)
+        for cls in (SplitOperatorPropagator, CompositionPropagator):
+            propagator = cls(psi, V, 0.01, grid)
+            analyzer = propagator.add_observer(FluxAnalyzer(grid, {'T': (0, 0.0)}, every=5, tol=1e-4))
+            propagator.run(5000)
+            self.assertTrue(analyzer.converged)
+            self.assertEqual(propagator.step_count % 5, 0)
+
+            reference = cls(psi, V, 0.01, grid)
+            reference.run(propagator.step_count)
+            np.testing.assert_allclose(propagator.psi, reference.psi, atol=1e-12)
+            self.assertEqual(propagator.fft_count, reference.fft_count)
+
+            # The next run goes on from there
+            propagator.remove_observer(analyzer)
+            propagator.run(3)
+            reference.run(3)
+            np.testing.assert_allclose(propagator.psi, reference.psi, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
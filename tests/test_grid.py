@@ -0,0 +1,116 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid, next_fast_size
+from src.initialize_system import initialize_system, initialize_grid, gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import evolve_wavefunction, SplitOperatorPropagator
+from src.utils import compute_total_energy
+
+class TestGrid3D(unittest.TestCase):
+    def test_sparse_views_3d(self):
+
+        N = 16
+        grid = Grid.cube(-5.0, 5.0, N)
+        self.assertEqual(grid.X.shape, (N, 1, 1))
+        self.assertEqual(grid.Y.shape, (1, N, 1))
+        self.assertEqual(grid.KZ.shape, (1, 1, N))
+        self.assertIsNone(grid._k2)  # kinetic array is built lazily
+        self.assertEqual(grid.k2.shape, (N, N, N))
+
+        X, Y, Z = grid.dense()
+        self.assertTrue(np.array_equal(np.broadcast_to(grid.X, X.shape), X))
+
+    def test_sparse_matches_dense_3d(self):
+
+        N = 16
+        hbar = 1.0
+        m = 1.0
+        dt = 0.02
+        args = (-5.0, 5.0, N, -1.0, 0.5, 0.0, 1.0, 2.0, 0.0, 1.0, hbar, m)
+        X, Y, Z, dx, psi, KX, KY, KZ, dkx = initialize_system(*args)
+        Xs, Ys, Zs, dxs, psis, KXs, KYs, KZs, dkxs = initialize_system(*args, sparse=True)
+        grid = Grid.cube(-5.0, 5.0, N)
+
+        self.assertEqual(Xs.shape, (N, 1, 1))
+        self.assertTrue(np.allclose(psi, psis))
+
+        V = potential_function(X, Y, Z, potential_type='sphere', V0=5.0, a=1.5)
+        self.assertTrue(np.array_equal(V, potential_function(Xs, Ys, Zs, potential_type='sphere', V0=5.0, a=1.5)))
+        self.assertTrue(np.array_equal(V, potential_function(grid, potential_type='sphere', V0=5.0, a=1.5)))
+
+        psi_ref = evolve_wavefunction(psi, V, dt, dx, KX, KY, KZ, hbar, m)
+        propagator = SplitOperatorPropagator(psi, V, dt, grid, hbar=hbar, m=m)
+        propagator.step()
+        self.assertTrue(np.allclose(propagator.psi, psi_ref, atol=1e-12))
+
+        E = compute_total_energy(psi, V, dx, KX, KY, KZ, hbar, m)
+        self.assertAlmostEqual(E, compute_total_energy(psi, V, dx, grid, None, None, hbar, m))
+
+    def test_total_energy_gaussian_3d(self):
+
+        # Free Gaussian packet: <T> = hbar^2/(2m) * (|k0|^2 + 3 / (2 sigma^2))
+        N = 32
+        sigma = 1.0
+        X, Y, Z, dx, psi, KX, KY, KZ, dkx = initialize_system(
+            -8.0, 8.0, N, 0.0, 0.0, 0.0, sigma, 2.0, 0.0, 0.0, 1.0, 1.0, sparse=True
+        )
+        V = potential_function(X, Y, Z, potential_type='free')
+        E = compute_total_energy(psi, V, dx, KX, KY, KZ, 1.0, 1.0)
+        self.assertAlmostEqual(E, 0.5 * (4.0 + 1.5), delta=1e-6)
+
+class TestGridND(unittest.TestCase):
+    def test_next_fast_size(self):
+
+        self.assertEqual(next_fast_size(64), 64)
+        self.assertEqual(next_fast_size(97), 100)
+        self.assertEqual(next_fast_size(121), 125)
+        self.assertEqual([next_fast_size(n) for n in (7, 11, 13)], [8, 12, 15])
+
+    def test_anisotropic_grid_2d(self):
+
+        grid, psi = initialize_grid((-10.0, -4.0), (10.0, 4.0), (97, 30),
+                                    (0.0, 0.0), (1.0, 0.7), (2.0, -1.0))
+        self.assertEqual(grid.shape, (100, 30))
+        self.assertEqual(psi.shape, (100, 30))
+        self.assertEqual(grid.KY.shape, (1, 30))
+        self.assertAlmostEqual(grid.dV, 0.2 * (8.0 / 30))
+
+        # <T> = hbar^2/(2m) * sum_i (k0_i^2 + 1 / (2 sigma_i^2))
+        V = potential_function(grid, potential_type='free')
+        E = compute_total_energy(psi, V, grid, grid, None, None, 1.0, 1.0)
+        self.assertAlmostEqual(E, 0.5 * (4.0 + 1.0 + 0.5 + 0.5 / 0.49), delta=1e-6)
+
+    def test_separable_3d_matches_1d(self):
+
+        # A free separable packet in 3D evolves as the product of 1D packets
+        dt = 0.05
+        grid3, psi3 = initialize_grid((-6.0, -5.0, -4.0), (6.0, 5.0, 4.0), (24, 20, 16),
+                                      (0.5, 0.0, -0.5), 1.0, (1.0, 0.0, 2.0))
+        propagator = SplitOperatorPropagator(psi3, potential_function(grid3), dt, grid3)
+        propagator.run(4)
+
+        psi = 1.0
+        for axis, (x0, k0) in enumerate(zip((0.5, 0.0, -0.5), (1.0, 0.0, 2.0))):
+            grid1 = Grid([grid3.axes[axis]])
+            psi1 = gaussian_wavepacket(grid1, (x0,), 1.0, (k0,))
+            propagator1 = SplitOperatorPropagator(psi1, potential_function(grid1), dt, grid1)
+            propagator1.run(4)
+            psi = psi * propagator1.psi.reshape(grid3.coords[axis].shape)
+        self.assertTrue(np.allclose(propagator.psi, psi, atol=1e-12))
+
+    def test_barrier_potential_1d(self):
+
+        grid = Grid.uniform(-5.0, 5.0, 40)
+        V = potential_function(grid, potential_type='barrier', V0=3.0, a=1.0)
+        self.assertEqual(V.shape, (40,))
+        self.assertTrue(np.array_equal(V, np.where(abs(grid.axes[0]) < 1.0, 3.0, 0.0)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.potential import potential_function
+from src.td_potential import TimeDependentPotential
+from src.imaginary_time import (ImaginaryTimePropagator, find_eigenstates, fourier_interpolate,
+                                initial_guess)
+
+def harmonic(grid):
+    return potential_function(grid, potential_type='harmonic', omega=1.0)
+
+class TestImaginaryTime(unittest.TestCase):
+    def test_harmonic_ladder_1d(self):
+
+        grid = Grid.uniform(-8.0, 8.0, 128)
+        energies, states = find_eigenstates(grid, harmonic, n_states=3, dtau=0.01, tol=1e-10)
+        self.assertTrue(np.allclose(energies, [0.5, 1.5, 2.5], atol=1e-6))
+        overlaps = np.array([[np.vdot(a, b) * grid.dV for b in states] for a in states])
+        self.assertTrue(np.allclose(overlaps, np.eye(3), atol=1e-8))
+
+    def test_coarse_to_fine_3d(self):
+
+        grid = Grid.cube(-6.0, 6.0, 32)
+        energies, states = find_eigenstates(grid, harmonic, n_states=2, dtau=0.02, tol=1e-8, levels=2)
+        self.assertTrue(np.allclose(energies, [1.5, 2.5], atol=1e-5))
+        self.assertEqual(states[0].shape, grid.shape)
+
+    def test_early_stop_and_norm_energy(self):
+
+        grid = Grid.uniform(-8.0, 8.0, 128)
+        prop = ImaginaryTimePropagator(initial_guess(grid), harmonic(grid), 0.01, grid)
+        steps = prop.relax(tol=1e-10, max_steps=20000)
+        self.assertTrue(prop.converged)
+        self.assertLess(steps, 20000)
+        # Energy from the norm decay matches the split propagator's eigenvalue
+        self.assertAlmostEqual(prop.energy, 0.5, places=4)
+        self.assertAlmostEqual(np.sum(np.abs(prop.psi)**2) * grid.dV, 1.0, places=12)
+
+        prop = ImaginaryTimePropagator(initial_guess(grid), harmonic(grid), 0.01, grid)
+        prop.relax(tol=1e-10, max_steps=30)
+        self.assertFalse(prop.converged)
+
+    def test_fourier_interpolate_band_limited(self):
+
+        coarse = Grid.uniform(0.0, 2 * np.pi, 16)
+        fine = Grid.uniform(0.0, 2 * np.pi, 48)
+        f = lambda x: np.sin(3 * x) + 0.5 * np.cos(5 * x)
+        self.assertTrue(np.allclose(fourier_interpolate(f(coarse.axes[0]), fine.shape), f(fine.axes[0])))
+
+    def test_rejects_time_dependent_potential(self):
+
+        grid = Grid.uniform(-8.0, 8.0, 64)
+        V = TimeDependentPotential(harmonic(grid))
+        with self.assertRaises(ValueError):
+            ImaginaryTimePropagator(initial_guess(grid), V, 0.01, grid)
+        with self.assertRaises(ValueError):
+            find_eigenstates(grid, harmonic(grid), levels=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import tempfile
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src import instrument
+from src.instrument import Profiler
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.integrators import CompositionPropagator
+from src.utils import compute_total_energy
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-5.0, 5.0, 16)
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.0, 0.0), 1.0, (2.0, 0.0, 0.0))
+        self.V = potential_function(self.grid, potential_type='barrier', V0=5.0, a=1.0)
+
+    def test_disabled_by_default(self):
+
+        self.assertIsNone(instrument.active())
+        propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        self.assertIs(instrument.instrumented(propagator.fft), propagator.fft)
+        propagator.run(3)
+
+    def test_phases_counters_and_hooks(self):
+
+        propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        reference = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        reference.run(5)
+        seen = []
+        with Profiler() as prof:
+            prof.add_hook(lambda p, prop: seen.append(prop.step_count))
+            propagator.run(5)
+            compute_total_energy(propagator.psi, self.V, self.grid, self.grid, None, None, 1.0, 1.0)
+        self.assertIsNone(instrument.active())
+        # Instrumentation does not change the result
+        self.assertTrue(np.array_equal(propagator.psi, reference.psi))
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+        self.assertEqual(prof.steps, 5)
+        self.assertEqual(prof.counters["fft_calls"], propagator.fft_count + 1)
+        self.assertEqual(prof.counters["fft_bytes"], prof.counters["fft_calls"] * self.psi.nbytes)
+        for name in ("fft", "ifft", "potential", "kinetic", "build_phases", "compute_total_energy"):
+            self.assertIn(name, prof.totals)
+        self.assertEqual(prof.totals["potential"][0], 5)
+        self.assertIn("steps/s", prof.summary())
+
+    def test_composition_and_nesting(self):
+
+        propagator = CompositionPropagator(self.psi, self.V, 0.01, self.grid, scheme='yoshida4')
+        with Profiler() as outer:
+            with Profiler() as inner:
+                propagator.run(2)
+            self.assertIs(instrument.active(), outer)
+        self.assertEqual(inner.counters["fft_calls"], propagator.fft_count)
+        self.assertEqual(inner.totals["potential"][0], 2 * propagator.potential_stages)
+        self.assertEqual(outer.totals, {})
+
+    def test_chrome_trace_and_memory(self):
+
+        @instrument.timed("allocate")
+        def allocate():
+            return np.ones(100000)
+
+        with Profiler(track_memory=True) as prof:
+            allocate()
+            with instrument.phase("outer"):
+                allocate()
+        self.assertGreaterEqual(prof.totals["allocate"][2], 2 * 800000)
+
+        @instrument.timed("temporaries")
+        def temporaries():
+            # Freed before the phase ends, but still counted at their peak
+            return float(np.sum(np.ones(100000) * 2.0))
+
+        with Profiler(track_memory=True) as scratch:
+            with instrument.phase("outer"):
+                temporaries()
+        self.assertGreaterEqual(scratch.totals["temporaries"][2], 800000)
+        self.assertGreaterEqual(scratch.totals["outer"][2], 800000)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = prof.save_chrome_trace(os.path.join(tmp, "trace.json"))
+            with open(path) as f:
+                trace = json.load(f)
+        spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(sorted(e["name"] for e in spans), ["allocate", "allocate", "outer"])
+        outer = next(e for e in spans if e["name"] == "outer")
+        nested = next(e for e in spans if e["name"] == "allocate" and e["ts"] >= outer["ts"])
+        self.assertLessEqual(nested["ts"] + nested["dur"], outer["ts"] + outer["dur"])
+
+if __name__ == '__main__':
+    unittest.main()
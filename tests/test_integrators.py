@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.integrators import SCHEMES, CompositionPropagator, AdaptivePropagator
+from src.td_potential import TimeDependentPotential, DipoleTerm
+from src.observables import ObservableRecorder
+
+class TestIntegrators(unittest.TestCase):
+    def setUp(self):
+        # 1D harmonic oscillator keeps the convergence study cheap
+        self.grid = Grid.uniform(-10.0, 10.0, 128)
+        self.psi = gaussian_wavepacket(self.grid, (1.5,), 0.8, (1.0,))
+        self.V = potential_function(self.grid, potential_type='harmonic', omega=1.0)
+        reference = CompositionPropagator(self.psi, self.V, 1.0 / 1000, self.grid, scheme='yoshida6')
+        reference.run(1000)
+        self.reference = reference.psi
+
+    def error(self, psi):
+        return np.sqrt(np.sum(np.abs(psi - self.reference)**2) * self.grid.dV)
+
+    def test_strang_matches_split_operator_3d(self):
+
+        grid = Grid.cube(-5.0, 5.0, 16)
+        psi = gaussian_wavepacket(grid, (-1.0, 0.0, 0.0), 1.0, (2.0, 0.0, 0.0))
+        V = potential_function(grid, potential_type='barrier', V0=5.0, a=1.0)
+        composition = CompositionPropagator(psi, V, 0.02, grid, scheme='strang')
+        composition.run(5)
+        reference = SplitOperatorPropagator(psi, V, 0.02, grid)
+        reference.run(5)
+        self.assertTrue(np.allclose(composition.psi, reference.psi, atol=1e-12))
+        self.assertEqual(composition.fft_count, reference.fft_count)
+
+    def test_convergence_orders(self):
+
+        for name, (stages, order) in SCHEMES.items():
+            errors = []
+            for n in (10, 20):
+                propagator = CompositionPropagator(self.psi, self.V, 1.0 / n, self.grid, scheme=name)
+                propagator.run(n)
+                errors.append(self.error(propagator.psi))
+            self.assertAlmostEqual(np.log2(errors[0] / errors[1]), order, delta=0.2, msg=name)
+
+    def test_adaptive_meets_tolerance(self):
+
+        for tol in (1e-3, 1e-6):
+            adaptive = AdaptivePropagator(self.psi, self.V, self.grid, tol=tol, dt=0.01)
+            adaptive.run_until(1.0)
+            self.assertAlmostEqual(adaptive.time, 1.0)
+            self.assertLess(self.error(adaptive.psi), tol)
+        # A loose tolerance must take far fewer FFTs than 100 fixed steps
+        loose = AdaptivePropagator(self.psi, self.V, self.grid, tol=1e-3, dt=0.01)
+        loose.run_until(1.0)
+        self.assertLess(loose.fft_count, 2 * 100 * 3 + 2)
+
+    def test_adaptive_time_dependent_potential(self):
+
+        def driven():
+            return TimeDependentPotential(self.V, [DipoleTerm(lambda t: (np.cos(3.0 * t),), self.grid)])
+        reference = CompositionPropagator(self.psi, driven(), 1.0 / 2000, self.grid, scheme='yoshida6')
+        reference.run(2000)
+
+        adaptive = AdaptivePropagator(self.psi, driven(), self.grid, tol=1e-6, dt=0.01)
+        recorder = adaptive.add_observer(ObservableRecorder(self.grid))
+        adaptive.run_until(1.0)
+        error = np.sqrt(np.sum(np.abs(adaptive.psi - reference.psi)**2) * self.grid.dV)
+        self.assertLess(error, 1e-6)
+        self.assertLess(adaptive.accepted + adaptive.rejected, 50)
+        # Only accepted steps are sampled, at their true times
+        self.assertEqual(len(recorder), adaptive.accepted + 1)
+        self.assertEqual(recorder['step'][-1], adaptive.accepted)
+        self.assertAlmostEqual(recorder['time'][-1], 1.0)
+        self.assertTrue(np.all(np.diff(recorder['time']) > 0))
+        np.testing.assert_allclose(recorder['norm'], 1.0, atol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
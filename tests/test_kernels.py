@@ -0,0 +1,170 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import evolve_wavefunction, SplitOperatorPropagator
+from src.integrators import CompositionPropagator
+from src.ensemble import EnsemblePropagator
+from src.observables import ObservableRecorder, EnergyRecorder
+from src.kernels import (available_kernel_backends, compare_kernel_backends, get_kernels,
+                         _blocks, KERNEL_BACKEND_ENV)
+
+
+class TestKernels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.shape = (12, 10, 40)
+        self.psi = rng.standard_normal(self.shape) + 1j * rng.standard_normal(self.shape)
+        self.phase = np.exp(1j * rng.uniform(0.0, 2.0 * np.pi, self.shape))
+        self.weight = rng.uniform(0.0, 5.0, self.shape)
+
+    def test_blocks_cover_each_point_once(self):
+        for shape in [(7,), (100000,), (5, 3), (3, 50000), (4, 300, 300), (2, 3, 4, 5)]:
+            count = np.zeros(shape, dtype=int)
+            for block in _blocks(shape, block_points=1000):
+                count[block] += 1
+            self.assertTrue(np.all(count == 1), msg=str(shape))
+
+    def test_backends_agree(self):
+        for name, err in compare_kernel_backends(shape=(8, 12, 16)).items():
+            self.assertLess(err, 1e-12, msg=name)
+
+    def test_numpy_kernels_match_plain_expressions(self):
+        kernels = get_kernels('numpy')
+        for dtype in (np.complex128, np.complex64):
+            psi = self.psi.astype(dtype)
+            phase = self.phase.astype(dtype)
+            weight = self.weight.astype(psi.real.dtype)
+            expected = psi * phase
+            rho = np.abs(expected)**2
+            norm, weighted = kernels.multiply_sums(psi, phase, weight)
+            self.assertTrue(np.array_equal(psi, expected))
+            rtol = 1e-12 if dtype == np.complex128 else 1e-6
+            self.assertAlmostEqual(norm / np.sum(rho, dtype=np.float64), 1.0, delta=rtol)
+            self.assertAlmostEqual(weighted / np.sum(rho * weight, dtype=np.float64), 1.0, delta=rtol)
+
+        # Broadcast operands (sparse phase, batch axes)
+        psi = np.stack([self.psi, 2 * self.psi])
+        phase = self.phase[:1, :1, :]
+        expected = psi * phase
+        norm, weighted = kernels.multiply_sums(psi, phase, self.weight)
+        self.assertTrue(np.array_equal(psi, expected))
+        self.assertAlmostEqual(weighted / np.sum(np.abs(expected)**2 * self.weight), 1.0, places=12)
+        self.assertAlmostEqual(kernels.sums(psi)[0] / norm, 1.0, places=12)
+
+    def test_exp_phase_is_bitwise(self):
+        kernels = get_kernels('numpy')
+        values = np.linspace(0.0, 400.0, 200000).reshape(50, 4000)
+        self.assertTrue(np.array_equal(kernels.exp_phase(values, 0.0125), np.exp(-1j * 0.0125 * values)))
+
+    def test_single_precision_phases(self):
+        grid = Grid.cube(-5.0, 5.0, 8, dtype=np.float32)
+        psi = gaussian_wavepacket(grid, (0.0, 0.0, 0.0), 1.0, (1.0, 0.0, 0.0)).astype(np.complex64)
+        V = potential_function(grid, potential_type='harmonic').astype(np.float32)
+
+        class Recording(type(get_kernels('numpy'))):
+            phases = []
+
+            def exp_phase(self, values, factor, dtype=np.complex128):
+                out = super().exp_phase(values, factor, dtype)
+                self.phases.append(out.dtype)
+                return out
+
+        kernels = Recording()
+        out = evolve_wavefunction(psi, V, 0.01, grid.dx, *grid.k, 1.0, 1.0, kernels=kernels)
+        self.assertEqual(out.dtype, np.complex64)
+        self.assertEqual(kernels.phases, [np.complex64, np.complex64])
+        for name in available_kernel_backends():
+            phase = get_kernels(name).exp_phase(np.asarray(V), 0.01, np.complex64)
+            self.assertEqual(phase.dtype, np.complex64, msg=name)
+
+    def test_get_kernels(self):
+        self.assertIs(get_kernels('numpy'), get_kernels('NumPy'))
+        kernels = get_kernels('numpy')
+        self.assertIs(get_kernels(kernels), kernels)
+        with self.assertRaises(ValueError):
+            get_kernels('fortran')
+        previous = os.environ.get(KERNEL_BACKEND_ENV)
+        os.environ[KERNEL_BACKEND_ENV] = 'auto'
+        try:
+            self.assertEqual(get_kernels().name, available_kernel_backends()[-1])
+        finally:
+            if previous is None:
+                del os.environ[KERNEL_BACKEND_ENV]
+            else:
+                os.environ[KERNEL_BACKEND_ENV] = previous
+
+
+class TestFusedObservables(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-8.0, 8.0, 24)
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 0.0, -1.0))
+        self.V = potential_function(self.grid, potential_type='harmonic', omega=0.5)
+
+    def test_energy_recorder_matches_observable_recorder(self):
+        for cls in (SplitOperatorPropagator, CompositionPropagator):
+            # Same sampling schedule, so the same kinetic half steps
+            plain = cls(self.psi, self.V, 0.01, self.grid)
+            plain.add_observer(ObservableRecorder(self.grid, every=3))
+            plain.run(9)
+
+            propagator = cls(self.psi, self.V, 0.01, self.grid)
+            full = propagator.add_observer(ObservableRecorder(self.grid, every=3))
+            light = propagator.add_observer(EnergyRecorder(self.grid, every=3))
+            propagator.run(9)
+            self.assertEqual(propagator.fft_count, plain.fft_count)
+            # The fused reductions leave psi bitwise unchanged
+            self.assertTrue(np.array_equal(propagator.psi, plain.psi), msg=cls.__name__)
+
+            table = full.to_numpy()
+            self.assertEqual(len(light), 4)
+            for name in EnergyRecorder.fields:
+                np.testing.assert_allclose(light[name], table[name], rtol=1e-12, atol=1e-14,
+                                           err_msg=f"{cls.__name__} {name}")
+        self.assertTrue(SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid).fuses_sums)
+
+    def test_energy_recorder_batched(self):
+        single = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        reference = single.add_observer(EnergyRecorder(self.grid, every=2))
+        single.run(4)
+
+        psis = [self.psi, 0.5 * self.psi, self.psi, self.psi]
+        ensemble = EnsemblePropagator(psis, self.V, 0.01, self.grid)
+        self.assertFalse(ensemble.fuses_sums)
+        recorder = ensemble.add_observer(EnergyRecorder(self.grid, every=2))
+        ensemble.run(4)
+        self.assertEqual(recorder['E'].shape, (3, 4))
+        self.assertEqual(recorder.to_numpy().shape, (3, len(EnergyRecorder.fields), 4))
+        np.testing.assert_array_equal(recorder['step'][:, 0], reference['step'])
+        for name in ('norm', 'T', 'V', 'E'):
+            for member, weight in enumerate((1.0, 0.25, 1.0, 1.0)):
+                np.testing.assert_allclose(recorder[name][:, member], weight * reference[name],
+                                           rtol=1e-10, err_msg=f"{name} {member}")
+
+    def test_backends_propagate_alike(self):
+        dx = self.grid.spacing
+        reference = evolve_wavefunction(self.psi, self.V, 0.01, dx, *self.grid.k, 1.0, 1.0,
+                                        kernels='numpy')
+        baseline = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        baseline.step()
+        np.testing.assert_allclose(reference, baseline.psi, atol=1e-13)
+        for name in available_kernel_backends():
+            propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid, kernels=name)
+            recorder = propagator.add_observer(EnergyRecorder(self.grid))
+            propagator.run(5)
+            baseline = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+            baseline.run(5)
+            np.testing.assert_allclose(propagator.psi, baseline.psi, atol=1e-12, err_msg=name)
+            np.testing.assert_allclose(recorder['norm'], 1.0, atol=1e-6, err_msg=name)
+
+
+if __name__ == '__main__':
+    unittest.main()
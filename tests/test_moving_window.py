@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.evolve import SplitOperatorPropagator
+from src.potential_library import Custom
+from src.moving_window import MovingWindowPropagator
+
+
+class TestMovingWindow(unittest.TestCase):
+    def setUp(self):
+        self.dx = 0.25
+        self.x = -30.0 + self.dx * np.arange(240)
+        self.y = -6.0 + 0.375 * np.arange(32)
+        self.big = Grid([self.x, self.y])
+        self.bump = Custom(lambda c: 1.5 * np.exp(-(c[0] - 5.0)**2 / 2.0) + 0.0 * c[1], key="bump")
+        self.r0, self.k0, self.dt = (-10.0, 0.0), (5.0, 0.0), 0.01
+
+    def window(self, n, center=-10.0):
+        i0 = int(round((center - 0.5 * n * self.dx - self.x[0]) / self.dx))
+        return i0, Grid([self.x[i0:i0 + n], self.y])
+
+    def test_follows_packet_and_matches_fixed_grid(self):
+        steps = 300
+        reference = SplitOperatorPropagator(gaussian_wavepacket(self.big, self.r0, 1.0, self.k0),
+                                            self.bump.evaluate(self.big), self.dt, self.big)
+        reference.run(steps)
+
+        i0, window = self.window(128)
+        mw = MovingWindowPropagator(gaussian_wavepacket(window, self.r0, 1.0, self.k0), self.bump,
+                                    self.dt, window, recenter_every=25, axes=(0,))
+        mw.run(steps)
+        self.assertEqual(mw.step_count, steps)
+        self.assertEqual(mw.origin[1], 0)
+        self.assertGreater(mw.origin[0], 40)
+
+        # The packet stays near the middle of the window
+        t, r_mean, k_mean, origin = mw.history[-1]
+        x = mw.window.axes[0]
+        self.assertLess(abs(r_mean[0] - 0.5 * (x[0] + x[-1])), 4.0)
+        self.assertAlmostEqual(k_mean[0], 5.0, delta=0.2)
+
+        j0 = i0 + int(mw.origin[0])
+        np.testing.assert_allclose(mw.psi, reference.psi[j0:j0 + 128], atol=1e-5)
+        budget = mw.error_budget()
+        self.assertLess(budget["norm_dropped"], 1e-8)
+        self.assertLess(budget["max_edge_probability"], 1e-6)
+
+    def test_small_window_reports_its_losses(self):
+        _, window = self.window(32)
+        mw = MovingWindowPropagator(gaussian_wavepacket(window, self.r0, 1.0, self.k0), self.bump,
+                                    self.dt, window, recenter_every=10, axes=(0,))
+        norm0 = np.sum(np.abs(mw.psi)**2) * window.dV
+        mw.run(200)
+        norm = np.sum(np.abs(mw.psi)**2) * window.dV
+        budget = mw.error_budget()
+        self.assertGreater(budget["norm_dropped"], 1e-6)
+        self.assertGreater(budget["max_edge_probability"], 1e-6)
+        # Split-operator steps are unitary: only the zeroed strips lose norm
+        self.assertAlmostEqual(norm, norm0 - budget["norm_dropped"], places=10)
+
+    def test_domain_limits_the_window(self):
+        _, window = self.window(64)
+        mw = MovingWindowPropagator(gaussian_wavepacket(window, self.r0, 1.0, self.k0),
+                                    lambda c: 0.0 * c[0] + 0.0 * c[1], self.dt, window,
+                                    recenter_every=20, axes=(0,), domain=((-30.0, -6.0), (0.0, 6.0)))
+        mw.run(400)
+        self.assertLessEqual(mw.window.axes[0][-1] + self.dx, 0.0 + 1e-9)
+        self.assertAlmostEqual(mw.window.axes[0][-1] + self.dx, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import tempfile
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.observables import ObservableRecorder
+from src.utils import compute_total_energy
+
+class TestObservables3D(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-8.0, 8.0, 32)
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 0.0, -1.0))
+        self.V = potential_function(self.grid, potential_type='harmonic', omega=0.5)
+
+    def test_recorder_samples_without_extra_ffts_3d(self):
+
+        propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        recorder = propagator.add_observer(ObservableRecorder(self.grid, every=2))
+        propagator.run(6)
+
+        self.assertEqual(propagator.fft_count, 2 * 6 + 2)
+        self.assertEqual(list(recorder['step']), [0, 2, 4, 6])
+        self.assertAlmostEqual(recorder['time'][-1], 0.06)
+
+        # Step 0 is exact
+        E0 = compute_total_energy(self.psi, self.V, self.grid, self.grid, None, None, 1.0, 1.0)
+        self.assertAlmostEqual(recorder['E'][0], E0, places=10)
+        self.assertAlmostEqual(recorder['<x>'][0], -1.0, places=6)
+        self.assertAlmostEqual(recorder['<ky>'][0], 0.0, places=6)
+        self.assertAlmostEqual(recorder['<kz>'][0], -1.0, places=6)
+        self.assertAlmostEqual(recorder['dx'][0], 1.0 / np.sqrt(2.0), places=6)
+
+        # Momentum-space quantities are exact at the end of the step
+        free = np.zeros_like(self.V)
+        T = compute_total_energy(propagator.psi, free, self.grid, self.grid, None, None, 1.0, 1.0)
+        self.assertAlmostEqual(recorder['T'][-1], T, places=10)
+        self.assertTrue(np.allclose(recorder['norm'], 1.0, atol=1e-6))
+
+        # And the run itself is unchanged by sampling
+        reference = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        reference.run(6)
+        self.assertTrue(np.allclose(propagator.psi, reference.psi, atol=1e-12))
+
+    def test_export_3d(self):
+
+        propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        recorder = propagator.add_observer(ObservableRecorder(self.grid, every=1))
+        propagator.run(20)  # grows the table past its initial capacity
+
+        table = recorder.to_numpy()
+        self.assertEqual(len(table), 21)
+        self.assertTrue(np.array_equal(table['step'], np.arange(21)))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'observables.csv')
+            recorder.to_csv(path)
+            loaded = np.genfromtxt(path, delimiter=',', names=True)
+        self.assertTrue(np.allclose(loaded['E'], table['E']))
+
+if __name__ == '__main__':
+    unittest.main()
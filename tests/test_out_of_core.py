@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.potential_library import Box
+from src.evolve import SplitOperatorPropagator
+from src.out_of_core import OutOfCorePropagator
+
+class TestOutOfCore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.grid = Grid.uniform((-5.0, -5.0, -4.0), (5.0, 5.0, 4.0), (20, 18, 12))
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 1.0, 0.0))
+        self.V = potential_function(self.grid, potential_type='barrier', V0=5.0, a=1.0)
+        self.reference = SplitOperatorPropagator(self.psi, self.V, 0.02, self.grid)
+        self.reference.run(4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_matches_in_memory_propagator(self):
+
+        # Budget for 3 planes: many small blocks in both passes
+        budget = 3 * 3 * self.psi[0].nbytes
+        prop = OutOfCorePropagator(self.path("psi.dat"), self.psi, self.V, 0.02, self.grid,
+                                   memory_budget=budget)
+        self.assertLess(prop.slab_rows, self.grid.shape[0])
+        self.assertLess(prop.block_cols, self.grid.shape[1])
+        prop.run(1)
+        prop.run(3)
+        self.assertTrue(np.allclose(prop.psi, self.reference.psi, atol=1e-12))
+        self.assertEqual(prop.fft_count, self.reference.fft_count + 2)
+
+        # An A/B pass pair per step plus three opening/closing passes per
+        # run(); V is read once per step
+        report = prop.io_report()
+        psi_bytes, V_bytes = self.psi.nbytes, self.V.nbytes
+        self.assertEqual(report["passes"], 2 * 4 + 3 * 2)
+        self.assertEqual(report["bytes_written"], report["passes"] * psi_bytes)
+        self.assertEqual(report["bytes_read"], report["passes"] * psi_bytes + 4 * V_bytes)
+
+    def test_lazy_psi_and_potential_and_reopen(self):
+
+        psi = lambda c: gaussian_wavepacket(self.grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 1.0, 0.0))[
+            np.searchsorted(self.grid.axes[0], c[0][:, 0, 0])]
+        prop = OutOfCorePropagator(self.path("lazy.dat"), psi, Box(1.0) * 5.0, 0.02, self.grid,
+                                   memory_budget=10**6)
+        prop.run(2)
+        prop.close()
+        # Continue from the file
+        prop = OutOfCorePropagator(self.path("lazy.dat"), None, Box(1.0) * 5.0, 0.02, self.grid)
+        prop.run(2)
+        self.assertTrue(np.allclose(prop.psi, self.reference.psi, atol=1e-12))
+        self.assertAlmostEqual(prop.norm(self.grid.dV),
+                               np.sum(np.abs(self.reference.psi)**2) * self.grid.dV, places=12)
+
+    def test_budget_too_small(self):
+
+        with self.assertRaises(ValueError):
+            OutOfCorePropagator(self.path("small.dat"), self.psi, self.V, 0.02, self.grid,
+                                memory_budget=1000)
+
+    def test_resume_from_missing_file(self):
+
+        path = self.path("missing.dat")
+        with self.assertRaises(FileNotFoundError):
+            OutOfCorePropagator(path, None, self.V, 0.02, self.grid)
+        self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator, evolve_wavefunction
+from src.parallel import SlabPropagator, slab_bounds
+
+class TestSlabPropagator(unittest.TestCase):
+    def setUp(self):
+        # Uneven sizes so the slabs differ in thickness
+        self.grid = Grid.uniform((-5.0, -5.0, -4.0), (5.0, 5.0, 4.0), (20, 18, 12))
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.5, 0.0), 1.0, (2.0, 1.0, 0.0))
+        self.V = potential_function(self.grid, potential_type='barrier', V0=5.0, a=1.0)
+
+    def test_matches_evolve_wavefunction(self):
+
+        reference = self.psi.copy()
+        for _ in range(4):
+            reference = evolve_wavefunction(reference, self.V, 0.02, None,
+                                            self.grid.KX, self.grid.KY, self.grid.KZ, 1.0, 1.0)
+        for workers in (1, 3):
+            with SlabPropagator(self.psi, self.V, 0.02, self.grid, workers=workers) as prop:
+                prop.run(1)
+                prop.run(3)
+                self.assertEqual(prop.step_count, 4)
+            self.assertTrue(np.allclose(prop.psi, reference, atol=1e-12))
+
+    def test_2d_single_precision(self):
+
+        grid = Grid.cube(-5.0, 5.0, 16, ndim=2)
+        psi = gaussian_wavepacket(grid, (0.0, 0.0), 1.0, (1.0, -1.0)).astype(np.complex64)
+        V = potential_function(grid, potential_type='harmonic')
+        serial = SplitOperatorPropagator(psi, V, 0.05, grid)
+        serial.run(5)
+        with SlabPropagator(psi, V, 0.05, grid, workers=2) as prop:
+            prop.run(5)
+            self.assertEqual(prop.psi.dtype, np.complex64)
+            self.assertTrue(np.allclose(prop.psi, serial.psi, atol=1e-5))
+
+    def test_slab_bounds_and_errors(self):
+
+        self.assertEqual(slab_bounds(10, 3), [(0, 3), (3, 7), (7, 10)])
+        grid = Grid.uniform(-5.0, 5.0, 16)
+        with self.assertRaises(ValueError):
+            SlabPropagator(np.ones(16, dtype=complex), np.zeros(16), 0.1, grid)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import warnings
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid, next_fast_size
+from src.initialize_system import gaussian_wavepacket
+from src.evolve import SplitOperatorPropagator
+from src.potential_library import Custom
+from src.planner import plan_grid, _difference
+
+
+def propagate(grid, r0, sigma, k0, V, dt, n_steps):
+    propagator = SplitOperatorPropagator(gaussian_wavepacket(grid, r0, sigma, k0), V, dt, grid)
+    propagator.run(n_steps)
+    return propagator.psi
+
+
+class TestPlanner(unittest.TestCase):
+    def test_free_packet(self):
+        plan = plan_grid((0.0,), 1.0, (2.0,), total_time=5.0, tol=1e-6)
+        n = plan.shape[0]
+        self.assertEqual(n, next_fast_size(n))
+        # Box follows the packet to x = 10 and its spreading
+        self.assertLess(plan.mins[0], -5.0)
+        self.assertGreater(plan.maxs[0], 10.0 + 5.0)
+        self.assertLess(plan.checks['grid_error'], 1e-6)
+        self.assertAlmostEqual(plan.dt * plan.n_steps, 5.0)
+        grid = plan.grid()
+        self.assertEqual(grid.shape, plan.shape)
+        self.assertGreater(plan.memory, 0)
+        self.assertGreater(plan.seconds, 0.0)
+
+    def test_harmonic_oscillator_meets_tolerance(self):
+        r0, sigma, k0 = (1.5,), 1.0, (0.0,)
+        plan = plan_grid(r0, sigma, k0, {'potential_type': 'harmonic'}, total_time=10.0, tol=1e-5)
+        # Confined: the box ends a little past the turning points
+        self.assertLess(plan.maxs[0] - plan.mins[0], 25.0)
+
+        grid = plan.grid()
+        psi = propagate(grid, r0, sigma, k0, 0.5 * grid.axes[0]**2, plan.dt, plan.n_steps)
+        fine = Grid.uniform([-15.0], [15.0], [256])
+        reference = propagate(fine, r0, sigma, k0, 0.5 * fine.axes[0]**2, plan.dt / 8, plan.n_steps * 8)
+        x = np.asarray(fine.axes[0])
+        inside = (x >= plan.mins[0]) & (x < plan.maxs[0])
+        self.assertLess(np.sum(np.abs(reference[~inside])**2) * fine.dV, 1e-10)
+        # Against a finer grid over the planned box and a smaller dt
+        fine = Grid.uniform(plan.mins, plan.maxs, [3 * plan.shape[0]])
+        reference = propagate(fine, r0, sigma, k0, 0.5 * fine.axes[0]**2, plan.dt / 8, plan.n_steps * 8)
+        error = _difference(psi, reference, grid.dV, fine.dV)
+        self.assertLess(error, 3e-5)
+
+    def test_barrier_resolves_potential(self):
+        barrier = Custom(lambda c: 2.0 * np.exp(-2.0 * c[0]**2), 'gaussian_barrier/2/2')
+        smooth = plan_grid((-12.0,), 2.0, (2.0,), barrier, total_time=10.0, tol=1e-5)
+        free = plan_grid((-12.0,), 2.0, (2.0,), None, total_time=10.0, tol=1e-5)
+        # Reflection: the box extends back past the start
+        self.assertLess(smooth.mins[0], free.mins[0])
+        self.assertLess(smooth.checks['grid_error'], 1e-5)
+        self.assertLess(smooth.checks['time_error'], 1e-5)
+        self.assertTrue(smooth.converged)
+        # Domain caps the box
+        capped = plan_grid((-12.0,), 2.0, (2.0,), barrier, total_time=10.0, tol=1e-5,
+                           domain=([-40.0], [40.0]), check=False)
+        self.assertGreaterEqual(capped.mins[0], -40.0)
+        self.assertEqual(capped.checks, {})
+
+    def test_unconverged_plan_warns(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            plan = plan_grid((-6.0,), 1.0, (3.0,), {'potential_type': 'barrier', 'V0': 5.0, 'a': 0.5},
+                             total_time=3.0, tol=1e-8, refinements=0)
+        self.assertFalse(plan.converged)
+        self.assertGreater(plan.checks['grid_error'], 1e-8)
+        self.assertTrue(any(issubclass(w.category, RuntimeWarning) for w in caught))
+        self.assertIn('not converged', str(plan))
+
+    def test_cube_and_params(self):
+        plan = plan_grid((1.0, 0.5), (1.0, 0.5), (0.0, 1.0), {'potential_type': 'harmonic'},
+                         total_time=1.0, tol=1e-4, check=False)
+        xmin, xmax, N = plan.cube()
+        self.assertLessEqual(xmin, min(plan.mins))
+        self.assertGreaterEqual(xmax, max(plan.maxs))
+        dx = min((hi - lo) / n for lo, hi, n in zip(plan.mins, plan.maxs, plan.shape))
+        self.assertLessEqual((xmax - xmin) / N, dx + 1e-12)
+        params = plan.params()
+        self.assertEqual(params['grid']['shape'], list(plan.shape))
+        self.assertEqual(params['dtype'], 'complex128')
+        self.assertIn('grid', str(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.potential import potential_function, double_slit_3d
+from src.potential_library import (Ball, Box, Custom, Harmonic, PotentialCache, Slab,
+                                   double_slit, slits)
+
+class TestPotentialLibrary(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.uniform((-5.0, -4.0, -3.0), (5.0, 4.0, 3.0), (20, 16, 12))
+        self.X, self.Y, self.Z = self.grid.dense()
+
+    def test_composition_matches_dense_formula(self):
+
+        potential = Harmonic(omega=(1.0, 2.0, 0.5), center=(0.5, 0.0, 0.0)) + \
+            Ball(1.5, center=(1.0, 0.0, 0.0)) * 4.0 + 2.0 * Harmonic().where(~Box(2.0))
+        X, Y, Z = self.X, self.Y, self.Z
+        expected = 0.5 * ((X - 0.5)**2 + 4.0 * Y**2 + 0.25 * Z**2)
+        expected += np.where((X - 1.0)**2 + Y**2 + Z**2 < 1.5**2, 4.0, 0.0)
+        inside = (abs(X) < 2.0) & (abs(Y) < 2.0) & (abs(Z) < 2.0)
+        expected += np.where(inside, 0.0, X**2 + Y**2 + Z**2)
+        self.assertTrue(np.allclose(potential.evaluate(self.grid), expected))
+
+    def test_chunked_evaluation_is_exact(self):
+
+        potential = Harmonic() + slits(0.5, (-0.75, 0.75), 0.2) * 10.0
+        whole = potential.evaluate(self.grid)
+        chunked = potential.evaluate(self.grid, chunk_bytes=1)  # one plane per chunk
+        self.assertTrue(np.array_equal(whole, chunked))
+        self.assertTrue(np.array_equal(potential.evaluate((self.X, self.Y, self.Z)), whole))
+
+    def test_potential_function_and_double_slit(self):
+
+        X, Y, Z = self.X, self.Y, self.Z
+        V = potential_function(self.grid, potential_type='sphere', V0=5.0, a=1.5)
+        self.assertTrue(np.array_equal(V, np.where(X**2 + Y**2 + Z**2 < 1.5**2, 5.0, 0.0)))
+
+        wall = np.abs(X) < 0.25
+        slit1 = (Y > 0.55) & (Y < 0.95)
+        slit2 = (Y > -0.95) & (Y < -0.55)
+        expected = np.where(wall & ~(slit1 | slit2), 20.0, 0.0)
+        self.assertTrue(np.array_equal(double_slit_3d(*self.grid.coords, 20.0), expected))
+        self.assertTrue(np.array_equal(double_slit(20.0)(self.grid), expected))
+
+    def test_lru_and_disk_cache(self):
+
+        potential = Harmonic(omega=0.5) + Box(1.0) * 3.0
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PotentialCache(maxsize=1, directory=tmp)
+            V = potential.evaluate(self.grid, cache=cache)
+            self.assertIs(potential.evaluate(self.grid, cache=cache), V)
+            self.assertFalse(V.flags.writeable)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # Equal parameters share the entry; a different grid does not
+            same = Harmonic(omega=0.5) + Box(1.0) * 3.0
+            self.assertIs(same.evaluate(self.grid, cache=cache), V)
+            other = Grid.cube(-5.0, 5.0, 8)
+            potential.evaluate(other, cache=cache)
+            self.assertEqual(len(cache), 1)
+
+            # Evicted from memory, but a new cache (or process) loads it from disk
+            fresh = PotentialCache(directory=tmp)
+            loaded = potential.evaluate(self.grid, cache=fresh)
+            self.assertTrue(np.array_equal(loaded, V))
+            self.assertEqual((fresh.hits, fresh.misses), (1, 0))
+
+    def test_custom_needs_key_for_cache(self):
+
+        well = lambda c: -3.0 * np.exp(-(c[0]**2 + c[1]**2 + c[2]**2))
+        V = Custom(well).evaluate(self.grid)
+        self.assertTrue(np.allclose(V, well((self.X, self.Y, self.Z))))
+        with self.assertRaises(ValueError):
+            Custom(well).evaluate(self.grid, cache=PotentialCache())
+        cached = Custom(well, key='well/3').evaluate(self.grid, cache=PotentialCache())
+        self.assertTrue(np.array_equal(cached, V))
+        self.assertTrue(np.all(Slab(2, -1.0, 1.0).mask(self.grid)[:, :, 6]))
+
+if __name__ == '__main__':
+    unittest.main()
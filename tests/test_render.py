@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import matplotlib.pyplot as plt
+
+from src.grid import Grid
+from src.evolve import SplitOperatorPropagator
+from src.render import (FrameRenderer, FrameRecorder, density_slice, potential_slice,
+                        render_frames, encode_video)
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.grid = Grid.cube(-5.0, 5.0, 16)
+        X, Y, Z = self.grid.coords
+        self.psi = (np.exp(-(X**2 + Y**2 + Z**2)) * np.exp(1j * X)).astype(np.complex128)
+        self.V = np.broadcast_to(0.5 * (X**2 + Y**2 + Z**2), self.grid.shape)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_slices(self):
+        rho = density_slice(self.psi)
+        self.assertEqual(rho.shape, (16, 16))
+        np.testing.assert_allclose(rho, np.abs(self.psi[:, :, 8])**2)
+        self.assertEqual(potential_slice(self.V, 3).shape, (16, 16))
+        self.assertIsNone(potential_slice(None))
+
+    def test_renderer_reuses_artists(self):
+        renderer = FrameRenderer(self.grid, None, potential=potential_slice(self.V))
+        image = renderer.image
+        first = renderer.render(density_slice(self.psi), 0)
+        second = renderer.render(0.5 * density_slice(self.psi), 1)
+        self.assertIs(renderer.image, image)
+        self.assertEqual(first.shape, second.shape)
+        self.assertEqual(first.shape[2], 4)
+        self.assertEqual(renderer.title.get_text(), "|psi|^2 at step 1")
+        # no pyplot figures are created
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_recorder_in_process(self):
+        recorder = FrameRecorder(self.dir, self.grid, None, every=2, workers=0, potential=self.V)
+        propagator = SplitOperatorPropagator(self.psi, self.V, 0.01, self.grid)
+        propagator.add_observer(recorder)
+        propagator.run(5)
+        paths = recorder.close()
+        self.assertEqual(recorder.steps, [0, 2, 4])
+        self.assertEqual([os.path.basename(p) for p in paths],
+                         ["frame_00000.png", "frame_00001.png", "frame_00002.png"])
+        for path in paths:
+            self.assertTrue(os.path.getsize(path) > 0)
+
+    def test_render_frames_pool(self):
+        densities = [density_slice(self.psi) * s for s in (1.0, 0.8, 0.6, 0.4)]
+        paths = render_frames(densities, self.dir, self.grid, None, workers=2, vmax=1.0)
+        self.assertEqual(len(paths), 4)
+        self.assertTrue(all(os.path.exists(p) for p in paths))
+        single = os.path.join(self.dir, "single")
+        reference = render_frames(densities[:1], single, self.grid, None, workers=0, vmax=1.0)
+        self.assertEqual(plt.imread(paths[0]).shape, plt.imread(reference[0]).shape)
+        np.testing.assert_array_equal(plt.imread(paths[0]), plt.imread(reference[0]))
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg not installed")
+    def test_encode_video(self):
+        render_frames([density_slice(self.psi)] * 3, self.dir, self.grid, None, workers=0)
+        output = encode_video(self.dir, os.path.join(self.dir, "out.mp4"), fps=5)
+        self.assertTrue(os.path.getsize(output) > 0)
+
+    @unittest.skipIf(os.name != "posix", "needs a shell script as a fake ffmpeg")
+    def test_encode_video_failure(self):
+        # An ffmpeg that fails (e.g. missing codec) is reported as RuntimeError
+        bin_dir = os.path.join(self.dir, "bin")
+        os.makedirs(bin_dir)
+        fake = os.path.join(bin_dir, "ffmpeg")
+        with open(fake, "w") as f:
+            f.write("#!/bin/sh\necho 'Unknown encoder libx264' >&2\nexit 1\n")
+        os.chmod(fake, 0o755)
+        path = os.environ["PATH"]
+        os.environ["PATH"] = bin_dir + os.pathsep + path
+        try:
+            with self.assertRaisesRegex(RuntimeError, "Unknown encoder"):
+                encode_video(self.dir, os.path.join(self.dir, "out.mp4"))
+        finally:
+            os.environ["PATH"] = path
+
+
+if __name__ == '__main__':
+    unittest.main()
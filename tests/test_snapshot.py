@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.snapshot import save_snapshot, Snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "psi.snp")
+        self.grid = Grid.cube(-10.0, 10.0, 32)
+        self.psi = np.broadcast_to(gaussian_wavepacket(self.grid, (-4.0, 1.0, 0.0), 1.0, (2.0, 0.0, 0.0)),
+                                   self.grid.shape).astype(np.complex128)
+        self.norm = np.sum(np.abs(self.psi)**2) * self.grid.dV
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_tiles_above_threshold(self):
+        header = save_snapshot(self.path, self.psi, self.grid.dV, threshold=1e-8, tile=8, grid=self.grid)
+        self.assertLess(len(header["tiles"]), 64)
+        self.assertLess(os.path.getsize(self.path), self.psi.nbytes / 4)
+        self.assertAlmostEqual(header["norm"], self.norm, places=12)
+        self.assertGreater(header["norm_lost"], 0.0)
+        self.assertLess(header["norm_lost"], 1e-5)
+
+        with Snapshot(self.path) as snap:
+            self.assertEqual(snap.shape, self.psi.shape)
+            self.assertEqual(snap.norm_lost, header["norm_lost"])
+            full = snap.load()
+            np.testing.assert_allclose(np.sum(np.abs(full)**2) * self.grid.dV,
+                                       self.norm - snap.norm_lost, rtol=1e-6)
+            # Kept tiles are exact to float32, dropped ones read as zero
+            kept = np.abs(self.psi)**2 > 1e-8
+            np.testing.assert_allclose(full[kept], self.psi[kept], rtol=0, atol=1e-7)
+            self.assertLess(np.max(np.abs(full - self.psi)), 1e-4)
+            self.assertEqual(snap.grid.shape, self.grid.shape)
+
+    def test_lazy_slices(self):
+        save_snapshot(self.path, self.psi, self.grid.dV, threshold=1e-8, tile=(8, 8, 4))
+        with Snapshot(self.path) as snap:
+            full = snap.load()
+            np.testing.assert_array_equal(snap[:, :, 16], full[:, :, 16])
+            np.testing.assert_array_equal(snap[5], full[5])
+            np.testing.assert_array_equal(snap[3:20, -5, 2:9], full[3:20, -5, 2:9])
+            np.testing.assert_array_equal(snap[..., 7], full[..., 7])
+            t = snap.tiles[0]
+            box = tuple(slice(s, s + n) for s, n in zip(t["start"], t["shape"]))
+            np.testing.assert_array_equal(snap.tile(0), full[box])
+            with self.assertRaises(IndexError):
+                snap[::2]
+
+    def test_quantized_error_bound(self):
+        bound = 1e-5
+        header = save_snapshot(self.path, self.psi, self.grid.dV, threshold=0.0, tile=16,
+                               precision="quantized", error_bound=bound)
+        self.assertEqual(header["norm_lost"], 0.0)
+        self.assertLessEqual(header["max_abs_error"], bound)
+        with Snapshot(self.path) as snap:
+            full = snap.load()
+        self.assertLessEqual(np.max(np.abs(full.real - self.psi.real)), bound)
+        self.assertLessEqual(np.max(np.abs(full.imag - self.psi.imag)), bound)
+        self.assertLess(os.path.getsize(self.path), self.psi.nbytes / 8)
+
+    def test_float16_and_bounding_box(self):
+        header = save_snapshot(self.path, self.psi, self.grid.dV, threshold=1e-6, tile=None,
+                               precision="float16", compress=False)
+        self.assertEqual(len(header["tiles"]), 1)
+        self.assertLess(header["max_abs_error"], 1e-3)
+        with Snapshot(self.path) as snap:
+            self.assertEqual(snap.dtype, np.complex64)
+            full = snap.load()
+        t = header["tiles"][0]
+        # 4 bytes a stored point plus the header
+        self.assertLess(os.path.getsize(self.path), 4 * np.prod(t["shape"]) + 4096)
+        self.assertAlmostEqual(header["norm"], self.norm, places=10)
+        np.testing.assert_allclose(np.sum(np.abs(full)**2) * self.grid.dV, header["norm_stored"], rtol=1e-5)
+        self.assertLess(header["norm_lost"], 1e-3)
+
+    def test_memmap_input(self):
+        mm = np.lib.format.open_memmap(os.path.join(self.dir, "psi.npy"), mode="w+",
+                                       dtype=np.complex128, shape=self.psi.shape)
+        mm[...] = self.psi
+        header = save_snapshot(self.path, mm, self.grid.dV, threshold=1e-8, tile=8)
+        reference = save_snapshot(os.path.join(self.dir, "ref.snp"), self.psi, self.grid.dV,
+                                  threshold=1e-8, tile=8)
+        self.assertEqual(header["norm_lost"], reference["norm_lost"])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            save_snapshot(self.path, self.psi, precision="quantized")
+        with self.assertRaises(ValueError):
+            save_snapshot(self.path, self.psi, precision="int4")
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot file")
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.evolve import SplitOperatorPropagator
+from src.spectrum import (AutocorrelationRecorder, spectrum, spectral_peaks, resolution,
+                          filter_diagonalization)
+
+
+def coherent_state_run(doubling=False, steps=6000):
+    # Displaced ground state of V = x^2/2: levels n + 1/2 with Poisson
+    # weights exp(-a) a^n / n!, a = x0^2 / 2
+    grid = Grid([np.linspace(-12, 12, 256, endpoint=False)])
+    x = grid.axes[0]
+    psi = gaussian_wavepacket(grid, (1.5,), 1.0, (0.0,))
+    propagator = SplitOperatorPropagator(psi, 0.5 * x**2, 0.01, grid)
+    recorder = propagator.add_observer(AutocorrelationRecorder(grid.dV, every=5, doubling=doubling))
+    propagator.run(steps)
+    return grid, propagator, recorder
+
+
+class TestSpectrum(unittest.TestCase):
+    def test_autocorrelation_samples(self):
+        grid, propagator, recorder = coherent_state_run(steps=100)
+        self.assertEqual(len(recorder), 21)
+        self.assertAlmostEqual(recorder.dt, 0.05)
+        self.assertAlmostEqual(recorder.values[0].real, 1.0, places=10)
+        # C(t) of the final state computed directly
+        psi0 = gaussian_wavepacket(grid, (1.5,), 1.0, (0.0,))
+        direct = np.vdot(psi0, propagator.psi) * grid.dV
+        self.assertAlmostEqual(abs(recorder.values[-1] - direct), 0.0, places=10)
+
+    def test_doubling_needs_real_initial_state(self):
+        grid = Grid([np.linspace(-12, 12, 256, endpoint=False)])
+        psi = gaussian_wavepacket(grid, (1.5,), 1.0, (1.0,))
+        propagator = SplitOperatorPropagator(psi, 0.5 * grid.axes[0]**2, 0.01, grid)
+        propagator.add_observer(AutocorrelationRecorder(grid.dV, doubling=True))
+        with self.assertRaises(ValueError):
+            propagator.run(1)
+
+    def test_harmonic_oscillator_levels(self):
+        weights = np.exp(-1.125) * 1.125**np.arange(5) / [1, 1, 2, 6, 24]
+        for doubling in (False, True):
+            _, _, recorder = coherent_state_run(doubling)
+            E, S = recorder.spectrum()
+            energies, heights = spectral_peaks(E, S, n_peaks=5)
+            np.testing.assert_allclose(energies, np.arange(5) + 0.5, atol=1e-3)
+            np.testing.assert_allclose(heights / heights.max(), weights / weights.max(), atol=0.01)
+
+            energies, amplitudes, widths = filter_diagonalization(recorder.values[:600], recorder.dt, 0.1, 5.0)
+            keep = np.abs(amplitudes) > 1e-4
+            # Exact up to the O(dt^2) splitting error
+            np.testing.assert_allclose(energies[keep], np.arange(5) + 0.5, atol=1e-4)
+            np.testing.assert_allclose(np.abs(amplitudes[keep]), weights, atol=1e-5)
+            self.assertLess(np.max(np.abs(widths[keep])), 1e-6)
+
+    def test_resolution(self):
+        limits = resolution(1001, 0.1)
+        self.assertAlmostEqual(limits['total_time'], 100.0)
+        self.assertAlmostEqual(limits['bin'], 2 * np.pi / 100.0)
+        self.assertAlmostEqual(limits['max_energy'], np.pi / 0.1)
+        self.assertAlmostEqual(resolution(1001, 0.1, window='none')['separation'], limits['bin'])
+
+    def test_filter_diagonalization_beats_fft(self):
+        # Two lines 0.05 apart in a signal whose FFT bin is ~0.16
+        t = np.arange(400) * 0.1
+        E0, d0 = np.array([1.0, 1.05, 2.3]), np.array([0.5, 0.3, 0.2])
+        C = np.exp(-1j * np.outer(t, E0)) @ d0
+        self.assertGreater(resolution(len(C), 0.1)['separation'], 0.05)
+        E, S = spectrum(C, 0.1)
+        near = (E > 0.8) & (E < 1.25)
+        self.assertEqual(len(spectral_peaks(E[near], S[near])[0]), 1)
+
+        energies, amplitudes, widths = filter_diagonalization(C, 0.1, 0.5, 3.0)
+        keep = np.abs(amplitudes) > 1e-6
+        np.testing.assert_allclose(energies[keep], E0, atol=1e-8)
+        np.testing.assert_allclose(amplitudes[keep].real, d0, atol=1e-8)
+
+    def test_unknown_window(self):
+        with self.assertRaises(ValueError):
+            spectrum(np.ones(8), 0.1, window='blackman')
+
+
+if __name__ == '__main__':
+    unittest.main()
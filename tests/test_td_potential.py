@@ -0,0 +1,111 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.grid import Grid
+from src.initialize_system import gaussian_wavepacket
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator, evolve_wavefunction
+from src.integrators import CompositionPropagator
+from src.observables import ObservableRecorder
+from src.td_potential import TimeDependentPotential, DipoleTerm, EnvelopeTerm, RegionTerm, bounding_box
+
+class TestTimeDependentPotential(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid.cube(-5.0, 5.0, 16)
+        self.psi = gaussian_wavepacket(self.grid, (-1.0, 0.0, 0.5), 1.0, (1.5, 0.0, 0.0))
+        self.V = potential_function(self.grid, potential_type='harmonic', omega=0.5)
+        self.dt = 0.02
+
+    def laser(self):
+        field = lambda t: (0.3 * np.sin(2.0 * t), 0.0, 0.1 * np.cos(t))
+        return DipoleTerm(field, *self.grid.coords)
+
+    def test_zero_field_matches_static(self):
+
+        td = TimeDependentPotential(self.V, [DipoleTerm(lambda t: (0.0, 0.0, 0.0), *self.grid.coords)])
+        static = SplitOperatorPropagator(self.psi, self.V, self.dt, self.grid)
+        dynamic = SplitOperatorPropagator(self.psi, td, self.dt, self.grid)
+        static.run(10)
+        dynamic.run(10)
+        self.assertTrue(np.allclose(dynamic.psi, static.psi, atol=1e-12))
+
+    def test_matches_full_rebuild_each_step(self):
+
+        # Reference: exponentiate the full V(t + dt/2) every step
+        W = np.zeros(self.grid.shape)
+        W[6:9, 4:12, :] = 2.0
+        barrier = lambda t, c: 3.0 * np.exp(-(c[0] - 0.5 * t)**2) + 0.0 * c[1] + 0.0 * c[2]
+        td = TimeDependentPotential(self.V, [
+            self.laser(),
+            EnvelopeTerm(W, lambda t: np.sin(t)**2),
+            RegionTerm(barrier, (slice(8, 12), slice(None), slice(2, 14)), *self.grid.coords),
+        ])
+        propagator = SplitOperatorPropagator(self.psi, td, self.dt, self.grid)
+        propagator.run(8)
+
+        psi = self.psi.copy()
+        KX, KY, KZ = self.grid.KX, self.grid.KY, self.grid.KZ
+        for n in range(8):
+            V = td.evaluate((n + 0.5) * self.dt)
+            psi = evolve_wavefunction(psi, V, self.dt, None, KX, KY, KZ, 1.0, 1.0)
+        self.assertTrue(np.allclose(propagator.psi, psi, atol=1e-10))
+
+    def test_composition_scheme_keeps_order(self):
+
+        td = TimeDependentPotential(self.V, [self.laser()])
+        reference = CompositionPropagator(self.psi, td, 0.01 / 16, self.grid, scheme='yoshida4')
+        reference.run(160)
+        errors = []
+        for n in (10, 20):
+            prop = CompositionPropagator(self.psi, td, 0.1 / n, self.grid, scheme='yoshida4')
+            prop.run(n)
+            errors.append(np.max(np.abs(prop.psi - reference.psi)))
+        # Fourth order: halving dt cuts the error by ~16
+        self.assertGreater(errors[0] / errors[1], 10.0)
+
+    def test_terms_touch_only_their_box(self):
+
+        W = np.zeros(self.grid.shape)
+        W[3:5, 2:7, 10] = 1.0
+        term = EnvelopeTerm(W, lambda t: 1.0)
+        self.assertEqual(term.W.shape, (2, 5, 1))
+        psi = np.ones(self.grid.shape, dtype=np.complex128)
+        term.apply_phase(psi, 0.0, 0.1, 1.0)
+        outside = np.ones(self.grid.shape, dtype=bool)
+        outside[bounding_box(W != 0)] = False
+        self.assertTrue(np.all(psi[outside] == 1.0))
+
+        region = (slice(0, 4), slice(0, 4), slice(0, 4))
+        term = RegionTerm(lambda t, c: t * (c[0] + c[1] + c[2]), region, *self.grid.coords)
+        psi = np.ones(self.grid.shape, dtype=np.complex128)
+        term.apply_phase(psi, 1.0, 0.1, 1.0)
+        self.assertTrue(np.all(psi[4:] == 1.0))
+        V = np.zeros(self.grid.shape)
+        term.add_to(V, 1.0)
+        self.assertTrue(np.allclose(np.angle(psi[region]), -0.1 * V[region]))
+
+    def test_recorder_uses_instantaneous_potential(self):
+
+        td = TimeDependentPotential(self.V, [self.laser()])
+        propagator = SplitOperatorPropagator(self.psi, td, self.dt, self.grid)
+        recorder = propagator.add_observer(ObservableRecorder(self.grid))
+        propagator.run(1)
+        rho = np.abs(self.psi)**2
+        expected = np.sum(rho * td.evaluate(0.0)) * self.grid.dV
+        self.assertAlmostEqual(recorder['V'][0], expected, places=10)
+
+    def test_complex64_stays_single_precision(self):
+
+        td = TimeDependentPotential(self.V, [self.laser()])
+        propagator = SplitOperatorPropagator(self.psi.astype(np.complex64), td, self.dt, self.grid)
+        propagator.run(3)
+        self.assertEqual(propagator.psi.dtype, np.complex64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import warnings
+import numpy as np
+import sys
+import os
+
+# Insert the parent directory (the project root) into sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.initialize_system import initialize_system
+from src.potential import potential_function
+from src.evolve import SplitOperatorPropagator
+from src.utils import DriftMonitor, compute_norm
+
+class TestSinglePrecision3D(unittest.TestCase):
+    def setup_run(self, dtype, real):
+        X, Y, Z, dx, psi, KX, KY, KZ, dkx = initialize_system(
+            -5.0, 5.0, 16, -1.0, 0.0, 0.0, 1.0, 2.0, 0.0, 0.0, 1.0, 1.0,
+            sparse=True, dtype=dtype
+        )
+        V = potential_function(X, Y, Z, potential_type='barrier', V0=5.0, a=1.0, dtype=real)
+        return X, dx, psi, V, KX, KY, KZ
+
+    def test_complex64_pipeline_3d(self):
+
+        X, dx, psi, V, KX, KY, KZ = self.setup_run(np.complex64, np.float32)
+        self.assertEqual(X.dtype, np.float32)
+        self.assertEqual(KX.dtype, np.float32)
+        self.assertEqual(psi.dtype, np.complex64)
+        self.assertEqual(V.dtype, np.float32)
+
+        propagator = SplitOperatorPropagator(psi, V, 0.01, KX, KY, KZ)
+        propagator.run(10)
+        self.assertEqual(propagator.psi.dtype, np.complex64)
+
+        X, dx, psi_d, V_d, KX, KY, KZ = self.setup_run(np.complex128, np.float64)
+        reference = SplitOperatorPropagator(psi_d, V_d, 0.01, KX, KY, KZ)
+        reference.run(10)
+        self.assertLess(np.max(np.abs(propagator.psi - reference.psi)), 1e-5)
+
+    def test_drift_monitor_3d(self):
+
+        X, dx, psi, V, KX, KY, KZ = self.setup_run(np.complex64, np.float32)
+        propagator = SplitOperatorPropagator(psi, V, 0.01, KX, KY, KZ)
+        monitor = DriftMonitor(psi, V, dx, KX, KY, KZ, 1.0, 1.0, tolerance=1e-12)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            monitor.track(propagator, 10, every=5)
+        self.assertEqual(monitor.steps, [0, 5, 10])
+        self.assertTrue(monitor.exceeded)
+        self.assertEqual(len(caught), 1)
+        self.assertLess(monitor.max_norm_drift, 1e-4)
+        self.assertAlmostEqual(compute_norm(propagator.psi, dx), monitor.norm0, delta=1e-4)
+
+if __name__ == '__main__':
+    unittest.main()